@@ -1,41 +1,180 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from flask import Flask, render_template, request, redirect, url_for, jsonify, send_file
+from flask import Flask, Response, abort, g, has_request_context, render_template, request, redirect, session, url_for, jsonify, send_file, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-import requests
+from flask_migrate import Migrate, upgrade as migrate_upgrade
+import click
 from datetime import datetime, timedelta, timezone
 import os
 import json
 import time
-from sqlalchemy import or_
-import pandas as pd
-from io import BytesIO
+from sqlalchemy import and_, case as sql_case, event, func, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError, OperationalError
+import numpy as np
+import multiprocessing
+import threading
+import uuid
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from collections import Counter, OrderedDict
+from routing import CircuitBreaker, RoutingClient, estimate_matrix
+import solver
+import fleet
+import search
+import db_profiles
+import metrics
+from gazetteer import Gazetteer
+from province_matrix import ProvinceMatrix
+import work_calendar
 
 app = Flask(__name__)
 
 # Veritabanı Konfigürasyonu (Supabase PostgreSQL uyumlu)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get("DATABASE_URL", "sqlite:///local_fallback.db")
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+# Bağlantı profili (direct, pooler, sqlite-local); verilmezse adresten tahmin edilir (bkz. db_profiles.py)
+app.config['DB_PROFILE'] = os.environ.get('DB_PROFILE') or db_profiles.detect_profile(app.config['SQLALCHEMY_DATABASE_URI'])
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = db_profiles.engine_options(
+    app.config['DB_PROFILE'], app.config['SQLALCHEMY_DATABASE_URI'], os.environ
+)
+
+# İsteğe bağlı okuma replikası: dashboard listesi, istatistikler ve dışa aktarım buradan okunur.
+# Yazma yapan kullanıcı REPLICA_STICKY_SECONDS boyunca kendi değişikliğini görebilmek için birincil sunucudan okur.
+app.config['DATABASE_REPLICA_URL'] = os.environ.get('DATABASE_REPLICA_URL')
+app.config['REPLICA_STICKY_SECONDS'] = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+if app.config['DATABASE_REPLICA_URL']:
+    replica_url = app.config['DATABASE_REPLICA_URL']
+    app.config['SQLALCHEMY_BINDS'] = {
+        'replica': {
+            'url': replica_url,
+            **db_profiles.engine_options(
+                os.environ.get('DB_REPLICA_PROFILE') or db_profiles.detect_profile(replica_url),
+                replica_url, os.environ
+            ),
+        },
+    }
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret')
 
+# Yönlendirme arka ucu: 'osrm' (OSRM_BASE_URL'deki HTTP sunucusu) veya 'offline' (yerleşik karayolu ağı, ağ gerektirmez)
+app.config['ROUTING_BACKEND'] = os.environ.get('ROUTING_BACKEND', 'osrm')
+
+# Çevrimdışı karayolu ağı: derlenmiş ağ dosyası, kaynak kenar listesi ve noktaların ağa bağlandığı yerel yol hızı (km/sa)
+app.config['ROAD_GRAPH_PATH'] = os.environ.get('ROAD_GRAPH_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'road_graph.npz'))
+app.config['ROAD_EDGES_PATH'] = os.environ.get('ROAD_EDGES_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'road_edges.csv'))
+app.config['ROAD_ACCESS_SPEED_KMH'] = float(os.environ.get('ROAD_ACCESS_SPEED_KMH', 50))
+
+# OSRM yönlendirme istemcisi: sunucu adresi (kendi barındırdığınız sunucu), paralel istek sayısı, zaman aşımı (sn) ve yeniden deneme
+app.config['OSRM_BASE_URL'] = os.environ.get('OSRM_BASE_URL', 'http://router.project-osrm.org')
+app.config['ROUTING_MAX_WORKERS'] = int(os.environ.get('ROUTING_MAX_WORKERS', 8))
+app.config['ROUTING_TIMEOUT'] = float(os.environ.get('ROUTING_TIMEOUT', 15))
+app.config['ROUTING_RETRIES'] = int(os.environ.get('ROUTING_RETRIES', 2))
+app.config['ROUTING_BACKOFF'] = float(os.environ.get('ROUTING_BACKOFF', 0.5))
+
+# Devre kesici: ardışık hata sayısı, "yavaş" sayılan gecikme (sn) ve yeniden deneme aralığı (sn)
+app.config['ROUTING_BREAKER_FAILURES'] = int(os.environ.get('ROUTING_BREAKER_FAILURES', 3))
+app.config['ROUTING_BREAKER_LATENCY'] = float(os.environ.get('ROUTING_BREAKER_LATENCY', 5))
+app.config['ROUTING_BREAKER_RESET'] = float(os.environ.get('ROUTING_BREAKER_RESET', 30))
+
+# OSRM'e ulaşılamadığında haversine tahmini: karayolu/kuş uçuşu oranı ve ortalama hız (km/sa)
+app.config['ESTIMATE_DETOUR_FACTOR'] = float(os.environ.get('ESTIMATE_DETOUR_FACTOR', 1.3))
+app.config['ESTIMATE_SPEED_KMH'] = float(os.environ.get('ESTIMATE_SPEED_KMH', 80))
+
+# OSRM /table isteğinde tek seferde gönderilecek en fazla koordinat sayısı
+app.config['OSRM_TABLE_MAX_COORDS'] = int(os.environ.get('OSRM_TABLE_MAX_COORDS', 100))
+
+# Arka plan iş havuzu: eşzamanlı iş sayısı ve tamamlanan işlerin saklanma süresi (sn)
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOB_RETENTION'] = int(os.environ.get('JOB_RETENTION', 24 * 3600))
+# Bu kadar sn ilerleme yazmamış kuyruktaki/çalışan iş, sahibi worker öldü sayılıp başarısız işaretlenir
+app.config['JOB_STALE_TIMEOUT'] = int(os.environ.get('JOB_STALE_TIMEOUT', 15 * 60))
+
+# Dashboard sayfa boyutu (varsayılan ve `per_page` ile istenebilecek en fazla)
+app.config['DASHBOARD_PAGE_SIZE'] = int(os.environ.get('DASHBOARD_PAGE_SIZE', 50))
+app.config['DASHBOARD_MAX_PAGE_SIZE'] = int(os.environ.get('DASHBOARD_MAX_PAGE_SIZE', 200))
+
+# Dashboard istatistik özetinin veritabanından yeniden yükleneceği süre (sn)
+app.config['STATS_SNAPSHOT_TTL'] = int(os.environ.get('STATS_SNAPSHOT_TTL', 60))
+
+# İçe aktarımda tek parçada okunup tek INSERT ve tek işlemle yazılacak satır sayısı
+app.config['IMPORT_BATCH_SIZE'] = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+
+# Dosya yükleme sınırları: en fazla boyut (bayt) ve veri satırı; dosyaların bekletileceği dizin
+app.config['IMPORT_MAX_BYTES'] = int(os.environ.get('IMPORT_MAX_BYTES', 50 * 1024 * 1024))
+app.config['IMPORT_MAX_ROWS'] = int(os.environ.get('IMPORT_MAX_ROWS', 200000))
+app.config['IMPORT_SPOOL_DIR'] = os.environ.get('IMPORT_SPOOL_DIR') or None
+# İstek gövdesi sınırı (dosya + form başlıkları payı); Werkzeug bunu aşan gövdeyi,
+# Content-Length'i olmayan parçalı (chunked) yüklemeler dahil, okumayı keser
+app.config['MAX_CONTENT_LENGTH'] = app.config['IMPORT_MAX_BYTES'] + 64 * 1024
+# İçe aktarma raporunda satır satır listelenecek en fazla sorunlu satır
+app.config['IMPORT_MAX_REPORTED_ROWS'] = int(os.environ.get('IMPORT_MAX_REPORTED_ROWS', 1000))
+
+# Dışa aktarımda veritabanından tek seferde okunacak satır sayısı
+app.config['EXPORT_CHUNK_SIZE'] = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+
+# Bellekte tutulacak en fazla rota planı sonucu
+app.config['PLAN_CACHE_SIZE'] = int(os.environ.get('PLAN_CACHE_SIZE', 256))
+
+# Rota çözücüsünün yerel arama için kullanabileceği en fazla süre (sn)
+app.config['SOLVER_TIME_BUDGET'] = float(os.environ.get('SOLVER_TIME_BUDGET', 0.5))
+
+# Teslim tarihleri (due_date): 'soft' gecikmeyi öncelik ağırlığıyla cezalandırır,
+# 'hard' önce geciken durak sayısını en aza indirir; istekte deadline_mode ile ezilebilir
+app.config['DEADLINE_MODE'] = os.environ.get('DEADLINE_MODE', 'soft')
+# Gecikme dakikası başına öncelik ağırlığı ('Acil=10,Yüksek=3'); listede olmayan öncelikler 1
+app.config['PRIORITY_WEIGHTS'] = dict(solver.DEFAULT_PRIORITY_WEIGHTS, **solver.parse_weights(os.environ.get('PRIORITY_WEIGHTS', '')))
+
+# Çok avukatlı plan: alt turları paralel çözen süreç sayısı (1 = aynı süreçte sırayla),
+# istekte kapasite verilmeyen avukatın günlük durak sayısı ve planın kapsadığı iş günü
+app.config['SOLVER_PROCESSES'] = int(os.environ.get('SOLVER_PROCESSES', min(os.cpu_count() or 1, 4)))
+app.config['LAWYER_DAILY_STOPS'] = int(os.environ.get('LAWYER_DAILY_STOPS', fleet.DEFAULT_DAILY_STOPS))
+app.config['PLAN_DAYS'] = int(os.environ.get('PLAN_DAYS', 5))
+
+# Toplu plan (/api/planla/batch): tek istekteki en fazla plan ve planları eşzamanlı çözen iş parçacığı sayısı
+app.config['BATCH_MAX_PLANS'] = int(os.environ.get('BATCH_MAX_PLANS', 50))
+app.config['BATCH_WORKERS'] = int(os.environ.get('BATCH_WORKERS', 4))
+
+# Rota bacak önbelleği: anahtar hassasiyeti (ondalık basamak), geçerlilik süresi (sn) ve LRU boyutu
+app.config['ROUTE_CACHE_PRECISION'] = int(os.environ.get('ROUTE_CACHE_PRECISION', 4))
+app.config['ROUTE_CACHE_TTL'] = int(os.environ.get('ROUTE_CACHE_TTL', 30 * 24 * 3600))
+app.config['ROUTE_CACHE_SIZE'] = int(os.environ.get('ROUTE_CACHE_SIZE', 10000))
+
+# Önceden hesaplanmış il merkezi / adliye bacak matrisi (flask build-province-matrix); yoksa kullanılmaz
+app.config['PROVINCE_MATRIX_PATH'] = os.environ.get('PROVINCE_MATRIX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'province_matrix.npy'))
+
+# Adliye sözlüğü (gazetteer) dosyası; varsayılan: data/gazetteer.csv
+app.config['GAZETTEER_PATH'] = os.environ.get('GAZETTEER_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv'))
+# Adı tanınmayan ama koordinatı olan dosyalar bu mesafedeki (km) en yakın adliyeye bağlanır
+app.config['GAZETTEER_SNAP_KM'] = float(os.environ.get('GAZETTEER_SNAP_KM', 25))
+
+# Çalışma takvimi: dini bayram tarihleri dosyası, mesai saatleri, yarım günlerde (arife) mesai bitişi
+app.config['HOLIDAYS_PATH'] = os.environ.get('HOLIDAYS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'holidays.csv'))
+app.config['WORKDAY_START'] = work_calendar.parse_clock(os.environ.get('WORKDAY_START', '09:00'))
+app.config['WORKDAY_END'] = work_calendar.parse_clock(os.environ.get('WORKDAY_END', '17:00'))
+app.config['HALF_DAY_END'] = work_calendar.parse_clock(os.environ.get('HALF_DAY_END', '13:00'))
+# Adli tatilde (20 Temmuz - 31 Ağustos) adliye ziyareti planlanmaz; 0 ile kapatılır
+app.config['JUDICIAL_RECESS'] = os.environ.get('JUDICIAL_RECESS', '1') == '1'
+# Adliyede dosya başına işlem süresi (dk); SERVICE_MINUTES dosya türüne göre ezer ('Ceza Davası=60,İcra Takibi=20')
+app.config['DEFAULT_SERVICE_MINUTES'] = float(os.environ.get('DEFAULT_SERVICE_MINUTES', 45))
+app.config['SERVICE_MINUTES'] = work_calendar.parse_service_minutes(os.environ.get('SERVICE_MINUTES', ''))
+
 db = SQLAlchemy(app)
+migrate = Migrate(app, db)
 
-# Sürüm okuma
-import subprocess
+# Sürüm okuma: derleme sırasında APP_VERSION (Docker build-arg) ile sabitlenir,
+# verilmemişse CI'ın güncellediği VERSION dosyası okunur
 import functools
 
 @functools.lru_cache(maxsize=1)
 def get_version():
-    try:
-        # Try to get version from git tags
-        version = subprocess.check_output(['git', 'describe', '--tags', '--abbrev=0'], stderr=subprocess.DEVNULL).decode('utf-8').strip()
+    version = os.environ.get('APP_VERSION')
+    if version:
         return version
-    except Exception:
-        pass
 
     try:
-        with open('VERSION', 'r') as f:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'VERSION'), 'r') as f:
             return f.read().strip()
     except Exception:
         return "Bilinmiyor"
@@ -47,6 +186,19 @@ def inject_version():
 # --- Veritabanı Modelleri ---
 class Case(db.Model):
     __tablename__ = 'cases'
+    # Sorgu yollarına göre indeksler; değişiklikler migrations/ altında sürümlenir
+    __table_args__ = (
+        # Dashboard varsayılan sıralaması ve keyset sayfalama
+        db.Index('ix_cases_created_at_id', 'created_at', 'id'),
+        # Dashboard şehir filtresi + sıralama
+        db.Index('ix_cases_city_created_at_id', 'city', 'created_at', 'id'),
+        # Rota sayfası: aktif/duruşma bekleyen dosyalar, yeniden eskiye
+        db.Index('ix_cases_status_created_at', 'status', 'created_at'),
+        # Acil dosyalar
+        db.Index('ix_cases_priority', 'priority'),
+        # Excel yüklemesinde mükerrer kontrolü; aynı dosya no iki kez kaydedilemez
+        db.Index('uq_cases_case_no', 'case_no', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     case_no = db.Column(db.String(50), nullable=False)
     client = db.Column(db.String(100))
@@ -84,94 +236,589 @@ class Case(db.Model):
             'lon': self.lon
         }
 
-# --- OSRM API Karayolu Hesaplama ---
-def get_osrm_route(lat1, lon1, lat2, lon2):
-    url = f"http://router.project-osrm.org/route/v1/driving/{lon1},{lat1};{lon2},{lat2}?overview=false"
-    try:
-        response = requests.get(url, timeout=15).json()
-        if response.get("code") == "Ok":
-            distance_km = response["routes"][0]["distance"] / 1000.0
-            duration_min = response["routes"][0]["duration"] / 60.0
-            return distance_km, duration_min
-    except Exception as e:
-        print(f"OSRM Hatası: {e}")
-    return float('inf'), float('inf')
-
-# --- Şehir Koordinatları (Basit Harita Verisi) ---
-CITY_COORDS = {
-    'Adana': {'lat': 37.0000, 'lon': 35.3213},
-    'Ankara': {'lat': 39.9334, 'lon': 32.8597},
-    'Antalya': {'lat': 36.8969, 'lon': 30.7133},
-    'Bursa': {'lat': 40.1828, 'lon': 29.0667},
-    'Diyarbakır': {'lat': 37.9144, 'lon': 40.2306},
-    'Erzurum': {'lat': 39.9043, 'lon': 41.2679},
-    'Eskişehir': {'lat': 39.7767, 'lon': 30.5206},
-    'Gaziantep': {'lat': 37.0662, 'lon': 37.3833},
-    'İstanbul': {'lat': 41.0082, 'lon': 28.9784},
-    'İzmir': {'lat': 38.4192, 'lon': 27.1287},
-    'Kayseri': {'lat': 38.7312, 'lon': 35.4787},
-    'Kocaeli': {'lat': 40.8533, 'lon': 29.8815},
-    'Konya': {'lat': 37.8714, 'lon': 32.4846},
-    'Mersin': {'lat': 36.8000, 'lon': 34.6333},
-    'Sakarya': {'lat': 40.7569, 'lon': 30.3783},
-    'Samsun': {'lat': 41.2928, 'lon': 36.3313},
-    'Şanlıurfa': {'lat': 37.1591, 'lon': 38.7969},
-    'Trabzon': {'lat': 41.0027, 'lon': 39.7168},
-    'Van': {'lat': 38.4891, 'lon': 43.4089},
-    'Denizli': {'lat': 37.7765, 'lon': 29.0864},
-    'Malatya': {'lat': 38.3552, 'lon': 38.3095},
-}
+# Tam metin arama indeksi tabloyla birlikte oluşturulur/silinir (bkz. search.py)
+@event.listens_for(Engine, 'connect')
+def _register_search_functions(dbapi_connection, connection_record):
+    search.register_sqlite_functions(dbapi_connection)
+    if app.config['DB_PROFILE'] == 'sqlite-local':
+        db_profiles.apply_sqlite_pragmas(dbapi_connection)
+
+@event.listens_for(Case.__table__, 'after_create')
+def _create_search_index(target, connection, **kw):
+    search.ensure_search_index(connection, target.name)
+
+@event.listens_for(Case.__table__, 'before_drop')
+def _drop_search_index(target, connection, **kw):
+    search.drop_search_index(connection, target.name)
+
+# --- Metrikler ---
+# /metrics adresinden Prometheus metin biçiminde okunur (bkz. metrics.py)
+HTTP_REQUEST_SECONDS = metrics.Histogram(
+    'http_request_duration_seconds', 'İstek süresi (yanıt başlıklarına kadar)', ('endpoint', 'method'))
+HTTP_REQUESTS = metrics.Counter('http_requests_total', 'Tamamlanan istekler', ('endpoint', 'method', 'status'))
+DB_QUERY_SECONDS = metrics.Histogram('db_query_duration_seconds', 'Tek bir SQL sorgusunun süresi')
+DB_QUERIES_PER_REQUEST = metrics.Histogram(
+    'db_queries_per_request', 'İstek başına SQL sorgu sayısı', ('endpoint',),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250))
+DB_SECONDS_PER_REQUEST = metrics.Histogram(
+    'db_time_per_request_seconds', 'İstek başına toplam SQL süresi', ('endpoint',))
+ROUTING_CALL_SECONDS = metrics.Histogram(
+    'routing_call_duration_seconds', 'Yönlendirme arka ucu çağrı süresi (route: tek bacak, table: matris)',
+    ('backend', 'call'))
+ROUTING_LEGS = metrics.Counter('routing_legs_total', 'Plan bacaklarının kaynağı (matrix/cache/routed/estimated)', ('source',))
+PLAN_PHASE_SECONDS = metrics.Histogram(
+    'route_plan_duration_seconds', 'calculate_route süresi (fetch: bacak matrisi, solve: çözücü, total: tamamı)',
+    ('phase',))
+IMPORT_ROWS = metrics.Counter('import_rows_total', 'İçe aktarılan satırlar', ('status',))
+IMPORT_ROWS_PER_SECOND = metrics.Histogram(
+    'import_rows_per_second', 'İçe aktarma işi başına işlenen satır/sn',
+    buckets=(100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000))
+metrics.CallbackMetric(
+    'cache_hit_ratio', 'Önbellek isabet oranı (süreç başlangıcından beri)',
+    lambda: {('route_leg',): route_leg_cache.stats()['hit_ratio'], ('plan',): plan_cache.stats()['hit_ratio']},
+    labelnames=('cache',))
+metrics.CallbackMetric(
+    'cache_lookups_total', 'Önbellek aramaları', lambda: _cache_lookups(), labelnames=('cache', 'result'),
+    kind='counter')
+query_tracker = metrics.QueryTracker()
+
+def _cache_lookups():
+    legs, plans = route_leg_cache.stats(), plan_cache.stats()
+    return {
+        ('route_leg', 'memory_hit'): legs['memory_hits'], ('route_leg', 'db_hit'): legs['db_hits'],
+        ('route_leg', 'miss'): legs['misses'],
+        ('plan', 'hit'): plans['hits'], ('plan', 'miss'): plans['misses'],
+    }
 
-# --- Rota Optimizasyon Algoritması ---
-def calculate_route(selected_case_ids, start_city="Bursa", start_date_str=None):
-    # 1. Seçilen dosyaları çek
-    # DÜZELTİLDİ: selected_case_ids listesi string'lerden integer'lara çevrilmeli
-    selected_case_ids = [int(i) for i in selected_case_ids]
-    cases = Case.query.filter(Case.id.in_(selected_case_ids)).all()
+@event.listens_for(Engine, 'before_cursor_execute')
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('query_started', None)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        DB_QUERY_SECONDS.observe(elapsed)
+        query_tracker.record(elapsed)
+
+@app.before_request
+def _start_request_metrics():
+    g.request_started = time.perf_counter()
+    query_tracker.start()
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Eşleşmeyen adresler (404) tek etikette toplanır; etiket sayısı sınırlı kalır
+        endpoint = request.endpoint or 'other'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        queries = query_tracker.stop()
+        if queries is not None:
+            DB_QUERIES_PER_REQUEST.observe(queries[0], endpoint=endpoint)
+            DB_SECONDS_PER_REQUEST.observe(queries[1], endpoint=endpoint)
+    return response
+
+class RouteLeg(db.Model):
+    """OSRM'den alınmış tek bir bacağın kalıcı önbellek kaydı."""
+    __tablename__ = 'route_legs'
+    key = db.Column(db.String(64), primary_key=True)
+    distance_km = db.Column(db.Float, nullable=False)
+    duration_min = db.Column(db.Float, nullable=False)
+    fetched_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+class Job(db.Model):
+    """Arka planda çalışan uzun işlerin (ör. rota planlama) durumu ve sonucu.
+
+    Durum veritabanında tutulduğu için iş hangi worker'da çalışırsa çalışsın
+    her worker'dan sorgulanabilir.
+    """
+    __tablename__ = 'jobs'
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    kind = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    progress = db.Column(db.Float, nullable=False, default=0.0)
+    message = db.Column(db.String(200))
+    params = db.Column(db.Text)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
-    if not cases:
-        return []
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': round(self.progress, 1),
+            'message': self.message,
+            'error': self.error,
+        }
 
-    # 2. Şehirlere göre grupla
-    grouped_destinations = {}
+# --- Yönlendirme Arka Ucu (OSRM / Çevrimdışı Karayolu Ağı) ---
+ROUTING_BACKENDS = ('osrm', 'offline')
 
-    for case in cases:
-        city = case.city
-        coords = None
-        if case.lat and case.lon:
-            coords = {'lat': case.lat, 'lon': case.lon}
-        elif city in CITY_COORDS:
-            coords = CITY_COORDS[city]
-
-        if not coords:
-            # Koordinatları bulunamayan ve sisteme eklenmemiş (lat/lon yok) şehirleri atla
-            continue
+def load_road_graph():
+    """Derlenmiş karayolu ağını yükler; dosya yoksa kenar listesinden kurar."""
+    from road_graph import RoadGraph
 
-        city_key = city
+    if os.path.exists(app.config['ROAD_GRAPH_PATH']):
+        return RoadGraph.load(app.config['ROAD_GRAPH_PATH'])
+    print(f"{app.config['ROAD_GRAPH_PATH']} bulunamadı, ağ kenar listesinden kuruluyor (flask build-road-graph)")
+    provinces = Gazetteer.load(app.config['GAZETTEER_PATH']).city_coords()
+    return RoadGraph.from_csv(provinces, app.config['ROAD_EDGES_PATH'])
 
-        if city_key not in grouped_destinations:
-            grouped_destinations[city_key] = {
-                'name': city,
-                'city': city,
-                'lat': coords['lat'],
-                'lon': coords['lon'],
-                'cases': [],
-                'case_count': 0
-            }
+def create_routing_backend():
+    breaker = CircuitBreaker(
+        failure_threshold=app.config['ROUTING_BREAKER_FAILURES'],
+        latency_threshold=app.config['ROUTING_BREAKER_LATENCY'],
+        reset_timeout=app.config['ROUTING_BREAKER_RESET'],
+    )
+    backend = app.config['ROUTING_BACKEND']
+    if backend == 'offline':
+        from road_graph import GraphRouter
+
+        return GraphRouter(load_road_graph(), access_speed_kmh=app.config['ROAD_ACCESS_SPEED_KMH'], breaker=breaker)
+    if backend == 'osrm':
+        return RoutingClient(
+            base_url=app.config['OSRM_BASE_URL'],
+            breaker=breaker,
+            max_workers=app.config['ROUTING_MAX_WORKERS'],
+            timeout=app.config['ROUTING_TIMEOUT'],
+            retries=app.config['ROUTING_RETRIES'],
+            backoff=app.config['ROUTING_BACKOFF'],
+        )
+    raise ValueError(f"Bilinmeyen yönlendirme arka ucu: {backend} (seçenekler: {', '.join(ROUTING_BACKENDS)})")
 
-        grouped_destinations[city_key]['cases'].append(f"{case.case_no} ({case.client})")
-        grouped_destinations[city_key]['case_count'] += 1
+routing_client = create_routing_backend()
 
-    # Liste haline getir
-    destinations = []
-    for dest in grouped_destinations.values():
-        dest['cases_str'] = ", ".join(dest['cases'])
-        destinations.append(dest)
+def get_osrm_route(lat1, lon1, lat2, lon2):
+    with ROUTING_CALL_SECONDS.time(backend=routing_client.name, call='route'):
+        return routing_client.route(lat1, lon1, lat2, lon2)
+
+def get_osrm_table(coords):
+    """Verilen (lat, lon) listesi için (mesafe_km, süre_dk) matrislerini döner; hata olursa None."""
+    with ROUTING_CALL_SECONDS.time(backend=routing_client.name, call='table'):
+        return routing_client.table(coords, max_coords=app.config['OSRM_TABLE_MAX_COORDS'])
+
+def build_leg_matrix(points, progress=None):
+    """Başlangıç ofisi + duraklar için tüm bacakların mesafe/süre matrisini kurar.
+
+    İki ucu da önceden hesaplanmış il/adliye matrisinde (province_matrix,
+    aynı arka uçla üretilmişse) bulunan bacaklar oradan okunur. Kalan
+    bacaklar önce route_leg_cache'te aranır; eksik varsa tek bir /table
+    çağrısı yapılır, o da başarısız olursa eksik bacaklar get_osrm_route ile
+    tek tek sorgulanır. OSRM devre kesicisi açıksa veya bir bacak yine de
+    hesaplanamazsa haversine tahmini kullanılır. Koordinatı (0, 0) olan
+    noktalara giden bacaklar için sabit 100 km / 60 dk varsayılır. Önbelleğe
+    değmeyecek kadar ucuz arka uçlarda (çevrimdışı ağ) önbellek atlanır.
+
+    Dönüş: (dist, dur, estimated) — `estimated[i, j]` bacağın tahmini
+    olduğunu gösterir. `progress(çözülen, toplam)` bacaklar çözüldükçe çağrılır.
+    """
+    progress = progress or (lambda done, total: None)
+    n = len(points)
+    unknown = {i for i, p in enumerate(points) if p['lat'] == 0 and p['lon'] == 0}
+
+    dist = np.full((n, n), np.inf)
+    dur = np.full((n, n), np.inf)
+    np.fill_diagonal(dist, 0.0)
+    np.fill_diagonal(dur, 0.0)
+    estimated = np.zeros((n, n), dtype=bool)
+
+    legs = {}
+    for i in range(n):
+        for j in range(n):
+            if i != j and j not in unknown:
+                legs[(i, j)] = route_leg_cache.key(
+                    points[i]['lat'], points[i]['lon'], points[j]['lat'], points[j]['lon']
+                )
 
-    # 3. Başlangıç Ayarları
-    start_coords = CITY_COORDS.get(start_city, CITY_COORDS.get('Bursa'))
-    current_location = {'name': f'{start_city} Ofis', 'lat': start_coords['lat'], 'lon': start_coords['lon']}
+    total = len(legs)
+    precomputed = province_matrix
+    if precomputed is not None and precomputed.backend == routing_client.name and legs:
+        rows = precomputed.indices(points)
+        pairs = np.array([leg for leg in legs if rows[leg[0]] >= 0 and rows[leg[1]] >= 0], dtype=np.int64).reshape(-1, 2)
+        found_dist, found_dur = precomputed.lookup(rows[pairs[:, 0]], rows[pairs[:, 1]])
+        # Matriste ulaşılamaz (inf) görünen bacaklar yönlendiriciye bırakılır
+        found = np.isfinite(found_dur)
+        sources, targets = pairs[found, 0], pairs[found, 1]
+        dist[sources, targets], dur[sources, targets] = found_dist[found], found_dur[found]
+        for leg in zip(sources.tolist(), targets.tolist()):
+            del legs[leg]
+        ROUTING_LEGS.inc(int(found.sum()), source='matrix')
+
+    cacheable = routing_client.cacheable
+    cached = route_leg_cache.get_many(list(set(legs.values()))) if cacheable else {}
+    missing = []
+    for (i, j), key in legs.items():
+        if key in cached:
+            dist[i, j], dur[i, j] = cached[key]
+        else:
+            missing.append((i, j))
+    progress(total - len(missing), total)
+    if cacheable:
+        ROUTING_LEGS.inc(len(legs) - len(missing), source='cache')
+
+    if missing and not routing_client.breaker.is_open:
+        fetched = {}
+        matrix = get_osrm_table([(p['lat'], p['lon']) for p in points])
+        if matrix is not None:
+            for i, j in missing:
+                dist[i, j] = matrix[0][i, j]
+                dur[i, j] = matrix[1][i, j]
+                fetched[legs[(i, j)]] = (dist[i, j], dur[i, j])
+        elif not routing_client.breaker.is_open:
+            # Eksik bacaklar bağlantı havuzu üzerinden paralel sorgulanır
+            results = routing_client.map(
+                lambda leg: get_osrm_route(
+                    points[leg[0]]['lat'], points[leg[0]]['lon'],
+                    points[leg[1]]['lat'], points[leg[1]]['lon']
+                ),
+                missing,
+                on_progress=lambda done, count: progress(total - len(missing) + done, total)
+            )
+            for (i, j), (leg_dist, leg_dur) in zip(missing, results):
+                dist[i, j], dur[i, j] = leg_dist, leg_dur
+                fetched[legs[(i, j)]] = (leg_dist, leg_dur)
+        if cacheable:
+            route_leg_cache.put_many(fetched)
+
+    # Yönlendirilemeyen bacaklar için çevrimdışı haversine tahmini (önbelleğe yazılmaz)
+    unresolved = [(i, j) for (i, j) in missing if not np.isfinite(dur[i, j])]
+    if unresolved:
+        est_dist, est_dur = estimate_matrix(
+            [(p['lat'], p['lon']) for p in points],
+            detour_factor=app.config['ESTIMATE_DETOUR_FACTOR'],
+            speed_kmh=app.config['ESTIMATE_SPEED_KMH'],
+        )
+        rows, cols = zip(*unresolved)
+        dist[rows, cols] = est_dist[rows, cols]
+        dur[rows, cols] = est_dur[rows, cols]
+        estimated[rows, cols] = True
+    ROUTING_LEGS.inc(len(missing) - len(unresolved), source='routed')
+    ROUTING_LEGS.inc(len(unresolved), source='estimated')
+
+    for j in unknown:
+        dist[:, j] = 100
+        dur[:, j] = 60
+        dist[j, j] = 0
+        dur[j, j] = 0
+
+    progress(total, total)
+    return dist, dur, estimated
+
+class LegMatrix:
+    """Bir nokta kümesi için bir kez kurulan bacak matrisi; planlar alt kümesini keser.
+
+    Aynı koordinattaki noktalar tekilleştirilir, bu yüzden birden çok plan
+    (veya bir plandaki birden çok avukat) için gereken bacak sayısı tekil
+    konum sayısının karesiyle sınırlı kalır.
+    """
+
+    def __init__(self, points, progress=None):
+        self.index = {}
+        self.points = []
+        for point in points:
+            key = self.key(point)
+            if key not in self.index:
+                self.index[key] = len(self.points)
+                self.points.append(point)
+        self.dist, self.dur, self.estimated = build_leg_matrix(self.points, progress=progress)
+
+    @staticmethod
+    def key(point):
+        return round(point['lat'], 6), round(point['lon'], 6)
+
+    def sub(self, points):
+        """`points` sırasıyla (dist, dur, estimated) alt matrisleri."""
+        idx = [self.index[self.key(point)] for point in points]
+        return tuple(m[np.ix_(idx, idx)] for m in (self.dist, self.dur, self.estimated))
+
+# --- Rota Bacak Önbelleği ---
+class RouteLegCache:
+    """OSRM bacakları için iki katmanlı önbellek.
+
+    1. katman süreç içi LRU (OrderedDict), 2. katman `route_legs` tablosudur;
+    böylece sonuçlar yeniden başlatmalardan sonra da korunur ve tüm gunicorn
+    worker'ları tarafından paylaşılır. Anahtarlar yuvarlanmış (lat, lon)
+    çiftlerinden oluşur.
+    """
+
+    def __init__(self, maxsize, ttl, precision):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.precision = precision
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def key(self, lat1, lon1, lat2, lon2):
+        p = self.precision
+        return f"{lat1:.{p}f},{lon1:.{p}f};{lat2:.{p}f},{lon2:.{p}f}"
+
+    def get_many(self, keys):
+        """Bulunan anahtarlar için {key: (distance_km, duration_min)} döner."""
+        now = time.time()
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry and now - entry[2] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    found[key] = (entry[0], entry[1])
+                else:
+                    self._entries.pop(key, None)
+                    missing.append(key)
+            self.memory_hits += len(found)
+
+        if missing:
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+            try:
+                rows = []
+                for i in range(0, len(missing), 500):
+                    rows += RouteLeg.query.filter(
+                        RouteLeg.key.in_(missing[i:i + 500]),
+                        RouteLeg.fetched_at >= cutoff
+                    ).all()
+            except Exception as e:
+                print(f"Rota önbelleği okuma hatası: {e}")
+                db.session.rollback()
+                rows = []
+
+            with self._lock:
+                for row in rows:
+                    found[row.key] = (row.distance_km, row.duration_min)
+                    self._remember(row.key, row.distance_km, row.duration_min, now)
+                self.db_hits += len(rows)
+                self.misses += len(missing) - len(rows)
+
+        return found
+
+    def put_many(self, legs):
+        """{key: (distance_km, duration_min)} sözlüğünü iki katmana da yazar."""
+        legs = {k: v for k, v in legs.items() if np.isfinite(v[0]) and np.isfinite(v[1])}
+        if not legs:
+            return
+
+        now = time.time()
+        with self._lock:
+            for key, (distance_km, duration_min) in legs.items():
+                self._remember(key, distance_km, duration_min, now)
+
+        fetched_at = datetime.now(timezone.utc)
+        try:
+            existing = {}
+            keys = list(legs)
+            for i in range(0, len(keys), 500):
+                for row in RouteLeg.query.filter(RouteLeg.key.in_(keys[i:i + 500])).all():
+                    existing[row.key] = row
+            for key, (distance_km, duration_min) in legs.items():
+                row = existing.get(key)
+                if row is None:
+                    row = RouteLeg(key=key)
+                    db.session.add(row)
+                row.distance_km = float(distance_km)
+                row.duration_min = float(duration_min)
+                row.fetched_at = fetched_at
+            db.session.commit()
+        except Exception as e:
+            # Başka bir worker aynı bacağı aynı anda yazmış olabilir; önbellek en iyi çaba ile çalışır
+            print(f"Rota önbelleği yazma hatası: {e}")
+            db.session.rollback()
+
+    def _remember(self, key, distance_km, duration_min, stamp):
+        self._entries[key] = (distance_km, duration_min, stamp)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.memory_hits = self.db_hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'db_hits': self.db_hits,
+                'misses': self.misses,
+                'hit_ratio': round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else None,
+                'memory_entries': len(self._entries),
+                'memory_size': self.maxsize,
+                'ttl_seconds': self.ttl,
+            }
 
+route_leg_cache = RouteLegCache(
+    maxsize=app.config['ROUTE_CACHE_SIZE'],
+    ttl=app.config['ROUTE_CACHE_TTL'],
+    precision=app.config['ROUTE_CACHE_PRECISION'],
+)
+
+# --- Adliye ve Şehir Koordinatları ---
+# İl merkezleri ve adliyeler açılışta bir kez yüklenir; çözümleme ağa gitmez
+gazetteer = Gazetteer.load(app.config['GAZETTEER_PATH'])
+CITY_COORDS = gazetteer.city_coords()
+
+# --- Önceden Hesaplanmış Bacak Matrisi ---
+def province_matrix_points():
+    """Matrise girecek noktalar: il merkezleri ve adliyeler, (ad, lat, lon)."""
+    return ([(city, coords['lat'], coords['lon']) for city, coords in CITY_COORDS.items()]
+            + [(c['name'], c['lat'], c['lon']) for c in gazetteer.courthouses])
+
+def load_province_matrix():
+    """Matris dosyasını bellek eşlemeli açar; dosya yoksa veya okunamazsa None."""
+    path = app.config['PROVINCE_MATRIX_PATH']
+    if not os.path.exists(path):
+        return None
+    try:
+        return ProvinceMatrix.load(path, precision=app.config['ROUTE_CACHE_PRECISION'])
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Bacak matrisi okunamadı ({path}): {e}")
+        return None
+
+# Her worker açılışta eşler; sayfalar süreçler arasında işletim sistemi önbelleğinden paylaşılır
+province_matrix = load_province_matrix()
+
+# --- Çalışma Takvimi ---
+# Mesai, resmî tatil ve adli tatil bilgisi; varış/ayrılış saatleri buradan hesaplanır (bkz. work_calendar.py)
+workday_calendar = work_calendar.WorkCalendar.load(
+    app.config['HOLIDAYS_PATH'],
+    day_start=app.config['WORKDAY_START'],
+    day_end=app.config['WORKDAY_END'],
+    half_day_end=app.config['HALF_DAY_END'],
+    judicial_recess=app.config['JUDICIAL_RECESS'],
+)
+
+def service_minutes(case):
+    """Dosyanın adliyede alacağı süre (dk): önce dosya türüne özel, yoksa varsayılan."""
+    return app.config['SERVICE_MINUTES'].get(case.case_type, app.config['DEFAULT_SERVICE_MINUTES'])
+
+
+def resolve_case_location(case):
+    """Dosyanın görüleceği adliye: önce mahkeme/ilçe adı, sonra kayıtlı koordinat.
+
+    Ad yalnızca il düzeyinde eşleşiyorsa ve dosyanın kendi koordinatı varsa
+    (ör. Excel'den gelen adres) `GAZETTEER_SNAP_KM` içindeki en yakın adliye
+    tercih edilir. Hiçbiri bulunamazsa None döner.
+    """
+    located = gazetteer.resolve(case.city, case.district, case.court_office)
+    if located and located['match'] != 'city':
+        return located
+    if case.lat is not None and case.lon is not None:
+        nearest = gazetteer.nearest(case.lat, case.lon, max_km=app.config['GAZETTEER_SNAP_KM'])
+        if nearest:
+            return nearest
+    return located
+
+
+def locate_case_fields(case):
+    """Ekleme/güncellemede il, ilçe ve mahkeme adından adliye koordinatını yazar."""
+    located = gazetteer.resolve(case.city, case.district, case.court_office)
+    if located:
+        case.lat = located['lat']
+        case.lon = located['lon']
+
+# --- Rota Planı Önbelleği ---
+class PlanCache:
+    """calculate_route sonuçları için süreç içi LRU önbellek.
+
+    Anahtar; sıralı dosya id'leri, başlangıç şehri, normalize edilmiş
+    başlangıç tarihi, çözücü ve ilgili `Case` satırlarının içerik özetinden
+    (sürüm damgası) oluşur. Bir dosya değiştiğinde o dosyayı içeren tüm
+    planlar `invalidate_cases` ile silinir; sürüm damgası ise başka bir
+    worker'daki değişikliklerin eski sonuç döndürmesini engeller.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._keys_by_case = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, case_ids, result):
+        with self._lock:
+            self._entries[key] = (tuple(case_ids), result)
+            self._entries.move_to_end(key)
+            for case_id in case_ids:
+                self._keys_by_case.setdefault(case_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+
+    def invalidate_cases(self, case_ids):
+        with self._lock:
+            for case_id in case_ids:
+                for key in self._keys_by_case.pop(case_id, set()):
+                    if key in self._entries:
+                        self._forget(key)
+                        del self._entries[key]
+
+    def _forget(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        for case_id in entry[0]:
+            keys = self._keys_by_case.get(case_id)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_case[case_id]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_case.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'entries': len(self._entries),
+                'size': self.maxsize,
+            }
+
+plan_cache = PlanCache(maxsize=app.config['PLAN_CACHE_SIZE'])
+
+def plan_cache_key(cases, start_city, start_date_str, solver_name, deadline_mode=None):
+    """Dosya satırlarının içeriğine bağlı, deterministik plan önbellek anahtarı."""
+    rows = sorted((c.to_dict() for c in cases), key=lambda row: row['id'])
+    version = hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return json.dumps([
+        [row['id'] for row in rows],
+        start_city,
+        parse_start_time(start_date_str).date().isoformat(),
+        solver_name,
+        deadline_mode or app.config['DEADLINE_MODE'],
+        version,
+    ])
+
+# --- Rota Optimizasyon Algoritması ---
+def parse_start_time(start_date_str):
+    """'2026-W09' (ISO hafta) veya '2026-03-02' biçimindeki başlangıcı o günden itibaren ilk mesai anına çevirir."""
     if start_date_str:
         try:
             if 'W' in start_date_str:
@@ -184,80 +831,99 @@ def calculate_route(selected_case_ids, start_city="Bursa", start_date_str=None):
     else:
         current_time = datetime.now()
 
-    current_time = current_time.replace(hour=9, minute=0, second=0, microsecond=0)
+    # Günün başından itibaren ilk mesai anı (hafta sonu, bayram ve adli tatil atlanır)
+    return workday_calendar.next_working(current_time.replace(hour=0, minute=0, second=0, microsecond=0))
 
-    if current_time.weekday() >= 5:
-        current_time += timedelta(days=(7 - current_time.weekday()))
+def group_destinations(cases):
+    """Dosyaları durağa göre gruplar: aynı ildeki farklı adliyeler ayrı duraktır.
 
-    unvisited = destinations.copy()
-    route_plan = []
-    step = 1
+    Dönüş: {durak_anahtarı: durak}. Adliyesi ve koordinatı bulunamayan
+    dosyalar atlanır.
+    """
+    grouped_destinations = {}
 
-    # 4. Greedy Rota Hesabı
-    while unvisited:
-        best_stop = None
-        shortest_dur = float('inf')
+    for case in cases:
+        located = resolve_case_location(case)
+        if located:
+            stop_key = ('courthouse', located['id'])
+            stop = {'name': located['name'], 'city': located['city'], 'lat': located['lat'], 'lon': located['lon']}
+        elif case.lat is not None and case.lon is not None:
+            # Sözlükte olmayan yer: dosyanın kendi koordinatı durak olur
+            stop_key = ('coords', round(case.lat, 4), round(case.lon, 4))
+            stop = {'name': case.city, 'city': case.city, 'lat': case.lat, 'lon': case.lon}
+        else:
+            # Koordinatları bulunamayan ve sisteme eklenmemiş (lat/lon yok) şehirleri atla
+            continue
 
-        for dest in unvisited:
-            if dest['lat'] == 0 and dest['lon'] == 0:
-                dist, dur = 100, 60
-            else:
-                dist, dur = get_osrm_route(
-                    current_location['lat'], current_location['lon'],
-                    dest['lat'], dest['lon']
-                )
+        if stop_key not in grouped_destinations:
+            grouped_destinations[stop_key] = dict(stop, cases=[], case_count=0, service_minutes=0.0,
+                                                  due_date=None, weight=1.0)
+
+        destination = grouped_destinations[stop_key]
+        destination['cases'].append(f"{case.case_no} ({case.client})")
+        destination['case_count'] += 1
+        destination['service_minutes'] += service_minutes(case)
+        # Durağın teslim tarihi en erken dosyanınki, ağırlığı en öncelikli dosyanınki
+        if case.due_date and (destination['due_date'] is None or case.due_date < destination['due_date']):
+            destination['due_date'] = case.due_date
+        destination['weight'] = max(destination['weight'], app.config['PRIORITY_WEIGHTS'].get(case.priority, 1.0))
+
+    return grouped_destinations
+
+def merge_destination(target, source):
+    """Aynı adliyedeki iki durağı (ör. farklı avukatlara ait dosyalar) birleştirir."""
+    target['cases'] = target['cases'] + source['cases']
+    target['case_count'] += source['case_count']
+    target['service_minutes'] += source['service_minutes']
+    if source['due_date'] and (target['due_date'] is None or source['due_date'] < target['due_date']):
+        target['due_date'] = source['due_date']
+    target['weight'] = max(target['weight'], source['weight'])
+
+def start_location(city):
+    """Şehrin ofis noktası; bilinmeyen şehirde Bursa."""
+    start_coords = CITY_COORDS.get(gazetteer.canonical_city(city), CITY_COORDS.get('Bursa'))
+    return {'name': f'{city} Ofis', 'lat': start_coords['lat'], 'lon': start_coords['lon']}
+
+def stop_deadlines(destinations):
+    """Teslim tarihi: o günün mesai bitişi (dakika ekseninde, bkz. WorkCalendar.advance); 0 = ofis."""
+    return np.array([np.inf] + [
+        workday_calendar.to_minutes(datetime.combine(dest['due_date'], app.config['WORKDAY_END']))
+        if dest['due_date'] else np.inf
+        for dest in destinations
+    ])
+
+def deadline_order(order, dur_matrix, destinations, start_time, deadlines, deadline_mode, time_budget, progress=None):
+    """Süre matrisi çözümünü teslim tarihlerine göre yeniden düzenler (`solver.deadline_search`)."""
+    service = [0.0] + [dest['service_minutes'] for dest in destinations]
+    plan = solver.DeadlinePlan(
+        dur_matrix, workday_calendar.to_minutes(start_time),
+        lambda t, travel, stop: workday_calendar.advance(t, travel, service[stop]),
+        deadlines, [1.0] + [dest['weight'] for dest in destinations],
+        hard=deadline_mode == 'hard',
+    )
+    return solver.deadline_search(plan, order, time_budget, progress=progress)
 
-            if dur < shortest_dur:
-                shortest_dur = dur
-                # DÜZELTİLDİ: dict(dest) ile sığ kopya alınıyor, orijinal dict bozulmuyor
-                best_stop = dict(dest)
-                best_stop['distance'] = dist
-                best_stop['travel_dur'] = dur
+def build_itinerary(destinations, order, matrices, start_time, deadlines):
+    """Sıralanmış duraklar için varış/ayrılış saatli rota adımları."""
+    dist_matrix, dur_matrix, estimated_matrix = matrices
+    route_plan = []
+    current_index = 0
+    current_time = start_time
 
-        if not best_stop:
+    for step, best_index in enumerate(order, start=1):
+        if not np.isfinite(dur_matrix[current_index, best_index]):
+            # Ulaşılamayan durak: kalan rota hesaplanamaz
             break
 
-        arrival_time = current_time + timedelta(minutes=best_stop['travel_dur'])
-
-        # DÜZELTİLDİ: Gece yarısını geçen seyahatlerde veya mesai dışı durumlarda gün atlaması
-        if arrival_time.hour >= 17:
-            # 17:00'den sonraysa ertesi gün sabah 09:00'a atla
-            arrival_time = arrival_time.replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
-            if arrival_time.weekday() >= 5: # Cumartesi/Pazar ise Pazartesiye atla
-                arrival_time += timedelta(days=(7 - arrival_time.weekday()))
-        elif arrival_time.hour < 9:
-            # Gece yarısını geçtiyse (veya sabah 09:00'dan önceyse), zaten yeni güne geçilmiştir, sadece saati 09:00 yap
-            # Eğer gün değişmişse +1 gün eklemeye gerek yok, current_time + travel_dur zaten günü ilerletmiş olabilir
-            # Veya current_time'a göre aynı gün içinde <9 ise
-            if current_time.date() == arrival_time.date():
-                 # Aynı gün içindeyse (nasıl olduysa, mesela 08:00'de başlandıysa) saati 09:00 yap
-                 arrival_time = arrival_time.replace(hour=9, minute=0, second=0, microsecond=0)
-            else:
-                 # Geceyi geçtiyse saati 09:00 yap (gün zaten ilerledi)
-                 arrival_time = arrival_time.replace(hour=9, minute=0, second=0, microsecond=0)
-
-            if arrival_time.weekday() >= 5:
-                arrival_time += timedelta(days=(7 - arrival_time.weekday()))
-
-        # ÖNCE kaç tam iş günü ve artık dakika olduğunu hesapla
-        WORK_MINUTES = 8 * 60  # 09:00–17:00 = 480 dk
-        total_minutes = best_stop['case_count'] * 45
-        day_of_departure = arrival_time
-
-        remaining = total_minutes
-        while remaining > 0:
-            end_of_day = day_of_departure.replace(hour=17, minute=0, second=0, microsecond=0)
-            available = (end_of_day - day_of_departure).total_seconds() / 60
-            if remaining <= available:
-                day_of_departure = day_of_departure + timedelta(minutes=remaining)
-                remaining = 0
-            else:
-                remaining -= available
-                day_of_departure = day_of_departure.replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
-                if day_of_departure.weekday() >= 5:
-                    day_of_departure += timedelta(days=(7 - day_of_departure.weekday()))
+        # DÜZELTİLDİ: dict(dest) ile sığ kopya alınıyor, orijinal dict bozulmuyor
+        best_stop = dict(destinations[best_index - 1])
+        best_stop['distance'] = float(dist_matrix[current_index, best_index])
+        best_stop['travel_dur'] = float(dur_matrix[current_index, best_index])
 
-        departure_time = day_of_departure
+        # Yolculuk mesai dışında da sürebilir; adliyedeki iş ilk mesai anında başlar
+        arrival_time = workday_calendar.next_working(current_time + timedelta(minutes=best_stop['travel_dur']))
+        departure_time = workday_calendar.add_minutes(arrival_time, best_stop['service_minutes'])
+        deadline_missed = workday_calendar.to_minutes(departure_time) > deadlines[best_index]
 
         route_plan.append({
             'step': step,
@@ -266,66 +932,702 @@ def calculate_route(selected_case_ids, start_city="Bursa", start_date_str=None):
             'distance': round(best_stop['distance'], 1),
             'arrival': arrival_time.strftime('%d.%m.%Y %H:%M'),
             'departure': departure_time.strftime('%d.%m.%Y %H:%M'),
-            'cases': best_stop['cases_str']
+            'cases': ", ".join(best_stop['cases']),
+            'service_minutes': round(best_stop['service_minutes']),
+            'due_date': best_stop['due_date'].strftime('%d.%m.%Y') if best_stop['due_date'] else None,
+            'deadline_missed': bool(deadline_missed),
+            'leg_source': 'estimated' if estimated_matrix[current_index, best_index] else 'routed'
         })
 
-        current_location = best_stop
+        current_index = best_index
         current_time = departure_time
-        # DÜZELTİLDİ: unvisited listesinden orijinal dest nesnesi kaldırılıyor (best_stop kopya olduğundan)
-        unvisited = [d for d in unvisited if d['city'] != best_stop['city']]
-        step += 1
 
     return route_plan
 
-# --- Web Yönlendirmeleri ---
+def calculate_route(selected_case_ids, start_city="Bursa", start_date_str=None, solver_name='auto', progress=None,
+                    deadline_mode=None, cases=None, legs=None):
+    """Seçilen dosyalar için rota planı üretir.
+
+    Dönüş: {'route': [...adımlar], 'solver': ..., 'tour_cost': ..., 'greedy_cost': ...,
+            'estimated_legs': ..., 'missed_deadlines': ..., 'deadline_mode': ...,
+            'routing': {...devre kesici durumu}}
+    Maliyetler dakika cinsinden toplam seyahat süresidir; `greedy_cost` aynı
+    matris üzerinde en yakın komşu turunun maliyetidir (karşılaştırma için).
+    Her adımın `leg_source` alanı o adıma gelen bacağın OSRM'den mi
+    (`routed`) yoksa haversine tahmininden mi (`estimated`) geldiğini söyler.
+    Sonuçlar plan_cache'te saklanır; önbellekten gelen yanıtlarda `cached` True'dur.
+
+    Teslim tarihi (`due_date`) olan dosyalar varsa sıra `solver.deadline_search`
+    ile teslim tarihlerine göre yeniden düzenlenir (`deadline_mode`: 'soft'
+    veya 'hard'; verilmezse DEADLINE_MODE). Her adımın `deadline_missed`
+    alanı duraktaki işin en erken teslim tarihinin mesai bitişinden sonra
+    bittiğini, `missed_deadlines` bu adımların sayısını gösterir.
+
+    `progress(yüzde, mesaj)` verilirse bacaklar çözüldükçe (%5-70) ve çözücü
+    iterasyonları ilerledikçe (%70-95) çağrılır.
+
+    Toplu planlamada (bkz. calculate_batch) önceden okunmuş dosya satırları
+    `cases`, ortak bacak matrisi `legs` (LegMatrix) ile verilir; bu durumda
+    veritabanına ve yönlendirme arka ucuna gidilmez.
+    """
+    progress = progress or (lambda percent, message=None: None)
+    deadline_mode = deadline_mode or app.config['DEADLINE_MODE']
 
-@app.route('/')
-def index():
-    filter_q = request.args.get('search', '')
-    city_filter = request.args.get('city', '')
+    # 1. Seçilen dosyaları çek
+    if cases is None:
+        # DÜZELTİLDİ: selected_case_ids listesi string'lerden integer'lara çevrilmeli
+        selected_case_ids = [int(i) for i in selected_case_ids]
+        cases = Case.query.filter(Case.id.in_(selected_case_ids)).all()
 
-    query = Case.query
+    if not cases:
+        return {'route': [], 'solver': solver_name, 'tour_cost': 0.0, 'greedy_cost': 0.0,
+                'estimated_legs': 0, 'missed_deadlines': 0, 'deadline_mode': deadline_mode,
+                'routing': routing_client.status(), 'cached': False}
+
+    cache_key = plan_cache_key(cases, start_city, start_date_str, solver_name, deadline_mode)
+    cached = plan_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached, cached=True)
+    started = time.perf_counter()
+
+    # 2. Adliyelere göre grupla
+    destinations = list(group_destinations(cases).values())
 
-    if filter_q:
-        query = query.filter(
-            or_(
-                Case.case_no.ilike(f'%{filter_q}%'),
-                Case.client.ilike(f'%{filter_q}%'),
-                Case.city.ilike(f'%{filter_q}%')
+    # 3. Başlangıç Ayarları
+    current_location = start_location(start_city)
+    current_time = parse_start_time(start_date_str)
+    deadlines = stop_deadlines(destinations)
+
+    # Mesafe matrisi: 0 = başlangıç ofisi, 1..n = duraklar
+    progress(5, 'Bacaklar çözülüyor')
+    with PLAN_PHASE_SECONDS.time(phase='fetch'):
+        if legs is not None:
+            dist_matrix, dur_matrix, estimated_matrix = legs.sub([current_location] + destinations)
+        else:
+            dist_matrix, dur_matrix, estimated_matrix = build_leg_matrix(
+                [current_location] + destinations,
+                progress=lambda done, total: progress(5 + 65 * done / max(total, 1), f'Bacaklar: {done}/{total}')
             )
+
+    # 4. Durak Sırası (yalnızca bellek içi matris okumaları)
+    progress(70, 'Rota optimize ediliyor')
+    with PLAN_PHASE_SECONDS.time(phase='solve'):
+        greedy_order = solver.nearest_neighbour(dur_matrix)
+        # Teslim tarihi varsa süre bütçesi yol süresi ve teslim tarihi aramaları arasında bölünür
+        with_deadlines = solver_name != 'greedy' and np.isfinite(deadlines).any()
+        budget = app.config['SOLVER_TIME_BUDGET'] / (2 if with_deadlines else 1)
+        if solver_name == 'greedy':
+            order, used_solver = greedy_order, 'greedy'
+        else:
+            order, used_solver = solver.solve(
+                dur_matrix, solver_name, budget,
+                progress=lambda ratio, iterations: progress(70 + 25 * ratio, f'Çözücü iterasyonu: {iterations}')
+            )
+        if with_deadlines:
+            order = deadline_order(
+                order, dur_matrix, destinations, current_time, deadlines, deadline_mode, budget,
+                progress=lambda ratio, iterations: progress(70 + 25 * ratio, f'Teslim tarihi araması: {iterations}')
+            )
+            used_solver += '+deadline'
+    progress(95, 'Zaman çizelgesi hesaplanıyor')
+
+    route_plan = build_itinerary(destinations, order, (dist_matrix, dur_matrix, estimated_matrix),
+                                 current_time, deadlines)
+
+    result = {
+        'route': route_plan,
+        'solver': used_solver,
+        'tour_cost': round(solver.path_cost(dur_matrix, order), 1),
+        'greedy_cost': round(solver.path_cost(dur_matrix, greedy_order), 1),
+        'estimated_legs': sum(1 for step in route_plan if step['leg_source'] == 'estimated'),
+        'missed_deadlines': sum(1 for step in route_plan if step['deadline_missed']),
+        'deadline_mode': deadline_mode,
+        'routing': routing_client.status(),
+        'cached': False,
+    }
+
+    # Tahmini bacak içeren planlar OSRM düzelince yeniden hesaplanabilsin diye saklanmaz
+    if result['estimated_legs'] == 0:
+        plan_cache.put(cache_key, [c.id for c in cases], result)
+    PLAN_PHASE_SECONDS.observe(time.perf_counter() - started, phase='total')
+    return result
+
+# --- Çok Avukatlı Planlama ---
+_solver_pool = None
+_solver_pool_lock = threading.Lock()
+
+def get_solver_pool():
+    """Alt turları paralel çözen süreç havuzu; SOLVER_PROCESSES <= 1 ise None.
+
+    Havuz ilk kullanımda kurulur ve süreç boyunca yaşar. Worker'lar iş
+    parçacıklı bir süreçten fork edilmesin diye 'spawn' ile başlatılır.
+    'spawn' her worker'da ana modülü (`__main__`) `__mp_main__` adıyla yeniden
+    içe aktarır: gunicorn (wsgi.py) veya `flask run` altında bu çalıştırıcının
+    kendi betiğidir ve worker'lar yalnızca `solver`'ı (ve NumPy'ı) yükler;
+    `python app.py` ile çalışırken ise app.py'nin tüm üst düzey kodu
+    (yapılandırma, yönlendirme arka ucu, gazetteer, il matrisi, takvim) her
+    worker'da bir kez yeniden çalışır (`app.run` `__main__` korumasında
+    kaldığından sunucu açılmaz). Bu maliyet görev başına değil, havuz
+    kurulurken bir kez ödenir.
+    """
+    global _solver_pool
+    if app.config['SOLVER_PROCESSES'] <= 1:
+        return None
+    with _solver_pool_lock:
+        if _solver_pool is None:
+            _solver_pool = ProcessPoolExecutor(
+                max_workers=app.config['SOLVER_PROCESSES'], mp_context=multiprocessing.get_context('spawn')
+            )
+        return _solver_pool
+
+def split_destinations(cases, lawyers):
+    """Durakları avukatlara dağıtır.
+
+    `follower_lawyer`'ı listedeki bir avukat olan dosyalar o avukatındır.
+    Kalan dosyalardan, bir avukatın zaten gideceği adliyedekiler o durağa
+    katılır (en az durağı olana); geri kalanlar `fleet.partition` ile
+    kapasiteye orantılı ve coğrafi olarak bölünür. Bir avukata en fazla
+    günlük kapasite × PLAN_DAYS durak verilir; yer kalmayan duraklar
+    atanmaz.
+
+    Dönüş: (avukat başına durak listeleri, atanamayan duraklar)
+    """
+    index_of = {fleet.lawyer_key(lawyer['name']): k for k, lawyer in enumerate(lawyers)}
+    owned = [[] for _ in lawyers]
+    free_cases = []
+    for case in cases:
+        k = index_of.get(fleet.lawyer_key(case.follower_lawyer))
+        (owned[k] if k is not None else free_cases).append(case)
+
+    assigned = [group_destinations(own) for own in owned]
+    free = []
+    for stop_key, stop in group_destinations(free_cases).items():
+        visiting = [k for k, stops in enumerate(assigned) if stop_key in stops]
+        if visiting:
+            merge_destination(assigned[min(visiting, key=lambda k: len(assigned[k]))][stop_key], stop)
+        else:
+            free.append(stop)
+
+    offices = [start_location(lawyer['office']) for lawyer in lawyers]
+    labels = fleet.partition(
+        [(stop['lat'], stop['lon']) for stop in free],
+        [(office['lat'], office['lon']) for office in offices],
+        [lawyer['capacity'] for lawyer in lawyers],
+        limits=[lawyer['capacity'] * app.config['PLAN_DAYS'] for lawyer in lawyers],
+        fixed=[len(stops) for stops in assigned],
+    )
+    per_lawyer = [list(stops.values()) for stops in assigned]
+    unassigned = []
+    for stop, label in zip(free, labels):
+        (per_lawyer[label] if label >= 0 else unassigned).append(stop)
+    return per_lawyer, unassigned
+
+def calculate_multi_route(selected_case_ids, lawyers, start_date_str=None, solver_name='auto', progress=None,
+                          deadline_mode=None, cases=None, legs=None):
+    """Seçimi birden fazla avukata bölüp her biri için ofisinden başlayan bir rota üretir.
+
+    `lawyers`: [{'name', 'office', 'capacity'}] (bkz. fleet.parse_lawyers).
+    Tüm ofisler ve duraklar için bacaklar tek matriste kurulur, her avukatın
+    alt turu bu matristen kesilip süreç havuzunda paralel çözülür; teslim
+    tarihi araması ve zaman çizelgesi calculate_route'takiyle aynıdır.
+
+    Dönüş: {'mode': 'multi', 'itineraries': [{'lawyer', 'office', 'capacity',
+            'route', 'tour_cost', 'greedy_cost', 'over_capacity', ...}],
+            'unassigned': [...], 'tour_cost': ..., 'max_tour_cost': ..., ...}
+    `tour_cost` turların toplamı, `max_tour_cost` en uzun turdur (denge için).
+    `cases` ve `legs` calculate_route'taki gibidir.
+    """
+    progress = progress or (lambda percent, message=None: None)
+    deadline_mode = deadline_mode or app.config['DEADLINE_MODE']
+
+    if cases is None:
+        selected_case_ids = [int(i) for i in selected_case_ids]
+        cases = Case.query.filter(Case.id.in_(selected_case_ids)).all()
+
+    cache_key = plan_cache_key(cases, ['multi', lawyers], start_date_str, solver_name, deadline_mode)
+    cached = plan_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached, cached=True)
+    started = time.perf_counter()
+
+    per_lawyer, unassigned = split_destinations(cases, lawyers)
+    start_time = parse_start_time(start_date_str)
+
+    # Tek matris: avukat ofisleri ve tüm duraklar; her avukatın alt turu buradan kesilir
+    offices = [start_location(lawyer['office']) for lawyer in lawyers]
+    progress(5, 'Bacaklar çözülüyor')
+    with PLAN_PHASE_SECONDS.time(phase='fetch'):
+        if legs is None:
+            legs = LegMatrix(
+                offices + [stop for stops in per_lawyer for stop in stops],
+                progress=lambda done, total: progress(5 + 65 * done / max(total, 1), f'Bacaklar: {done}/{total}')
+            )
+
+    progress(70, 'Rotalar optimize ediliyor')
+    with PLAN_PHASE_SECONDS.time(phase='solve'):
+        sub_matrices = [legs.sub([offices[k]] + stops) for k, stops in enumerate(per_lawyer)]
+        deadlines = [stop_deadlines(stops) for stops in per_lawyer]
+        with_deadlines = [solver_name != 'greedy' and np.isfinite(d).any() for d in deadlines]
+        budget = app.config['SOLVER_TIME_BUDGET'] / (2 if any(with_deadlines) else 1)
+        # Durağı olmayan avukatlar için çözücü çalıştırılmaz
+        busy = [k for k, stops in enumerate(per_lawyer) if stops]
+        solved = dict(zip(busy, fleet.solve_tours(
+            [sub_matrices[k][1] for k in busy], solver_name, budget, executor=get_solver_pool()
+        )))
+        progress(85, 'Teslim tarihleri kontrol ediliyor')
+        itineraries = []
+        for k, lawyer in enumerate(lawyers):
+            dur = sub_matrices[k][1]
+            order, used_solver = solved.get(k, ([], solver_name))
+            if with_deadlines[k]:
+                order = deadline_order(order, dur, per_lawyer[k], start_time, deadlines[k], deadline_mode, budget)
+                used_solver += '+deadline'
+            route_plan = build_itinerary(per_lawyer[k], order, sub_matrices[k], start_time, deadlines[k])
+            itineraries.append({
+                'lawyer': lawyer['name'],
+                'office': lawyer['office'],
+                'capacity': lawyer['capacity'],
+                'route': route_plan,
+                'solver': used_solver,
+                'case_count': sum(stop['case_count'] for stop in per_lawyer[k]),
+                'tour_cost': round(solver.path_cost(dur, order), 1),
+                'greedy_cost': round(solver.path_cost(dur, solver.nearest_neighbour(dur)), 1),
+                'estimated_legs': sum(1 for step in route_plan if step['leg_source'] == 'estimated'),
+                'missed_deadlines': sum(1 for step in route_plan if step['deadline_missed']),
+                'over_capacity': len(per_lawyer[k]) > lawyer['capacity'] * app.config['PLAN_DAYS'],
+            })
+    progress(95, 'Zaman çizelgesi hesaplandı')
+
+    result = {
+        'mode': 'multi',
+        'itineraries': itineraries,
+        'unassigned': [", ".join(stop['cases']) for stop in unassigned],
+        'solver': solver_name,
+        'tour_cost': round(sum(it['tour_cost'] for it in itineraries), 1),
+        'max_tour_cost': max((it['tour_cost'] for it in itineraries), default=0.0),
+        'estimated_legs': sum(it['estimated_legs'] for it in itineraries),
+        'missed_deadlines': sum(it['missed_deadlines'] for it in itineraries),
+        'deadline_mode': deadline_mode,
+        'routing': routing_client.status(),
+        'cached': False,
+    }
+
+    if cases and result['estimated_legs'] == 0:
+        plan_cache.put(cache_key, [c.id for c in cases], result)
+    PLAN_PHASE_SECONDS.observe(time.perf_counter() - started, phase='total')
+    return result
+
+# --- Toplu Planlama ---
+def plan_origin(params):
+    """Plan önbellek anahtarındaki başlangıç: şehir ya da çok avukatlı planda avukat listesi."""
+    return ['multi', params['lawyers']] if params.get('lawyers') else params['start_city']
+
+def run_plan(params, progress=None, cases=None, legs=None):
+    """Doğrulanmış plan parametreleriyle (bkz. plan_params) tek veya çok avukatlı planı hesaplar."""
+    if params.get('lawyers'):
+        return calculate_multi_route(
+            params['selected_ids'], params['lawyers'], params['start_date'], params['solver'],
+            progress=progress, deadline_mode=params.get('deadline_mode'), cases=cases, legs=legs
         )
+    return calculate_route(
+        params['selected_ids'], params['start_city'], params['start_date'], params['solver'],
+        progress=progress, deadline_mode=params.get('deadline_mode'), cases=cases, legs=legs
+    )
+
+def calculate_batch(specs, progress=None):
+    """Birden çok planı tek bir ortak bacak matrisiyle hesaplar.
+
+    Önbellekte olmayan planların dosyaları tek sorguyla okunur; tüm
+    başlangıç ofisleri ve duraklar tekilleştirilip tek bir LegMatrix'te
+    toplanır, böylece bacak sayısı plan sayısıyla değil tekil konum
+    sayısıyla büyür. Planlar BATCH_WORKERS iş parçacığında eşzamanlı
+    çözülür; her biri calculate_route (avukat listesi varsa
+    calculate_multi_route) ile aynı biçimde döner.
+
+    Dönüş: {'plans': [...istek sırasıyla], 'locations': tekil konum sayısı,
+            'cached': önbellekten dönen plan sayısı}
+    """
+    progress = progress or (lambda percent, message=None: None)
+    ids = sorted({case_id for spec in specs for case_id in spec['selected_ids']})
+    rows = Case.query.filter(Case.id.in_(ids)).all() if ids else []
+    # Planlar başka iş parçacıklarında okunacağından satırlar oturumdan ayrılır;
+    # yüklenmiş alanlar okunabilir kalır ve ilerleme kaydındaki commit onları bayatlatmaz
+    for row in rows:
+        db.session.expunge(row)
+    by_id = {row.id: row for row in rows}
+
+    results = [None] * len(specs)
+    pending = []
+    for i, spec in enumerate(specs):
+        cases = [by_id[case_id] for case_id in dict.fromkeys(spec['selected_ids']) if case_id in by_id]
+        cached = plan_cache.get(plan_cache_key(cases, plan_origin(spec), spec['start_date'], spec['solver'],
+                                               spec['deadline_mode'])) if cases else None
+        if cached is not None:
+            results[i] = dict(cached, cached=True)
+        else:
+            pending.append((i, cases))
+
+    locations = 0
+    if pending:
+        # Her planın ofisleri ve kendi dosyalarından gruplanan duraklar; koordinatlı
+        # duraklar ilk dosyanın koordinatını taşıdığından birleşimden gruplamak bir
+        # planın durağını matriste bulunmayan bir noktaya düşürebilirdi
+        points = []
+        for i, cases in pending:
+            lawyers = specs[i].get('lawyers')
+            offices = [lawyer['office'] for lawyer in lawyers] if lawyers else [specs[i]['start_city']]
+            points += [start_location(city) for city in offices]
+            points += list(group_destinations(cases).values())
+
+        progress(5, 'Bacaklar çözülüyor')
+        legs = LegMatrix(
+            points, progress=lambda done, total: progress(5 + 65 * done / max(total, 1), f'Bacaklar: {done}/{total}')
+        )
+        locations = len(legs.points)
+
+        progress(70, 'Planlar çözülüyor')
+        with ThreadPoolExecutor(max_workers=app.config['BATCH_WORKERS'], thread_name_prefix='batch') as pool:
+            futures = {pool.submit(run_plan, specs[i], cases=cases, legs=legs): i for i, cases in pending}
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                progress(70 + 25 * done / len(futures), f'Planlar: {done}/{len(futures)}')
+
+    return {'plans': results, 'locations': locations, 'cached': len(specs) - len(pending)}
+
+# --- Arka Plan İşleri ---
+job_executor = ThreadPoolExecutor(max_workers=app.config['JOB_WORKERS'], thread_name_prefix='job')
+_job_futures = {}
+
+class JobProgress:
+    """İş ilerlemesini veritabanına seyreltilmiş olarak (en fazla `interval` sn'de bir) yazar."""
+
+    def __init__(self, job_id, interval=0.5):
+        self.job_id = job_id
+        self.interval = interval
+        self._last = 0.0
+
+    def __call__(self, percent, message=None):
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return
+        self._last = now
+        job = db.session.get(Job, self.job_id)
+        job.progress = min(float(percent), 100.0)
+        job.message = message
+        job.updated_at = datetime.now(timezone.utc)
+        db.session.commit()
+
+def submit_job(kind, params, fn):
+    """Yeni bir iş kaydı oluşturur ve `fn(params, progress)`'i arka planda çalıştırır.
 
-    if city_filter:
-        query = query.filter(Case.city == city_filter)
+    `fn`'in dönüş değeri JSON olarak işin sonucuna yazılır.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=app.config['JOB_RETENTION'])
+    Job.query.filter(Job.created_at < cutoff).delete(synchronize_session=False)
 
-    cases = query.order_by(Case.created_at.desc()).all()
+    job = Job(kind=kind, params=json.dumps(params))
+    db.session.add(job)
+    db.session.commit()
+    job_id = job.id
 
-    # Stats
-    total_files = Case.query.count()
-    cities_count = db.session.query(Case.city).distinct().count()
-    urgent_files = Case.query.filter_by(priority='Acil').count()
-    hearings = Case.query.filter_by(status='Duruşma Bekliyor').count()
+    future = job_executor.submit(_run_job, job_id, fn)
+    _job_futures[job_id] = future
+    future.add_done_callback(lambda _: _job_futures.pop(job_id, None))
+    return job
+
+def _run_job(job_id, fn):
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        job.status = 'running'
+        job.updated_at = datetime.now(timezone.utc)
+        params = json.loads(job.params)
+        db.session.commit()
+
+        try:
+            result = fn(params, JobProgress(job_id))
+        except Exception as e:
+            print(f"İş hatası ({job_id}): {e}")
+            db.session.rollback()
+            job = db.session.get(Job, job_id)
+            job.status = 'failed'
+            job.error = str(e)
+        else:
+            job = db.session.get(Job, job_id)
+            job.status = 'done'
+            job.progress = 100.0
+            job.message = None
+            job.result = json.dumps(result)
+        job.updated_at = datetime.now(timezone.utc)
+        db.session.commit()
+
+def wait_for_job(job_id, timeout=None):
+    """Bu süreçte çalışan bir işin bitmesini bekler (CLI ve testler için)."""
+    future = _job_futures.get(job_id)
+    if future is not None:
+        future.exception(timeout=timeout)
+
+def fail_stale_jobs(job_id=None):
+    """Sahibi worker süreci ölmüş (yenileme, deploy, OOM) işleri başarısız işaretler.
+
+    İş havuzu süreç içi olduğundan ölen worker'ın işleri hiç bitmez. Bu
+    süreçte çalışmayan ve `JOB_STALE_TIMEOUT` sn boyunca ilerleme yazmamış
+    kuyruktaki/çalışan işler 'failed' olur. Dönüş: işaretlenen iş sayısı.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=app.config['JOB_STALE_TIMEOUT'])
+    query = Job.query.filter(Job.status.in_(('queued', 'running')), Job.updated_at < cutoff)
+    if job_id is not None:
+        query = query.filter(Job.id == job_id)
+    live = list(_job_futures)
+    if live:
+        query = query.filter(Job.id.notin_(live))
+    count = query.update({
+        'status': 'failed',
+        'error': 'İş yarıda kaldı: çalıştığı sunucu süreci yeniden başlatılmış olabilir, lütfen tekrar deneyin.',
+        'updated_at': now,
+    }, synchronize_session=False)
+    if count:
+        db.session.commit()
+    return count
+
+def _plan_job(params, progress):
+    return run_plan(params, progress=progress)
+
+def _plan_batch_job(params, progress):
+    return calculate_batch(params['plans'], progress=progress)
+
+# --- Okuma Replikası ---
+def read_bind():
+    """Dashboard okumaları için `bind_arguments`: replika varsa ve kullanıcı yakın zamanda yazmadıysa replika.
+
+    Replika tanımlı değilse None döner (birincil sunucu kullanılır).
+    """
+    if 'replica' not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return None
+    if has_request_context() and session.get('primary_until', 0) > time.time():
+        return None
+    return {'bind': db.engines['replica']}
+
+@app.after_request
+def _stick_to_primary_after_write(response):
+    # Yazan kullanıcı replika gecikmesi yüzünden kendi değişikliğini kaybetmesin
+    if (request.method in ('POST', 'PUT', 'DELETE') and response.status_code < 400
+            and 'replica' in app.config.get('SQLALCHEMY_BINDS', {})):
+        session['primary_until'] = time.time() + app.config['REPLICA_STICKY_SECONDS']
+    return response
+
+# --- Dashboard İstatistikleri ---
+URGENT_PRIORITY = 'Acil'
+HEARING_STATUS = 'Duruşma Bekliyor'
+# Rota sayfasında planlanabilecek dosya durumları
+ROUTE_PAGE_STATUSES = ('Aktif', HEARING_STATUS)
+
+def stats_key(case):
+    """İstatistiklere etki eden alanlar: (şehir, öncelik, durum)."""
+    return (case.city, case.priority, case.status)
+
+class CaseStatsSnapshot:
+    """Dashboard istatistik kartları için süreç içi özet.
+
+    İlk istekte (veya `ttl` saniye dolunca) tek bir gruplu koşullu toplama
+    sorgusuyla yüklenir; sonrasında ekleme/güncelleme/silme/içe aktarma
+    işlemleri `apply` ile artımlı olarak işlenir. Böylece istek başına
+    maliyet tablo boyutundan bağımsızdır. `ttl` diğer worker'lardaki
+    değişikliklerin en geç ne kadar sürede yansıyacağını belirler.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._cities = None
+        self._urgent = 0
+        self._hearings = 0
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        rows = db.session.execute(
+            select(
+                Case.city,
+                func.count(),
+                func.sum(sql_case((Case.priority == URGENT_PRIORITY, 1), else_=0)),
+                func.sum(sql_case((Case.status == HEARING_STATUS, 1), else_=0)),
+            ).group_by(Case.city)
+        ).all()
+        with self._lock:
+            self._cities = Counter({city: count for city, count, _, _ in rows})
+            self._urgent = sum(int(urgent or 0) for _, _, urgent, _ in rows)
+            self._hearings = sum(int(hearings or 0) for _, _, _, hearings in rows)
+            self._loaded_at = time.monotonic()
+
+    def get(self):
+        with self._lock:
+            stale = self._cities is None or time.monotonic() - self._loaded_at > self.ttl
+        if stale:
+            self.refresh()
+        with self._lock:
+            return {
+                'total': sum(self._cities.values()),
+                'cities': len(self._cities),
+                'urgent': self._urgent,
+                'hearings': self._hearings,
+            }
+
+    def apply(self, removed=(), added=()):
+        """stats_key() ikililerinden oluşan silinen/eklenen kayıtları özete işler."""
+        with self._lock:
+            if self._cities is None:
+                return
+            for sign, keys in ((-1, removed), (1, added)):
+                for city, priority, status in keys:
+                    self._cities[city] += sign
+                    if self._cities[city] <= 0:
+                        del self._cities[city]
+                    if priority == URGENT_PRIORITY:
+                        self._urgent += sign
+                    if status == HEARING_STATUS:
+                        self._hearings += sign
+
+    def invalidate(self):
+        with self._lock:
+            self._cities = None
+
+case_stats = CaseStatsSnapshot(ttl=app.config['STATS_SNAPSHOT_TTL'])
+
+# --- Web Yönlendirmeleri ---
+
+# Dashboard tablosunda gösterilen sütunlar; açıklama gibi büyük alanlar yüklenmez
+DASHBOARD_COLUMNS = (
+    Case.id, Case.case_no, Case.client, Case.opponent, Case.city,
+    Case.court_office, Case.case_type, Case.status, Case.created_at,
+)
+
+def filter_cases(stmt, search_q, city):
+    """Dashboard arama kutusu ve şehir filtresini bir sorguya uygular.
+
+    Arama yapıldığında sorgu tam metin indeksiyle eşleşen kayıtlarla
+    birleştirilir ve sonuçlara alaka sırası için `rank` sütunu eklenir.
+    """
+    if search_q:
+        matches = search.match_subquery(db.engine.dialect.name, search_q, Case.__tablename__)
+        stmt = stmt.join(matches, matches.c.id == Case.id).add_columns(matches.c.rank)
+    if city:
+        stmt = stmt.where(Case.city == city)
+    return stmt
+
+def encode_cursor(row):
+    if 'rank' in row._fields:
+        return f"r{row.rank!r}_{row.id}"
+    return f"{row.created_at.isoformat()}_{row.id}"
+
+def decode_cursor(cursor):
+    """İmleci (sıralama_değeri, id) ikilisine çevirir; geçersizse None.
+
+    Biçimler: '<created_at ISO>_<id>' veya arama sonuçları için 'r<rank>_<id>'.
+    """
+    try:
+        key, case_id = cursor.rsplit('_', 1)
+        if key.startswith('r'):
+            return float(key[1:]), int(case_id)
+        return datetime.fromisoformat(key), int(case_id)
+    except (AttributeError, ValueError):
+        return None
+
+def _keyset_after(keys, values, descending):
+    """(k1, k2) > (v1, v2) koşulu; `descending` ise yön tersine döner."""
+    (k1, k2), (v1, v2) = keys, values
+    if descending:
+        return or_(k1 < v1, and_(k1 == v1, k2 < v2))
+    return or_(k1 > v1, and_(k1 == v1, k2 > v2))
+
+def paginate_cases(stmt, after=None, before=None, page_size=50):
+    """Keyset sayfalama; (satırlar, sonraki_imleç, önceki_imleç) döner.
+
+    Normalde (created_at, id) üzerinde yeniden eskiye, arama sonuçlarında
+    (rank, id) üzerinde en alakalıdan başlayarak sıralanır. `after` bir sonraki,
+    `before` bir önceki sayfayı getirir; OFFSET kullanılmadığından maliyet
+    sayfa numarasından bağımsızdır.
+    """
+    if 'rank' in stmt.selected_columns:
+        keys, descending = (stmt.selected_columns.rank, Case.id), False
+        key_type = float
+    else:
+        keys, descending = (Case.created_at, Case.id), True
+        key_type = datetime
+
+    def decode(cursor):
+        key = decode_cursor(cursor) if cursor else None
+        return key if key and isinstance(key[0], key_type) else None
+
+    after_key = decode(after)
+    before_key = decode(before)
+
+    if before_key:
+        stmt = stmt.where(_keyset_after(keys, before_key, not descending))
+        order = (keys[0].desc(), keys[1].desc()) if not descending else (keys[0].asc(), keys[1].asc())
+    else:
+        if after_key:
+            stmt = stmt.where(_keyset_after(keys, after_key, descending))
+        order = (keys[0].desc(), keys[1].desc()) if descending else (keys[0].asc(), keys[1].asc())
+    stmt = stmt.order_by(*order)
+
+    rows = db.session.execute(stmt.limit(page_size + 1), bind_arguments=read_bind()).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if before_key:
+        rows.reverse()
+        next_cursor = encode_cursor(rows[-1]) if rows else None
+        prev_cursor = encode_cursor(rows[0]) if rows and has_more else None
+    else:
+        next_cursor = encode_cursor(rows[-1]) if rows and has_more else None
+        prev_cursor = encode_cursor(rows[0]) if rows and after_key else None
+
+    return rows, next_cursor, prev_cursor
+
+@app.route('/')
+def index():
+    filter_q = request.args.get('search', '')
+    city_filter = request.args.get('city', '')
+
+    try:
+        page_size = int(request.args.get('per_page', app.config['DASHBOARD_PAGE_SIZE']))
+    except ValueError:
+        page_size = app.config['DASHBOARD_PAGE_SIZE']
+    page_size = max(1, min(page_size, app.config['DASHBOARD_MAX_PAGE_SIZE']))
+
+    stmt = filter_cases(select(*DASHBOARD_COLUMNS), filter_q, city_filter)
+    cases, next_cursor, prev_cursor = paginate_cases(
+        stmt,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        page_size=page_size
+    )
 
     return render_template('dashboard.html',
                            cases=cases,
+                           next_cursor=next_cursor,
+                           prev_cursor=prev_cursor,
+                           page_size=page_size,
                            active_page='dashboard',
-                           stats={
-                               'total': total_files,
-                               'cities': cities_count,
-                               'urgent': urgent_files,
-                               'hearings': hearings
-                           })
+                           stats=case_stats.get())
 
 @app.route('/rota')
 def rota_page():
     from datetime import date
     cases = Case.query.filter(
-        or_(Case.status == 'Aktif', Case.status == 'Duruşma Bekliyor')
+        Case.status.in_(ROUTE_PAGE_STATUSES)
     ).order_by(Case.created_at.desc()).all()
 
     current_week = date.today().strftime('%G-W%V')
     return render_template('route.html', cases=cases, active_page='rota', current_week=current_week)
 
+@app.route('/api/cases/<int:case_id>')
+def api_get_case(case_id):
+    case = db.get_or_404(Case, case_id)
+    data = case.to_dict()
+    data['description'] = case.description
+    return jsonify(data)
+
 @app.route('/api/cases', methods=['POST'])
 def api_create_case():
     try:
@@ -346,14 +1648,16 @@ def api_create_case():
             due_date=datetime.strptime(data.get('due_date'), '%Y-%m-%d') if data.get('due_date') else None
         )
 
-        coords = CITY_COORDS.get(data.get('city'))
-        if coords:
-            new_case.lat = coords['lat']
-            new_case.lon = coords['lon']
+        locate_case_fields(new_case)
 
         db.session.add(new_case)
         db.session.commit()
+        plan_cache.invalidate_cases([new_case.id])
+        case_stats.apply(added=[stats_key(new_case)])
         return redirect(url_for('index'))
+    except IntegrityError:
+        db.session.rollback()
+        return f"{data.get('case_no')} numaralı dosya zaten kayıtlı", 409
     except Exception as e:
         print(f"Hata: {e}")
         return "Kaydedilirken hata oluştu", 500
@@ -363,6 +1667,7 @@ def api_update_case(case_id):
     try:
         case = db.get_or_404(Case, case_id)
         data = request.form.to_dict()
+        old_stats_key = stats_key(case)
 
         case.case_no = data.get('case_no', case.case_no)
         case.client = data.get('client', case.client)
@@ -380,13 +1685,16 @@ def api_update_case(case_id):
         if data.get('due_date'):
             case.due_date = datetime.strptime(data.get('due_date'), '%Y-%m-%d')
 
-        coords = CITY_COORDS.get(data.get('city'))
-        if coords:
-            case.lat = coords['lat']
-            case.lon = coords['lon']
+        if any(field in data for field in ('city', 'district', 'court_office')):
+            locate_case_fields(case)
 
         db.session.commit()
+        plan_cache.invalidate_cases([case_id])
+        case_stats.apply(removed=[old_stats_key], added=[stats_key(case)])
         return redirect(url_for('index'))
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": f"{data.get('case_no')} numaralı dosya zaten kayıtlı."}), 409
     except Exception as e:
         print(f"Güncelleme Hatası: {e}")
         return jsonify({"error": "Güncelleme sırasında bir hata oluştu."}), 500
@@ -395,13 +1703,55 @@ def api_update_case(case_id):
 def api_delete_case(case_id):
     try:
         case = db.get_or_404(Case, case_id)
+        old_stats_key = stats_key(case)
         db.session.delete(case)
         db.session.commit()
+        plan_cache.invalidate_cases([case_id])
+        case_stats.apply(removed=[old_stats_key])
     except Exception as e:
         print(f"Silme Hatası: {e}")
         return jsonify({"error": "Silme işlemi sırasında bir hata oluştu."}), 500
     return redirect(url_for('index'))
 
+def plan_params(selected_ids, start_city=None, start_date=None, solver_name=None, deadline_mode=None, lawyers=None):
+    """İstekteki plan alanlarını doğrulayıp iş parametrelerine çevirir; geçersizse ValueError."""
+    if isinstance(selected_ids, (str, int)):
+        selected_ids = [selected_ids]
+    # DÜZELTİLDİ: String ID'leri integer'a çevir, geçersiz değerleri atla
+    selected_ids = [int(i) for i in selected_ids or [] if str(i).strip().isdigit()]
+    if not selected_ids:
+        raise ValueError('Geçerli dosya seçilmedi')
+
+    solver_name = solver_name or 'auto'
+    if solver_name not in solver.SOLVERS:
+        raise ValueError(f"Geçersiz çözücü. Seçenekler: {', '.join(solver.SOLVERS)}")
+    deadline_mode = deadline_mode or app.config['DEADLINE_MODE']
+    if deadline_mode not in solver.DEADLINE_MODES:
+        raise ValueError(f"Geçersiz teslim tarihi modu. Seçenekler: {', '.join(solver.DEADLINE_MODES)}")
+
+    params = {
+        'selected_ids': selected_ids,
+        'start_city': start_city or 'Bursa',
+        'start_date': start_date or None,
+        'solver': solver_name,
+        'deadline_mode': deadline_mode,
+    }
+    # Avukat listesi verilirse seçim avukatlara bölünür (çok avukatlı plan)
+    if lawyers:
+        params['lawyers'] = fleet.parse_lawyers(lawyers, app.config['LAWYER_DAILY_STOPS'])
+        unknown = [lawyer['office'] for lawyer in params['lawyers']
+                   if gazetteer.canonical_city(lawyer['office']) not in CITY_COORDS]
+        if unknown:
+            raise ValueError(f"Bilinmeyen ofis şehri: {', '.join(unknown)}")
+    return params
+
+def _job_accepted(job):
+    return jsonify({
+        'job_id': job.id,
+        'status_url': url_for('api_job_status', job_id=job.id),
+        'result_url': url_for('api_job_result', job_id=job.id),
+    }), 202
+
 @app.route('/api/planla', methods=['POST'])
 def api_planla():
     # DÜZELTİLDİ: Hem 'selected_cases[]' hem 'selected_cases' parametresi deneniyor
@@ -409,21 +1759,86 @@ def api_planla():
     if not selected_ids:
         selected_ids = request.form.getlist('selected_cases')
 
-    # DÜZELTİLDİ: String ID'leri integer'a çevir, geçersiz değerleri atla
     try:
-        selected_ids = [int(i) for i in selected_ids if str(i).strip().isdigit()]
-    except (ValueError, TypeError):
-        return jsonify({'error': 'Geçersiz dosya ID formatı'}), 400
-
-    if not selected_ids:
-        return jsonify({'error': 'Geçerli dosya seçilmedi'}), 400
-
-    start_date = request.form.get('start_date')
-    start_city = request.form.get('start_city', 'Bursa')
-
-    route_data = calculate_route(selected_ids, start_city, start_date)
-    return jsonify(route_data)
-
+        params = plan_params(
+            selected_ids, request.form.get('start_city'), request.form.get('start_date'),
+            request.form.get('solver'), request.form.get('deadline_mode'), request.form.get('lawyers'),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    cases = Case.query.filter(Case.id.in_(params['selected_ids'])).all()
+    if cases:
+        cached = plan_cache.get(plan_cache_key(cases, plan_origin(params), params['start_date'], params['solver'],
+                                               params['deadline_mode']))
+        if cached is not None:
+            return jsonify(dict(cached, cached=True))
+
+    if params.get('lawyers'):
+        return _job_accepted(submit_job('plan_multi', params, _plan_job))
+    return _job_accepted(submit_job('plan', params, _plan_job))
+
+@app.route('/api/planla/batch', methods=['POST'])
+def api_planla_batch():
+    """Birden çok plan: {"plans": [{"selected_cases": [...], "start_city": ..., "start_date": ...,
+    "solver": ..., "deadline_mode": ..., "lawyers": [...]}, ...]}.
+
+    Planlar tek bir arka plan işinde ortak bacak matrisiyle hesaplanır (bkz.
+    calculate_batch); sonuç `plans` listesinde istek sırasıyla döner.
+    """
+    payload = request.get_json(silent=True) or {}
+    specs = payload.get('plans')
+    if not isinstance(specs, list) or not specs:
+        return jsonify({'error': "En az bir plan verilmeli ('plans' listesi)"}), 400
+    if len(specs) > app.config['BATCH_MAX_PLANS']:
+        return jsonify({'error': f"Tek istekte en fazla {app.config['BATCH_MAX_PLANS']} plan gönderilebilir"}), 400
+
+    plans = []
+    for number, spec in enumerate(specs, start=1):
+        if not isinstance(spec, dict):
+            return jsonify({'error': f"Plan {number}: geçersiz plan"}), 400
+        try:
+            plans.append(plan_params(
+                spec.get('selected_cases'), spec.get('start_city'), spec.get('start_date'),
+                spec.get('solver'), spec.get('deadline_mode'), spec.get('lawyers'),
+            ))
+        except ValueError as e:
+            return jsonify({'error': f"Plan {number}: {e}"}), 400
+
+    return _job_accepted(submit_job('plan_batch', {'plans': plans}, _plan_batch_job))
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    fail_stale_jobs(job_id)
+    job = db.get_or_404(Job, job_id)
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/result')
+def api_job_result(job_id):
+    fail_stale_jobs(job_id)
+    job = db.get_or_404(Job, job_id)
+    if job.status == 'failed':
+        return jsonify({'error': job.error}), 500
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 409
+    return app.response_class(job.result, mimetype='application/json')
+
+
+@app.route('/api/route_cache/stats')
+def api_route_cache_stats():
+    return jsonify(route_leg_cache.stats())
+
+@app.route('/api/plan_cache/stats')
+def api_plan_cache_stats():
+    return jsonify(plan_cache.stats())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/api/routing/status')
+def api_routing_status():
+    return jsonify(routing_client.status())
 
 @app.route('/api/download_template')
 def download_template():
@@ -442,6 +1857,10 @@ def download_template():
         'due_date': ['2024-12-31', '2025-01-15'],
         'description': ['Örnek açıklama 1', 'Örnek açıklama 2']
     }
+    # pandas/openpyxl yalnızca Excel uç noktalarında yüklenir (açılış süresi ve bellek)
+    import pandas as pd
+    from io import BytesIO
+
     df = pd.DataFrame(data)
 
     output = BytesIO()
@@ -458,45 +1877,253 @@ def download_template():
     )
 
 
+# Dışa aktarılan sütunlar (Excel şablonuyla aynı sıra)
+EXPORT_COLUMNS = (
+    Case.case_no, Case.client, Case.opponent, Case.city, Case.district,
+    Case.court_office, Case.case_type, Case.status, Case.priority,
+    Case.follower_lawyer, Case.authorized_lawyer, Case.due_date, Case.description,
+)
+EXPORT_HEADERS = [column.key for column in EXPORT_COLUMNS]
+
+def iter_export_rows(search_q='', city=''):
+    """Dashboard filtrelerine uyan dosyaları parça parça okuyarak satır satır üretir.
+
+    `yield_per` ile sunucu taraflı imleç kullanılır (PostgreSQL); bellekte
+    aynı anda en fazla `EXPORT_CHUNK_SIZE` satır bulunur.
+    """
+    stmt = filter_cases(select(*EXPORT_COLUMNS, Case.id), search_q, city)
+    if 'rank' in stmt.selected_columns:
+        stmt = stmt.order_by(stmt.selected_columns.rank.asc(), Case.id.asc())
+    else:
+        stmt = stmt.order_by(Case.created_at.desc(), Case.id.desc())
+
+    result = db.session.execute(
+        stmt.execution_options(yield_per=app.config['EXPORT_CHUNK_SIZE']), bind_arguments=read_bind()
+    )
+    for row in result:
+        values = list(row[:len(EXPORT_COLUMNS)])
+        due_date = values[EXPORT_HEADERS.index('due_date')]
+        values[EXPORT_HEADERS.index('due_date')] = due_date.strftime('%Y-%m-%d') if due_date else None
+        yield values
+
+def stream_csv(rows):
+    """Satırları `EXPORT_CHUNK_SIZE`'lık parçalar halinde CSV olarak üretir."""
+    import csv
+    from io import StringIO
+
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    # Excel'in Türkçe karakterleri doğru açması için UTF-8 BOM
+    buffer.write('\ufeff')
+    writer.writerow(EXPORT_HEADERS)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(['' if value is None else value for value in row])
+        if count % app.config['EXPORT_CHUNK_SIZE'] == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+def stream_xlsx(rows, chunk_bytes=64 * 1024):
+    """Satırları openpyxl yazma-modu çalışma kitabına yazar ve dosyayı parça parça üretir.
+
+    Yazma modunda satırlar bellekte değil geçici dosyada tutulur; XLSX bir zip
+    arşivi olduğundan istemciye gönderim kitap kapatıldıktan sonra başlar.
+    """
+    import tempfile
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Dosyalar')
+    sheet.append(EXPORT_HEADERS)
+    for row in rows:
+        sheet.append(row)
+
+    with tempfile.TemporaryFile() as tmp:
+        workbook.save(tmp)
+        tmp.seek(0)
+        while chunk := tmp.read(chunk_bytes):
+            yield chunk
+
+EXPORT_FORMATS = {
+    'xlsx': (stream_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+}
+
 @app.route('/api/export_excel')
 def export_excel():
-    cases = Case.query.order_by(Case.created_at.desc()).all()
+    """Dosyaları dashboard'daki `search`/`city` filtreleriyle `format=xlsx|csv` olarak akıtır."""
+    export_format = request.args.get('format', 'xlsx')
+    if export_format not in EXPORT_FORMATS:
+        return f"Geçersiz format: {export_format}", 400
+
+    writer, mimetype = EXPORT_FORMATS[export_format]
+    rows = iter_export_rows(request.args.get('search', ''), request.args.get('city', ''))
+    return Response(
+        stream_with_context(writer(rows)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=dosyalar_disa_aktarim.{export_format}'},
+    )
 
-    data = []
-    for case in cases:
-        data.append({
-            'case_no': case.case_no,
-            'client': case.client,
-            'opponent': case.opponent,
-            'city': case.city,
-            'district': case.district,
-            'court_office': case.court_office,
-            'case_type': case.case_type,
-            'status': case.status,
-            'priority': case.priority,
-            'follower_lawyer': case.follower_lawyer,
-            'authorized_lawyer': case.authorized_lawyer,
-            'due_date': case.due_date.strftime('%Y-%m-%d') if case.due_date else None,
-            'description': case.description
-        })
+def existing_case_nos(case_nos, chunk_size=1000):
+    """Verilen dosya numaralarından veritabanında zaten kayıtlı olanlar (parça parça IN sorgusu)."""
+    case_nos = list(case_nos)
+    found = set()
+    for i in range(0, len(case_nos), chunk_size):
+        found.update(db.session.scalars(
+            select(Case.case_no).where(Case.case_no.in_(case_nos[i:i + chunk_size]))
+        ))
+    return found
+
+def insert_cases(rows):
+    """Kayıtları toplu INSERT ile yazar; aynı dosya no zaten varsa satır atlanır.
+
+    Dönüş: eklenen kayıtların (id, case_no, city, priority, status) satırları.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
 
-    df = pd.DataFrame(data)
+    returning = (Case.id, Case.case_no, Case.city, Case.priority, Case.status)
+    if dialect_insert is not None:
+        stmt = dialect_insert(Case).on_conflict_do_nothing(index_elements=['case_no'])
+    else:
+        from sqlalchemy import insert as stmt_insert
+        stmt = stmt_insert(Case)
+
+    inserted = []
+    batch_size = app.config['IMPORT_BATCH_SIZE']
+    for i in range(0, len(rows), batch_size):
+        inserted += db.session.execute(stmt.returning(*returning), rows[i:i + batch_size]).all()
+    return inserted
+
+def import_cases(df, first_row=None):
+    """Bir tabloyu içe aktarır ve {'inserted', 'skipped', 'rejected', 'rows'} raporu döner.
+
+    Temizleme vektörize yapılır, mevcut dosya numaraları tek seferde sorgulanır
+    ve kayıtlar `IMPORT_BATCH_SIZE`'lık toplu INSERT'lerle tek işlemde yazılır.
+    `first_row`, tablonun ilk satırının dosyadaki satır numarasıdır.
+    """
+    import importer
+
+    if first_row is None:
+        first_row = importer.FIRST_DATA_ROW
+    max_lengths = {
+        column.name: column.type.length
+        for column in Case.__table__.columns
+        if getattr(column.type, 'length', None)
+    }
+    records, issues = importer.clean_frame(df, gazetteer.resolve, max_lengths=max_lengths, first_row=first_row)
 
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Dosyalar')
+    existing = existing_case_nos(records['case_no'])
+    already = records['case_no'].isin(existing)
+    issues += [
+        {'row': int(r), 'case_no': c, 'status': importer.SKIPPED, 'reason': 'zaten kayıtlı'}
+        for r, c in zip(records['row'][already], records['case_no'][already])
+    ]
+    records = records[~already]
 
-    output.seek(0)
+    try:
+        inserted = insert_cases(importer.to_rows(records))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # Eşzamanlı bir yükleme aynı numarayı araya girip yazdıysa satır sessizce atlanmıştır
+    inserted_nos = {row.case_no for row in inserted}
+    raced = ~records['case_no'].isin(inserted_nos)
+    issues += [
+        {'row': int(r), 'case_no': c, 'status': importer.SKIPPED, 'reason': 'zaten kayıtlı'}
+        for r, c in zip(records['row'][raced], records['case_no'][raced])
+    ]
+
+    plan_cache.invalidate_cases([row.id for row in inserted])
+    case_stats.apply(added=[(row.city, row.priority, row.status) for row in inserted])
+
+    issues.sort(key=lambda issue: issue['row'])
+    return {
+        'inserted': len(inserted),
+        'skipped': sum(1 for issue in issues if issue['status'] == importer.SKIPPED),
+        'rejected': sum(1 for issue in issues if issue['status'] == importer.REJECTED),
+        'rows': issues,
+    }
 
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name='dosyalar_disa_aktarim.xlsx'
+def wants_json():
+    return request.args.get('format') == 'json' or (
+        request.accept_mimetypes.best == 'application/json'
     )
 
+def _import_job(params, progress):
+    """Yüklenen dosyayı `IMPORT_BATCH_SIZE`'lık parçalar halinde okuyup içe aktarır.
+
+    Her parça kendi işleminde yazılır; yarıda kalan bir içe aktarmada o ana
+    kadar işlenen parçalar kalıcıdır.
+    """
+    import importer
+
+    path, fmt = params['path'], params['format']
+    try:
+        total = params['total_rows']
+        if total is None:
+            # Boyut bilgisi olmayan xlsx: satır sınırı yazmaya başlamadan önce burada denetlenir
+            total = importer.count_rows(path, fmt)
+            if total > app.config['IMPORT_MAX_ROWS']:
+                raise ValueError(f"Dosya en fazla {app.config['IMPORT_MAX_ROWS']} satır içerebilir ({total} satır)")
+        report = {'inserted': 0, 'skipped': 0, 'rejected': 0, 'rows': [], 'truncated': False}
+        started = time.perf_counter()
+        imported = set()
+        processed = 0
+        first_row = importer.FIRST_DATA_ROW
+
+        for frame in importer.iter_frames(path, fmt, chunk_rows=app.config['IMPORT_BATCH_SIZE']):
+            chunk = import_cases(frame, first_row=first_row)
+            for issue in chunk['rows']:
+                # Önceki parçalarda eklenen numaralar veritabanında "kayıtlı" görünür
+                if issue['reason'] == 'zaten kayıtlı' and issue['case_no'] in imported:
+                    issue['reason'] = 'dosyada mükerrer dosya no'
+            imported.update(frame['case_no'].dropna().astype(str).str.strip())
+
+            for key in ('inserted', 'skipped', 'rejected'):
+                report[key] += chunk[key]
+            room = app.config['IMPORT_MAX_REPORTED_ROWS'] - len(report['rows'])
+            report['rows'] += chunk['rows'][:max(room, 0)]
+            report['truncated'] |= len(chunk['rows']) > room
+
+            processed += len(frame)
+            first_row += len(frame)
+            progress(100.0 * processed / max(total, 1), f"{processed}/{total} satır")
+
+        elapsed = time.perf_counter() - started
+        for key in ('inserted', 'skipped', 'rejected'):
+            IMPORT_ROWS.inc(report[key], status=key)
+        if processed and elapsed > 0:
+            IMPORT_ROWS_PER_SECOND.observe(processed / elapsed)
+        print(f"İçe aktarma ({params['filename']}): {report['inserted']} eklendi, "
+              f"{report['skipped']} atlandı, {report['rejected']} reddedildi")
+        return report
+    finally:
+        os.remove(path)
+
+@app.errorhandler(413)
+def request_too_large(error):
+    return f"Dosya en fazla {app.config['IMPORT_MAX_BYTES'] // (1024 * 1024)} MB olabilir", 413
+
 @app.route('/api/upload_excel', methods=['POST'])
 def upload_excel():
+    """Excel (xlsx) veya CSV dosyasını diske alır ve arka planda içe aktarır.
+
+    Boyut ve satır sınırları aşılırsa dosya işlenmeden `413` ile reddedilir.
+    JSON isteyen istemcilere `202` ile iş bilgisi, tarayıcıya dashboard'a
+    yönlendirme döner; ilerleme `/api/jobs/<job_id>` adresinden izlenir.
+    """
+    if request.content_length and request.content_length > app.config['IMPORT_MAX_BYTES']:
+        abort(413)
+
     if 'file' not in request.files:
         return "Dosya yüklenmedi", 400
 
@@ -504,86 +2131,160 @@ def upload_excel():
     if file.filename == '':
         return "Dosya seçilmedi", 400
 
-    if file and (file.filename.endswith('.xlsx') or file.filename.endswith('.xls')):
-        try:
-            df = pd.read_excel(file)
-
-            required_columns = ['case_no', 'city']
-            for col in required_columns:
-                if col not in df.columns:
-                    return f"Hata: '{col}' sütunu bulunamadı.", 400
-
-            count = 0
-            for _, row in df.iterrows():
-                if pd.isna(row.get('case_no')) or str(row.get('case_no')).strip() == '':
-                    continue
-
-                case_no_val = str(row.get('case_no')).strip()
-
-                existing_case = Case.query.filter_by(case_no=case_no_val).first()
-                if existing_case:
-                    continue
-
-                due_date_val = None
-                if pd.notna(row.get('due_date')):
-                    try:
-                        due_date_val = pd.to_datetime(row.get('due_date')).date()
-                    except Exception:
-                        due_date_val = None
-
-                new_case = Case(
-                    case_no=case_no_val,
-                    client=str(row.get('client', '')) if pd.notna(row.get('client')) else None,
-                    opponent=str(row.get('opponent', '')) if pd.notna(row.get('opponent')) else None,
-                    city=str(row.get('city', '')) if pd.notna(row.get('city')) else None,
-                    district=str(row.get('district', '')) if pd.notna(row.get('district')) else None,
-                    court_office=str(row.get('court_office', '')) if pd.notna(row.get('court_office')) else None,
-                    case_type=str(row.get('case_type', '')) if pd.notna(row.get('case_type')) else None,
-                    status=str(row.get('status', 'Aktif')) if pd.notna(row.get('status')) else 'Aktif',
-                    priority=str(row.get('priority', 'Normal')) if pd.notna(row.get('priority')) else 'Normal',
-                    follower_lawyer=str(row.get('follower_lawyer', '')) if pd.notna(row.get('follower_lawyer')) else None,
-                    authorized_lawyer=str(row.get('authorized_lawyer', '')) if pd.notna(row.get('authorized_lawyer')) else None,
-                    description=str(row.get('description', '')) if pd.notna(row.get('description')) else None,
-                    due_date=due_date_val
-                )
-
-                city_name = str(row.get('city', ''))
-                coords = CITY_COORDS.get(city_name)
-
-                excel_lat = row.get('lat')
-                excel_lon = row.get('lon')
-                if pd.notna(excel_lat) and pd.notna(excel_lon):
-                    new_case.lat = float(excel_lat)
-                    new_case.lon = float(excel_lon)
-                elif coords:
-                    new_case.lat = coords['lat']
-                    new_case.lon = coords['lon']
+    import importer
 
-                db.session.add(new_case)
-                count += 1
+    fmt = importer.file_format(file.filename)
+    if fmt is None:
+        return "Geçersiz dosya formatı (xlsx veya csv yükleyin)", 400
 
-            db.session.commit()
-            return redirect(url_for('index'))
-
-        except Exception as e:
-            print(f"Excel yükleme hatası: {e}")
-            return f"Hata oluştu: {str(e)}", 500
+    import tempfile
+    fd, path = tempfile.mkstemp(suffix=f'.{fmt}', dir=app.config['IMPORT_SPOOL_DIR'])
+    os.close(fd)
+    try:
+        file.save(path)
+        if os.path.getsize(path) > app.config['IMPORT_MAX_BYTES']:
+            os.remove(path)
+            abort(413)
+
+        missing = importer.missing_columns(importer.read_header(path, fmt))
+        if missing:
+            os.remove(path)
+            return f"Hata: '{missing[0]}' sütunu bulunamadı.", 400
+
+        total_rows = importer.count_rows(path, fmt, scan=False)
+        if total_rows is not None and total_rows > app.config['IMPORT_MAX_ROWS']:
+            os.remove(path)
+            return f"Dosya en fazla {app.config['IMPORT_MAX_ROWS']} satır içerebilir ({total_rows} satır)", 413
+    except Exception as e:
+        if os.path.exists(path):
+            os.remove(path)
+        print(f"Excel yükleme hatası: {e}")
+        return f"Hata oluştu: {str(e)}", 400
+
+    job = submit_job('import', {
+        'path': path,
+        'format': fmt,
+        'filename': file.filename,
+        'total_rows': total_rows,
+    }, _import_job)
+
+    if wants_json():
+        return _job_accepted(job)
+    return redirect(url_for('index', import_job=job.id))
+
+# --- Şema ve İndeks Kontrolü ---
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+def hot_queries():
+    """Uygulamanın sık çalışan sorguları; her biri bir indeksle karşılanmalı."""
+    return {
+        'dashboard': filter_cases(select(*DASHBOARD_COLUMNS), '', '')
+            .order_by(Case.created_at.desc(), Case.id.desc()).limit(51),
+        'dashboard_city': filter_cases(select(*DASHBOARD_COLUMNS), '', 'Bursa')
+            .order_by(Case.created_at.desc(), Case.id.desc()).limit(51),
+        'rota_page': select(Case.id).where(Case.status.in_(ROUTE_PAGE_STATUSES))
+            .order_by(Case.created_at.desc()),
+        'urgent_cases': select(Case.id).where(Case.priority == URGENT_PRIORITY),
+        'case_no_lookup': select(Case.id).where(Case.case_no == '2024/1'),
+    }
 
-    return "Geçersiz dosya formatı", 400
+def explain_query(connection, stmt):
+    """Sorgu planını döner: (indeks_kullanıyor_mu, plan_metni)."""
+    sql = str(stmt.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        details = [row[-1] for row in rows]
+        full_scan = any(
+            d.startswith(f'SCAN {Case.__tablename__}') and 'INDEX' not in d for d in details
+        )
+        return not full_scan, '\n'.join(details)
+
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes, stack = [], [plan[0]['Plan']]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node.get('Plans', []))
+    full_scan = any(
+        n['Node Type'] == 'Seq Scan' and n.get('Relation Name') == Case.__tablename__ for n in nodes
+    )
+    return not full_scan, json.dumps(plan, indent=2)
+
+def explain_hot_queries():
+    """Tüm sık sorgular için [(ad, indeks_kullanıyor_mu, plan_metni)] döner."""
+    results = []
+    with db.engine.connect() as connection:
+        if connection.dialect.name == 'postgresql':
+            # Küçük tablolarda planlayıcı indeks olsa da Seq Scan seçebilir;
+            # burada indeksin kullanılabilir olup olmadığı denetlenir
+            # (SET LOCAL: pooler üzerinden oturum ayarı diğer istemcilere sızmasın)
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for name, stmt in hot_queries().items():
+            uses_index, plan = explain_query(connection, stmt)
+            results.append((name, uses_index, plan))
+        connection.rollback()
+    return results
+
+@app.cli.command('check-indexes')
+def check_indexes_command():
+    """Sık sorguların EXPLAIN çıktısında indeks kullandığını doğrular."""
+    failed = False
+    for name, uses_index, plan in explain_hot_queries():
+        print(f"[{'OK' if uses_index else 'TAM TARAMA'}] {name}")
+        if not uses_index:
+            failed = True
+            print(plan)
+    if failed:
+        raise SystemExit(1)
+
+@app.cli.command('build-road-graph')
+def build_road_graph_command():
+    """Karayolu kenar listesini çevrimdışı yönlendirme için CSR dizilerine derler."""
+    from road_graph import RoadGraph
+
+    graph = RoadGraph.from_csv(CITY_COORDS, app.config['ROAD_EDGES_PATH'])
+    graph.save(app.config['ROAD_GRAPH_PATH'])
+    print(f"{len(graph)} düğüm, {graph.edge_count} yönlü kenar -> {app.config['ROAD_GRAPH_PATH']}")
+
+@app.cli.command('build-province-matrix')
+@click.option('--full', is_flag=True, help='Eski matrisi yok sayıp tüm bacakları yeniden hesapla')
+def build_province_matrix_command(full):
+    """İl merkezleri ve adliyeler arası bacak matrisini hesaplar veya artımlı günceller."""
+    path = app.config['PROVINCE_MATRIX_PATH']
+    previous = None if full else load_province_matrix()
+    matrix, computed = ProvinceMatrix.build(
+        province_matrix_points(), routing_client, previous=previous,
+        max_coords=app.config['OSRM_TABLE_MAX_COORDS'], precision=app.config['ROUTE_CACHE_PRECISION'],
+        progress=lambda done, total: print(f"  tablo {done}/{total}"),
+    )
+    if not computed and previous is not None and len(previous) == len(matrix):
+        print(f"Matris güncel ({len(matrix)} nokta, {previous.backend}); değişiklik yok")
+        return
+    matrix.save(path)
+    print(f"{len(matrix)} nokta ({computed} yeni hesaplandı, {routing_client.name}) -> {path}")
 
 def init_db():
+    """Bekleyen şema migrasyonlarını uygular (flask db upgrade ile aynı)."""
     with app.app_context():
         retries = 30
         while retries > 0:
             try:
-                db.create_all()
-                print("Veritabanı tabloları oluşturuldu.")
+                with db.engine.connect():
+                    pass
                 break
-            except Exception as e:
+            except OperationalError as e:
                 print(f"DB Bağlantısı bekleniyor... ({e})")
                 time.sleep(2)
                 retries -= 1
+        migrate_upgrade(directory=MIGRATIONS_DIR)
+        print("Veritabanı şeması güncel.")
+        stale = fail_stale_jobs()
+        if stale:
+            print(f"{stale} yarıda kalmış iş başarısız işaretlendi.")
 
 if __name__ == '__main__':
+    # Geliştirme sunucusu; üretimde gunicorn kullanılır (bkz. wsgi.py, gunicorn.conf.py)
     init_db()
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5000, debug=os.environ.get('FLASK_DEBUG') == '1')
@@ -0,0 +1,173 @@
+"""Ölçümler için tekrarlanabilir sentetik dosya yükü ve sahte yönlendirici.
+
+Dosyalar gazetteer'daki gerçek adliyelere dağıtılır; mahkeme adı
+("Kartal 3. Asliye Hukuk") adliyenin kendi adından üretildiğinden her
+dosya uygulamadaki gibi doğru adliyeye çözülür. Aynı `seed` ve `count` her
+makinede aynı satırları üretir: satırlar sabit boyutlu bloklar halinde ve her
+blok kendi tohumuyla (`[seed, blok]`) üretilir, böylece 1M satırlık bir yük
+belleğe alınmadan yazılabilir.
+"""
+import csv
+import math
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import insert
+
+from gazetteer import Gazetteer
+from routing import CircuitBreaker, RoutingBackend, estimate_matrix, haversine_matrix
+
+BLOCK_SIZE = 10000
+
+# Değerler dashboard formundaki seçeneklerle aynıdır
+CASE_TYPES = ('Hukuk Davası', 'Ceza Davası', 'İdari Dava', 'Tüketici Davası', 'İcra Takibi', 'Diğer')
+COURTS = ('Asliye Hukuk', 'İş Mahkemesi', 'Asliye Ceza', 'İcra Hukuk', 'Sulh Hukuk', 'Tüketici Mahkemesi')
+STATUSES = ('Aktif', 'Duruşma Bekliyor', 'Karara Çıktı', 'İstinaf/Yargıtay', 'Kapalı')
+STATUS_WEIGHTS = (0.5, 0.2, 0.1, 0.1, 0.1)
+PRIORITIES = ('Normal', 'Yüksek', 'Acil')
+PRIORITY_WEIGHTS = (0.75, 0.15, 0.1)
+FIRST_NAMES = ('Ahmet', 'Mehmet', 'Ayşe', 'Fatma', 'Mustafa', 'Zeynep', 'Emine', 'Ali', 'Hüseyin', 'Elif',
+               'Hasan', 'İbrahim', 'Şerife', 'Özge', 'Çağrı', 'Gökhan')
+LAST_NAMES = ('Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Yıldırım', 'Öztürk', 'Aydın', 'Özdemir',
+              'Arslan', 'Doğan', 'Kılıç', 'Aslan', 'Çetin', 'Koç')
+COMPANIES = ('ABC Şirketi', 'XYZ Ltd.', 'Marmara İnşaat A.Ş.', 'Ege Gıda Ltd.', 'Anadolu Sigorta', 'Karadeniz Nakliyat')
+LAWYERS = ('Av. Ali Veli', 'Av. Ayşe Fatma', 'Av. Can Öz', 'Av. Deniz Ak', 'Av. Ece Su')
+AUTHORIZED_LAWYER = 'Av. M.F. ERATA'
+
+# Toplu ekleme / dosya yazma sütunları (Excel şablonuyla aynı sıra, koordinatlar sonda)
+COLUMNS = (
+    'case_no', 'client', 'opponent', 'city', 'district', 'court_office', 'case_type', 'status', 'priority',
+    'follower_lawyer', 'authorized_lawyer', 'due_date', 'description', 'lat', 'lon',
+)
+
+
+def _courthouse_offices(gazetteer):
+    """Her adliye için (il, mahkeme adı öneki, lat, lon) dizileri."""
+    courthouses = gazetteer.courthouses
+    stems = [c['name'][:-len(' Adliyesi')] if c['name'].endswith(' Adliyesi') else c['name'] for c in courthouses]
+    return (
+        [c['city'] for c in courthouses], stems,
+        np.array([c['lat'] for c in courthouses]), np.array([c['lon'] for c in courthouses]),
+    )
+
+
+def generate_cases(count, seed=0, gazetteer=None, first_no=1, today=date(2025, 1, 6)):
+    """`count` dosyayı BLOCK_SIZE'lık sözlük listeleri halinde üretir.
+
+    Büyük şehirlerin adliyeleri daha çok dosya alır (ağırlık: ildeki adliye
+    sayısı). `today` sabittir; son tarihler ondan itibaren 0-120 gün sonradır.
+    """
+    gazetteer = gazetteer or Gazetteer.load()
+    cities, stems, lats, lons = _courthouse_offices(gazetteer)
+    per_city = {city: cities.count(city) for city in set(cities)}
+    weights = np.array([per_city[city] for city in cities], dtype=float)
+    weights /= weights.sum()
+
+    for block, start in enumerate(range(0, count, BLOCK_SIZE)):
+        size = min(BLOCK_SIZE, count - start)
+        rng = np.random.default_rng([seed, block])
+        where = rng.choice(len(cities), size=size, p=weights)
+        chamber = rng.integers(1, 16, size=size)
+        court = rng.integers(len(COURTS), size=size)
+        case_type = rng.integers(len(CASE_TYPES), size=size)
+        status = rng.choice(len(STATUSES), size=size, p=STATUS_WEIGHTS)
+        priority = rng.choice(len(PRIORITIES), size=size, p=PRIORITY_WEIGHTS)
+        first = rng.integers(len(FIRST_NAMES), size=size)
+        last = rng.integers(len(LAST_NAMES), size=size)
+        opponent = rng.integers(len(COMPANIES), size=size)
+        lawyer = rng.integers(len(LAWYERS), size=size)
+        due = rng.integers(0, 121, size=size)
+        has_due = rng.random(size) < 0.7
+
+        rows = []
+        for i in range(size):
+            no = first_no + start + i
+            c = where[i]
+            rows.append({
+                'case_no': f'{2020 + no % 5}/{no:07d}',
+                'client': f'{FIRST_NAMES[first[i]]} {LAST_NAMES[last[i]]}',
+                'opponent': COMPANIES[opponent[i]],
+                'city': cities[c],
+                'district': None,
+                'court_office': f'{stems[c]} {chamber[i]}. {COURTS[court[i]]}',
+                'case_type': CASE_TYPES[case_type[i]],
+                'status': STATUSES[status[i]],
+                'priority': PRIORITIES[priority[i]],
+                'follower_lawyer': LAWYERS[lawyer[i]],
+                'authorized_lawyer': AUTHORIZED_LAWYER,
+                'due_date': today + timedelta(days=int(due[i])) if has_due[i] else None,
+                'description': f'Sentetik dosya {no}',
+                'lat': float(lats[c]),
+                'lon': float(lons[c]),
+            })
+        yield rows
+
+
+def load_cases(db, model, count, seed=0, gazetteer=None):
+    """Dosyaları toplu INSERT ile (blok başına bir işlem) yazar; saniye cinsinden süreyi döner."""
+    started = time.perf_counter()
+    for rows in generate_cases(count, seed, gazetteer):
+        db.session.execute(insert(model), rows)
+        db.session.commit()
+    return time.perf_counter() - started
+
+
+def write_csv(path, count, seed=0, gazetteer=None, first_no=1):
+    """İçe aktarma ölçümü için şablon sütunlarıyla (koordinatsız) CSV yazar."""
+    columns = COLUMNS[:-2]
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in generate_cases(count, seed, gazetteer, first_no=first_no):
+            writer.writerows([row[c] for c in columns] for row in rows)
+
+
+def write_xlsx(path, count, seed=0, gazetteer=None, first_no=1):
+    """İçe aktarma ölçümü için şablon sütunlarıyla (koordinatsız) xlsx yazar."""
+    from openpyxl import Workbook
+
+    columns = COLUMNS[:-2]
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Dosyalar')
+    sheet.append(columns)
+    for rows in generate_cases(count, seed, gazetteer, first_no=first_no):
+        for row in rows:
+            sheet.append([row[c] for c in columns])
+    workbook.save(path)
+
+
+class FakeRouter(RoutingBackend):
+    """Ağ gecikmesini taklit eden yönlendirici.
+
+    Her `route` çağrısı ve her `table` bloğu bir istek sayılır ve `latency`
+    saniye sürer; matris blokları OSRM istemcisindeki gibi `max_workers`
+    paralel istekle gönderilmiş varsayılır. Sonuçlar haversine tahminidir.
+    Böylece ölçümler dış sunucuya bağlı kalmadan OSRM'e benzer bir maliyet
+    modeliyle karşılaştırılabilir.
+    """
+
+    name = 'fake'
+
+    def __init__(self, latency=0.005, max_workers=8, detour_factor=1.3, speed_kmh=80.0):
+        self.latency = latency
+        self.max_workers = max_workers
+        self.detour_factor = detour_factor
+        self.speed_kmh = speed_kmh
+        self.breaker = CircuitBreaker()
+        self.requests = 0
+
+    def _wait(self, requests=1):
+        self.requests += requests
+        if self.latency:
+            time.sleep(self.latency * math.ceil(requests / self.max_workers))
+
+    def route(self, lat1, lon1, lat2, lon2):
+        self._wait()
+        km = float(haversine_matrix([lat1, lat2], [lon1, lon2])[0, 1]) * self.detour_factor
+        return km, km / self.speed_kmh * 60
+
+    def table(self, coords, max_coords=100):
+        n = len(coords)
+        self._wait(math.ceil(n / max(max_coords // 2, 1)) ** 2 if n > max_coords else 1)
+        return estimate_matrix(coords, self.detour_factor, self.speed_kmh)
@@ -0,0 +1,74 @@
+"""Yönlendirme arka ucu ölçümü: tek bacak ve matris süreleri.
+
+Duraklar gazetteer'daki adliyelerden sabit tohumla seçilir. Varsayılan
+olarak yalnızca çevrimdışı karayolu ağı ölçülür; `--osrm-url` verilirse
+aynı noktalar o OSRM sunucusuna da gönderilir.
+
+    python -m benchmarks.routing --stops 25 --repeat 5
+    python -m benchmarks.routing --osrm-url http://localhost:5001
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+import numpy as np
+
+from gazetteer import Gazetteer
+from road_graph import GraphRouter, RoadGraph
+from routing import RoutingClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample_stops(count, seed=0):
+    courthouses = Gazetteer.load().courthouses
+    picks = np.random.default_rng(seed).choice(len(courthouses), size=min(count, len(courthouses)), replace=False)
+    return [(courthouses[i]['lat'], courthouses[i]['lon']) for i in picks]
+
+
+def measure(backend, coords, repeat):
+    legs = [coords[i] + coords[(i + 1) % len(coords)] for i in range(len(coords))]
+    leg_runs, table_runs = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for leg in legs:
+            backend.route(*leg)
+        leg_runs.append((time.perf_counter() - started) / len(legs))
+
+        started = time.perf_counter()
+        backend.table(coords)
+        table_runs.append(time.perf_counter() - started)
+    return {
+        'route_ms': round(statistics.median(leg_runs) * 1000, 3),
+        'table_ms': round(statistics.median(table_runs) * 1000, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stops', type=int, default=25)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--graph', default=os.path.join(ROOT, 'data', 'road_graph.npz'))
+    parser.add_argument('--osrm-url', help='Karşılaştırma için OSRM sunucusu')
+    parser.add_argument('--output', help='Sonuçların yazılacağı JSON dosyası')
+    args = parser.parse_args(argv)
+
+    coords = sample_stops(args.stops)
+    backends = {'offline': GraphRouter(RoadGraph.load(args.graph))}
+    if args.osrm_url:
+        backends['osrm'] = RoutingClient(args.osrm_url)
+
+    results = {name: measure(backend, coords, args.repeat) for name, backend in backends.items()}
+    for name, r in results.items():
+        print(f"{name:>7}: bacak {r['route_ms']:8.3f} ms | {len(coords)}x{len(coords)} matris {r['table_ms']:8.3f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Soğuk açılış ölçümü: içe aktarmadan ilk isteğe kadar geçen süre ve worker belleği.
+
+Her ölçüm temiz bir Python sürecinde yapılır. `eager` modu, pandas,
+openpyxl ve requests'in açılışta yüklendiği eski davranışı taklit eder;
+`lazy` modu uygulamanın şimdiki halidir.
+
+    python -m benchmarks.startup --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Alt süreçte çalışan ölçüm kodu
+CHILD = r'''
+import json, resource, sys, time
+started = time.perf_counter()
+if sys.argv[1] == 'eager':
+    import pandas, openpyxl, requests
+import app
+imported = time.perf_counter()
+with app.app.app_context():
+    app.db.create_all()
+response = app.app.test_client().get('/')
+assert response.status_code == 200, response.status_code
+first_request = time.perf_counter()
+print(json.dumps({
+    'import_s': imported - started,
+    'first_request_s': first_request - started,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy_modules': sorted(m for m in ('pandas', 'openpyxl', 'requests') if m in sys.modules),
+}))
+'''
+
+
+def measure(mode):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        output = subprocess.check_output(
+            [sys.executable, '-c', CHILD, mode], cwd=ROOT, env=env, text=True
+        )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Sonuçların yazılacağı JSON dosyası')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for mode in ('eager', 'lazy'):
+        runs = [measure(mode) for _ in range(args.repeat)]
+        results[mode] = {
+            key: round(statistics.median(run[key] for run in runs), 4)
+            for key in ('import_s', 'first_request_s', 'rss_mb')
+        }
+        results[mode]['heavy_modules'] = runs[-1]['heavy_modules']
+
+    for mode, r in results.items():
+        print(f"{mode:>5}: içe aktarma {r['import_s'] * 1000:7.1f} ms | "
+              f"ilk istek {r['first_request_s'] * 1000:7.1f} ms | RSS {r['rss_mb']:6.1f} MB | "
+              f"yüklü: {', '.join(r['heavy_modules']) or '-'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
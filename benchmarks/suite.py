@@ -0,0 +1,251 @@
+"""Uçtan uca ölçüm takımı: rota planı, dashboard, arama, istatistik, içe/dışa aktarma.
+
+Ölçümler geçici bir SQLite veritabanında, `benchmarks.caseload` ile sabit
+tohumdan üretilen dosyalar ve ağ gecikmesini taklit eden `FakeRouter` ile
+yapılır; aynı parametrelerle iki çalıştırma aynı veriyi ve aynı istek
+sayısını görür. Sonuçlar JSON olarak yazılır; `--baseline` verilirse
+medyanı taban çizgisinden `--threshold` oranından fazla yavaşlayan ölçüm
+raporlanır ve süreç 1 ile çıkar (CI'da gerileme kontrolü).
+
+    python -m benchmarks.suite --cases 10000 --output bench.json
+    python -m benchmarks.suite --cases 10000 --baseline bench.json --threshold 0.25
+    python -m benchmarks.suite --cases 1000000 --only plan_stops_50,dashboard
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import delete, func, select
+
+from benchmarks.caseload import FakeRouter, load_cases, write_csv, write_xlsx
+
+START_CITY = 'Bursa'
+START_DATE = '2025-01-06'
+BATCH_CITIES = ('Bursa', 'İstanbul', 'Ankara', 'İzmir')
+BATCH_WEEKS = (START_DATE, '2025-01-13', '2025-01-20')
+
+
+def measure(run, repeat, setup=None, warmup=1):
+    """`run`'ı `warmup` kez ısınma, `repeat` kez ölçüm için çalıştırır; `setup` süreye dahil değildir."""
+    runs = []
+    for i in range(warmup + repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        run()
+        if i >= warmup:
+            runs.append(time.perf_counter() - started)
+    return {
+        'median_ms': round(statistics.median(runs) * 1000, 3),
+        'min_ms': round(min(runs) * 1000, 3),
+        'max_ms': round(max(runs) * 1000, 3),
+        'repeat': repeat,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Taban çizgisine göre `threshold` oranından fazla yavaşlayan ölçümler.
+
+    Dönüş: [(ad, taban_ms, şimdiki_ms, oran), ...]; yalnızca iki tarafta da
+    bulunan ölçümler karşılaştırılır.
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or not base.get('median_ms'):
+            continue
+        ratio = current['median_ms'] / base['median_ms']
+        if ratio > 1 + threshold:
+            regressions.append((name, base['median_ms'], current['median_ms'], round(ratio, 3)))
+    return regressions
+
+
+def plan_selections(app_module, sizes):
+    """Her durak sayısı için farklı adliyelerden birer dosya id'si.
+
+    Durak sayısı adliye sayısını aşarsa mevcut adliye sayısıyla sınırlanır.
+    """
+    Case = app_module.Case
+    by_courthouse = {}
+    for case in app_module.db.session.execute(
+        select(Case.id, Case.city, Case.district, Case.court_office, Case.lat, Case.lon).order_by(Case.id)
+    ):
+        located = app_module.resolve_case_location(case)
+        if located and located['id'] not in by_courthouse:
+            by_courthouse[located['id']] = case.id
+            if len(by_courthouse) >= max(sizes):
+                break
+    ids = list(by_courthouse.values())
+    return {size: ids[:size] for size in sizes}
+
+
+def build_benchmarks(app_module, args, router, workdir):
+    """{ad: (run, setup, ek_bilgi)} ölçüm listesi."""
+    app, db = app_module.app, app_module.db
+    client = app.test_client()
+    benchmarks = {}
+
+    def cold_caches():
+        app_module.route_leg_cache.clear()
+        db.session.execute(delete(app_module.RouteLeg))
+        db.session.commit()
+        app_module.plan_cache.clear()
+
+    selections = plan_selections(app_module, args.stops)
+    for size, ids in selections.items():
+        benchmarks[f'plan_stops_{size}'] = (
+            lambda ids=ids: app_module.calculate_route(ids, START_CITY, START_DATE, 'auto'),
+            cold_caches,
+            {'stops': len(ids)},
+        )
+
+    cached_ids = selections[min(args.stops)]
+
+    def plan_cached():
+        return app_module.calculate_route(cached_ids, START_CITY, START_DATE, 'auto')
+
+    # setup planı önbelleğe alır; ölçülen çağrı önbellekten dönmelidir
+    benchmarks['plan_cache_hit'] = (lambda: _expect(plan_cached()['cached'], 'plan önbellekte değil'),
+                                    plan_cached, {'stops': len(cached_ids)})
+
+    # Pazartesi oturumu: örtüşen seçimler, farklı başlangıç şehirleri ve haftalar; bacaklar tek matriste
+    batch_ids = selections[max(args.stops)]
+    window = max(len(batch_ids) // 2, 1)
+    batch_specs = [
+        app_module.plan_params(batch_ids[offset:offset + window], city, week)
+        for offset, city in enumerate(BATCH_CITIES)
+        for week in BATCH_WEEKS
+    ]
+    benchmarks['plan_batch'] = (lambda: app_module.calculate_batch(batch_specs), cold_caches,
+                                {'plans': len(batch_specs), 'stops': len(batch_ids)})
+
+    def get(url):
+        return lambda: _expect(client.get(url).status_code == 200, url)
+
+    benchmarks['dashboard'] = (get('/'), None, {})
+    benchmarks['dashboard_city_filter'] = (get('/?city=İstanbul'), None, {})
+    benchmarks['search'] = (get('/?search=Yılmaz'), None, {})
+    benchmarks['search_no_match'] = (get('/?search=bulunmayanad'), None, {})
+    benchmarks['stats_refresh'] = (app_module.case_stats.refresh, None, {})
+
+    def export(fmt):
+        def run():
+            response = client.get(f'/api/export_excel?format={fmt}')
+            _expect(response.status_code == 200 and len(response.get_data()) > 0, fmt)
+        return run
+
+    benchmarks['export_csv'] = (export('csv'), None, {})
+    benchmarks['export_xlsx'] = (export('xlsx'), None, {})
+
+    Case = app_module.Case
+    last_id = db.session.execute(select(func.max(Case.id))).scalar() or 0
+
+    def drop_imported():
+        db.session.execute(delete(Case).where(Case.id > last_id))
+        db.session.commit()
+        app_module.case_stats.invalidate()
+
+    for fmt, writer in (('csv', write_csv), ('xlsx', write_xlsx)):
+        path = os.path.join(workdir, f'import.{fmt}')
+        writer(path, args.import_rows, seed=args.seed + 1, first_no=args.cases + 1)
+        with open(path, 'rb') as f:
+            payload = f.read()
+
+        def run(fmt=fmt, payload=payload):
+            response = client.post(
+                '/api/upload_excel?format=json',
+                data={'file': (io.BytesIO(payload), f'import.{fmt}')},
+                content_type='multipart/form-data',
+            )
+            _expect(response.status_code == 202, response.status_code)
+            job = response.get_json()
+            app_module.wait_for_job(job['job_id'], timeout=600)
+            report = client.get(job['result_url']).get_json()
+            _expect(report.get('inserted') == args.import_rows, report)
+
+        benchmarks[f'import_{fmt}'] = (run, drop_imported, {'rows': args.import_rows})
+
+    return benchmarks
+
+
+def _expect(condition, detail=None):
+    if not condition:
+        raise AssertionError(f"Ölçüm beklenmeyen sonuç verdi: {detail}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', type=int, default=10000, help='Üretilecek dosya sayısı (1k-1M)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stops', default='5,25,50,100,200', help='Rota planı durak sayıları')
+    parser.add_argument('--latency', type=float, default=0.02, help='Sahte yönlendiricinin istek başı gecikmesi (sn)')
+    parser.add_argument('--import-rows', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', help='Yalnızca bu ölçümler (virgülle ayrılmış)')
+    parser.add_argument('--output', help='Sonuçların yazılacağı JSON dosyası')
+    parser.add_argument('--baseline', help='Karşılaştırılacak önceki sonuç dosyası')
+    parser.add_argument('--threshold', type=float, default=0.25, help='İzin verilen yavaşlama oranı')
+    args = parser.parse_args(argv)
+    args.stops = sorted({int(s) for s in args.stops.split(',')})
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Uygulama DATABASE_URL'yi içe aktarılırken okur
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        os.environ['IMPORT_SPOOL_DIR'] = workdir
+        import app as app_module
+
+        router = FakeRouter(latency=args.latency, max_workers=app_module.app.config['ROUTING_MAX_WORKERS'])
+        app_module.routing_client = router
+
+        with app_module.app.app_context():
+            app_module.db.create_all()
+            load_s = load_cases(app_module.db, app_module.Case, args.cases, seed=args.seed, gazetteer=app_module.gazetteer)
+            print(f"{args.cases} dosya {load_s:.1f} sn'de yüklendi")
+
+            benchmarks = build_benchmarks(app_module, args, router, workdir)
+            if args.only:
+                wanted = set(args.only.split(','))
+                benchmarks = {name: b for name, b in benchmarks.items() if name in wanted}
+
+            results = {}
+            for name, (run, setup, extra) in benchmarks.items():
+                requests_before = router.requests
+                results[name] = dict(measure(run, args.repeat, setup), **extra)
+                if router.requests != requests_before:
+                    results[name]['router_requests'] = (router.requests - requests_before) // (args.repeat + 1)
+                print(f"{name:>22}: {results[name]['median_ms']:10.2f} ms (min {results[name]['min_ms']:.2f})")
+
+    report = {
+        'meta': {
+            'cases': args.cases, 'seed': args.seed, 'latency': args.latency, 'import_rows': args.import_rows,
+            'repeat': args.repeat, 'python': platform.python_version(), 'machine': platform.machine(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        changed = [k for k in ('cases', 'seed', 'latency', 'import_rows') if baseline['meta'].get(k) != report['meta'][k]]
+        if changed:
+            print(f"Uyarı: taban çizgisi farklı parametrelerle ölçülmüş ({', '.join(changed)})")
+        regressions = compare(results, baseline['results'], args.threshold)
+        for name, base_ms, current_ms, ratio in regressions:
+            print(f"GERİLEME {name}: {base_ms:.2f} ms -> {current_ms:.2f} ms (x{ratio})")
+        if regressions:
+            sys.exit(1)
+        print(f"Gerileme yok (eşik %{args.threshold * 100:.0f})")
+    return report
+
+
+if __name__ == '__main__':
+    main()
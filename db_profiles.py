@@ -0,0 +1,96 @@
+"""Veritabanı bağlantı profilleri.
+
+Her profil `SQLALCHEMY_ENGINE_OPTIONS` için uygun havuz ve sürücü
+ayarlarını üretir:
+
+- direct: PostgreSQL'e doğrudan bağlantı (ör. Docker Compose, Supabase 5432).
+  Uygulama tarafında kalıcı bir havuz tutulur.
+- pooler: Supabase transaction pooler / PgBouncer transaction modu (6543).
+  Havuzlamayı pooler yaptığından uygulama havuzu küçük tutulur, boşta
+  kapanan bağlantılar için her kullanımda yoklama (pre-ping) ve kısa geri
+  dönüşüm süresi kullanılır; sunucu tarafı hazır ifadeler (prepared
+  statement) kapatılır, çünkü transaction modunda ardışık sorgular farklı
+  sunucu bağlantılarına düşebilir.
+- sqlite-local: yerel SQLite dosyası; WAL günlüğü ve eşzamanlı okuma için
+  pragma ayarları.
+
+Sayısal değerler ortam değişkenleriyle (DB_POOL_SIZE, DB_MAX_OVERFLOW,
+DB_POOL_RECYCLE, DB_POOL_TIMEOUT) ezilebilir.
+"""
+import sqlite3
+
+from sqlalchemy.engine import make_url
+
+PROFILES = ('direct', 'pooler', 'sqlite-local')
+
+# Supabase/PgBouncer transaction pooler portu
+POOLER_PORT = 6543
+
+_DEFAULTS = {
+    'direct': {'pool_size': 5, 'max_overflow': 10, 'pool_recycle': 1800, 'pool_timeout': 30},
+    'pooler': {'pool_size': 2, 'max_overflow': 5, 'pool_recycle': 300, 'pool_timeout': 30},
+}
+
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', '5000'),
+    ('cache_size', '-20000'),
+    ('temp_store', 'MEMORY'),
+)
+
+
+def detect_profile(url):
+    """Bağlantı adresinden profil tahmini: sqlite, pooler portu/adresi veya doğrudan."""
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite':
+        return 'sqlite-local'
+    if url.port == POOLER_PORT or 'pooler' in (url.host or ''):
+        return 'pooler'
+    return 'direct'
+
+
+def engine_options(profile, url, env=None):
+    """Profil için `create_engine` argümanları (SQLALCHEMY_ENGINE_OPTIONS)."""
+    if profile not in PROFILES:
+        raise ValueError(f"Bilinmeyen veritabanı profili: {profile} (seçenekler: {', '.join(PROFILES)})")
+    env = env or {}
+    url = make_url(url)
+
+    if profile == 'sqlite-local':
+        if url.get_backend_name() != 'sqlite':
+            raise ValueError("sqlite-local profili yalnızca sqlite:// adresleriyle kullanılabilir")
+        # Bellek içi veritabanında havuz Flask-SQLAlchemy tarafından ayarlanır
+        return {'connect_args': {'timeout': 30}}
+
+    defaults = _DEFAULTS[profile]
+    options = {
+        'pool_pre_ping': True,
+        'pool_size': int(env.get('DB_POOL_SIZE', defaults['pool_size'])),
+        'max_overflow': int(env.get('DB_MAX_OVERFLOW', defaults['max_overflow'])),
+        'pool_recycle': int(env.get('DB_POOL_RECYCLE', defaults['pool_recycle'])),
+        'pool_timeout': int(env.get('DB_POOL_TIMEOUT', defaults['pool_timeout'])),
+        # Uzun süre boşta kalan bağlantılar yerine son kullanılan bağlantıyı tercih et
+        'pool_use_lifo': True,
+    }
+    if profile == 'pooler':
+        driver = url.get_driver_name()
+        if driver == 'psycopg':
+            # psycopg 3 sorguları belli sayıda tekrardan sonra sunucuda hazırlar
+            options['connect_args'] = {'prepare_threshold': None}
+        elif driver == 'asyncpg':
+            options['connect_args'] = {'statement_cache_size': 0, 'prepared_statement_cache_size': 0}
+        # psycopg2 sunucu tarafı hazır ifade kullanmaz
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection):
+    """Yeni SQLite bağlantısına WAL ve performans pragmalarını uygular."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
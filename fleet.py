@@ -0,0 +1,147 @@
+"""Çok avukatlı planlama: durakların avukatlara bölünmesi ve alt turların çözümü.
+
+Her avukatın bir ev ofisi ve günlük durak kapasitesi vardır. `partition`,
+takip eden avukatı (`follower_lawyer`) belli olmayan durakları kapasiteyle
+orantılı kotalara göre avukatlara dağıtan kapasiteli bir k-medoids'tir:
+medoidler ofislerden başlar, her turda duraklar "pişmanlık" sırasıyla
+(en yakın ile ikinci en yakın medoid arasındaki fark büyük olan önce) kotası
+dolmamış en yakın medoide atanır, ardından her kümenin medoidi üyeleriyle
+ofisine toplam uzaklığı en küçük noktaya taşınır. Uzaklıklar kuş uçuşu
+(haversine) ve tek bir NumPy matrisiyle hesaplanır; yönlendirme arka ucuna
+yalnızca bölme bittikten sonra gidilir.
+
+`solve_tours`, her avukatın alt turunu (`solver.solve`) bir süreç havuzunda
+paralel çözer; çözücü saf NumPy olduğundan süreçler arasında yalnızca
+matrisler taşınır.
+"""
+import json
+
+import numpy as np
+
+import solver
+from routing import haversine_matrix
+
+# İstekte kapasite verilmeyen avukatların günlük durak sayısı
+DEFAULT_DAILY_STOPS = 4
+
+
+def parse_lawyers(value, default_capacity=DEFAULT_DAILY_STOPS):
+    """'[{"name": "Av. Ali Veli", "office": "Bursa", "capacity": 4}, ...]' → sözlük listesi.
+
+    `value` JSON metni veya liste olabilir; `capacity` (günlük durak sayısı)
+    verilmezse `default_capacity` kullanılır. Geçersiz girdide ValueError.
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValueError("Avukat listesi geçerli bir JSON değil")
+    if not isinstance(value, list) or not value:
+        raise ValueError("En az bir avukat verilmeli")
+
+    lawyers, seen = [], set()
+    for item in value:
+        if not isinstance(item, dict) or not str(item.get('name') or '').strip() or not str(item.get('office') or '').strip():
+            raise ValueError("Her avukat için 'name' ve 'office' (ofis şehri) gerekli")
+        name = str(item['name']).strip()
+        if lawyer_key(name) in seen:
+            raise ValueError(f"Avukat birden fazla verilmiş: {name}")
+        seen.add(lawyer_key(name))
+        try:
+            capacity = int(default_capacity if item.get('capacity') in (None, '') else item['capacity'])
+        except (TypeError, ValueError):
+            raise ValueError(f"Geçersiz kapasite: {item.get('capacity')!r}")
+        if capacity <= 0:
+            raise ValueError(f"Kapasite pozitif olmalı: {name}")
+        lawyers.append({'name': name, 'office': str(item['office']).strip(), 'capacity': capacity})
+    return lawyers
+
+
+def lawyer_key(name):
+    """Avukat adlarını büyük/küçük harf ve boşluk farkı gözetmeden eşleştirmek için."""
+    return ' '.join(str(name or '').split()).casefold()
+
+
+def _quotas(free, fixed, capacities, room):
+    """Kapasiteyle orantılı hedeften sabit yükü düşen, kalan yeri aşmayan kotalar."""
+    total = free + fixed.sum()
+    share = total * capacities / capacities.sum()
+    return np.minimum(np.maximum(np.ceil(share - fixed), 0), room).astype(int)
+
+
+def _assign(cost, quotas, room):
+    """Pişmanlık sırasıyla kotası dolmamış en ucuz kümeye atama; yer yoksa -1."""
+    n, k = cost.shape
+    labels = np.full(n, -1, dtype=int)
+    if n == 0:
+        return labels
+    ranked = np.argsort(cost, axis=1)
+    if k > 1:
+        best_two = np.take_along_axis(cost, ranked[:, :2], axis=1)
+        regret = best_two[:, 1] - best_two[:, 0]
+    else:
+        regret = np.zeros(n)
+    counts = np.zeros(k, dtype=int)
+    for i in np.argsort(-regret, kind='stable'):
+        # Önce kapasite payı (kota), o dolduysa kalan yere kadar en yakın küme
+        for bound in (quotas, room):
+            open_ = ranked[i][counts[ranked[i]] < bound[ranked[i]]]
+            if open_.size:
+                labels[i] = open_[0]
+                counts[open_[0]] += 1
+                break
+    return labels
+
+
+def partition(points, offices, capacities, limits=None, fixed=None, max_iter=20):
+    """Serbest durakları avukatlara böler.
+
+    `points` (n, 2) ve `offices` (k, 2) enlem/boylam dizileri; `capacities`
+    avukatların günlük kapasitesi (yalnızca oranı önemlidir), `limits` en
+    fazla alabilecekleri durak sayısı, `fixed` `follower_lawyer` ile zaten
+    atanmış durak sayılarıdır. Dönüş: her durak için avukat sırası; hiçbir
+    avukatta yer kalmadıysa -1.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    offices = np.asarray(offices, dtype=float).reshape(-1, 2)
+    n, k = len(points), len(offices)
+    capacities = np.asarray(capacities, dtype=float)
+    limits = np.full(k, n, dtype=int) if limits is None else np.asarray(limits, dtype=int)
+    fixed = np.zeros(k, dtype=int) if fixed is None else np.asarray(fixed, dtype=int)
+    if n == 0:
+        return np.zeros(0, dtype=int)
+
+    # 0..k-1 ofisler, k..k+n-1 duraklar
+    coords = np.vstack([offices, points])
+    dist = haversine_matrix(coords[:, 0], coords[:, 1])
+    room = np.maximum(limits - fixed, 0)
+    quotas = _quotas(n, fixed, capacities, room)
+
+    medoids = np.arange(k)
+    labels = None
+    for _ in range(max_iter):
+        new_labels = _assign(dist[k:, medoids], quotas, room)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(k):
+            members = k + np.flatnonzero(labels == c)
+            if members.size == 0:
+                medoids[c] = c
+                continue
+            # Aday medoidler: üyeler ve ofisin kendisi; tur ofisten başladığından ofise uzaklık da sayılır
+            candidates = np.concatenate(([c], members))
+            medoids[c] = candidates[np.argmin(dist[np.ix_(candidates, members)].sum(axis=1) + dist[candidates, c])]
+    return labels
+
+
+def solve_tours(matrices, method='auto', time_budget=0.5, executor=None):
+    """Her süre matrisi için `solver.solve` sonucunu (sıra, yöntem) aynı sırayla döner.
+
+    `executor` (ör. ProcessPoolExecutor) verilirse turlar paralel çözülür;
+    tek bir tur için havuz kullanılmaz.
+    """
+    if executor is None or len(matrices) < 2:
+        return [solver.solve(dur, method, time_budget) for dur in matrices]
+    futures = [executor.submit(solver.solve, dur, method, time_budget) for dur in matrices]
+    return [future.result() for future in futures]
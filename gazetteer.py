@@ -0,0 +1,256 @@
+"""Yerel adliye ve il merkezi yer adı sözlüğü (gazetteer).
+
+`data/gazetteer.csv` iki tür satır içerir:
+
+- province: 81 il merkezinin koordinatı (ve "Afyon", "Antep" gibi kısa adlar).
+- courthouse: adliye binası; `districts` yargı çevresindeki ilçeleri,
+  `aliases` mahkeme adlarında geçen ek adları ("Anadolu", "Çağlayan") tutar.
+
+Ayrı bir binası listelenmemiş illerde il merkezinde "<İl> Adliyesi" adında
+bir adliye varsayılır. Eşleştirme sırası: mahkeme/daire adı
+("Kartal 3. Asliye Hukuk" → İstanbul Anadolu Adliyesi), ilçe (yargı
+çevresi), il merkezi adliyesi. Anahtarlar `search.tr_fold` ile katlanır;
+"ISTANBUL", "İstanbul" ve "istanbul" aynıdır.
+
+Koordinattan en yakın adliye için adliyeler, birim küre üzerindeki 3B
+vektörlere çevrilip dizi tabanlı statik bir KD-ağacına yerleştirilir;
+sorgu ağ tabanlı bir geocoder'a gitmeden mikro saniyeler içinde yanıtlanır.
+"""
+import csv
+import heapq
+import math
+import os
+import re
+
+import numpy as np
+
+from routing import EARTH_RADIUS_KM
+from search import tr_fold
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gazetteer.csv')
+
+# İl merkezi ilçesinin genel adı; her ilde merkez adliyeye eşlenir
+CENTRAL_DISTRICT = 'merkez'
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(value):
+    """Eşleştirme anahtarı: katlanmış, noktalama yerine tek boşluk."""
+    if value is None:
+        return ''
+    return _NON_WORD.sub(' ', tr_fold(value)).strip()
+
+
+def _unit_vectors(lats, lons):
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lon = np.radians(np.asarray(lons, dtype=float))
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def _chord_to_km(chord_sq):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_sq) / 2))
+
+
+class KDTree:
+    """Birim küre üzerindeki noktalar için örtük (implicit), statik KD-ağacı.
+
+    Ağaç ayrı düğüm nesneleri tutmaz: noktalar, her [lo, hi) aralığının
+    ortadaki elemanı o alt ağacın kökü olacak şekilde tek bir diziye
+    sıralanır; `axes[mid]` o düğümün bölme eksenidir. Kiriş (chord) mesafesi
+    büyük çember mesafesiyle aynı sırayı verdiğinden en yakın komşu kesindir.
+    """
+
+    def __init__(self, lats, lons):
+        xyz = _unit_vectors(lats, lons)
+        n = len(xyz)
+        order = np.arange(n)
+        axes = np.zeros(n, dtype=np.int8)
+        stack = [(0, n)]
+        while stack:
+            lo, hi = stack.pop()
+            if hi <= lo:
+                continue
+            segment = order[lo:hi]
+            points = xyz[segment]
+            axis = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+            order[lo:hi] = segment[np.argsort(points[:, axis], kind='stable')]
+            mid = (lo + hi) // 2
+            axes[mid] = axis
+            stack.append((lo, mid))
+            stack.append((mid + 1, hi))
+
+        # ağaçtaki konum -> girdi sırası
+        self.index = order
+        self.points = xyz[order]
+        self.axes = axes
+        # Sorgu döngüsü Python skalerleriyle daha hızlı çalışır
+        self._points = self.points.tolist()
+        self._axes = axes.tolist()
+
+    def __len__(self):
+        return len(self.index)
+
+    def nearest(self, lat, lon):
+        """En yakın noktanın (girdi sırası, km) çifti; ağaç boşsa (None, inf)."""
+        found = self.nearest_k(lat, lon, 1)
+        return found[0] if found else (None, float('inf'))
+
+    def nearest_k(self, lat, lon, k):
+        """En yakın `k` noktanın yakından uzağa [(girdi sırası, km), ...] listesi."""
+        if not len(self.index) or k < 1:
+            return []
+        phi, lam = math.radians(lat), math.radians(lon)
+        q = (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+        points, axes = self._points, self._axes
+        # (-uzaklık², konum) en kötü aday başta olacak şekilde en fazla k elemanlı yığın
+        found = []
+        stack = [(0, len(points), 0.0)]
+        while stack:
+            lo, hi, bound = stack.pop()
+            worst = -found[0][0] if len(found) == k else float('inf')
+            if hi <= lo or bound >= worst:
+                continue
+            mid = (lo + hi) // 2
+            p = points[mid]
+            d2 = (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2
+            if len(found) < k:
+                heapq.heappush(found, (-d2, mid))
+            elif d2 < worst:
+                heapq.heapreplace(found, (-d2, mid))
+            axis = axes[mid]
+            diff = q[axis] - p[axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            # Uzak taraf, bölme düzlemine olan uzaklık en kötü adaydan küçükse incelenir
+            stack.append((far[0], far[1], diff * diff))
+            stack.append((near[0], near[1], 0.0))
+        return [(int(self.index[mid]), _chord_to_km(-neg_d2)) for neg_d2, mid in sorted(found, reverse=True)]
+
+
+class Gazetteer:
+    """İl, ilçe ve mahkeme adından adliye koordinatı çözümleyici."""
+
+    def __init__(self, rows):
+        provinces = {}
+        courthouses = []
+        for row in rows:
+            kind = (row.get('kind') or '').strip()
+            city = (row.get('city') or '').strip()
+            lat, lon = float(row['lat']), float(row['lon'])
+            if kind == 'province':
+                provinces[city] = {'lat': lat, 'lon': lon, 'aliases': _split(row.get('aliases'))}
+            elif kind == 'courthouse':
+                courthouses.append({
+                    'name': row['name'].strip(), 'city': city, 'lat': lat, 'lon': lon,
+                    'districts': _split(row.get('districts')), 'aliases': _split(row.get('aliases')),
+                })
+            else:
+                raise ValueError(f"Bilinmeyen gazetteer satırı türü: {kind!r}")
+
+        # Binası listelenmemiş illerde il merkezinde varsayılan adliye
+        named = {c['name'] for c in courthouses}
+        for city, province in provinces.items():
+            if f'{city} Adliyesi' not in named:
+                courthouses.append({
+                    'name': f'{city} Adliyesi', 'city': city, 'lat': province['lat'], 'lon': province['lon'],
+                    'districts': [], 'aliases': [],
+                })
+
+        self.provinces = provinces
+        self.courthouses = [
+            {'id': i, 'name': c['name'], 'city': c['city'], 'lat': c['lat'], 'lon': c['lon']}
+            for i, c in enumerate(courthouses)
+        ]
+
+        self._cities = {}
+        for city, province in provinces.items():
+            for name in [city] + province['aliases']:
+                self._cities[normalize(name)] = city
+
+        self._seats = {}
+        self._districts = {}
+        # ilk kelime -> [(takma ad, adliye id), ...] en uzun takma ad önce
+        self._offices = {}
+        for c, record in zip(courthouses, self.courthouses):
+            city_key = normalize(c['city'])
+            if c['name'] == f"{c['city']} Adliyesi":
+                self._seats[city_key] = record['id']
+                self._districts[(city_key, CENTRAL_DISTRICT)] = record['id']
+            for district in c['districts']:
+                self._districts[(city_key, normalize(district))] = record['id']
+            stem = c['name'][:-len(' Adliyesi')] if c['name'].endswith(' Adliyesi') else c['name']
+            for alias in sorted({normalize(a) for a in [stem] + c['districts'] + c['aliases']}):
+                if alias:
+                    self._offices.setdefault(alias.split(' ', 1)[0], []).append((alias, record['id']))
+        for candidates in self._offices.values():
+            candidates.sort(key=lambda item: -len(item[0]))
+
+        self.tree = KDTree([c['lat'] for c in self.courthouses], [c['lon'] for c in self.courthouses])
+
+    @classmethod
+    def load(cls, path=DATA_PATH):
+        with open(path, newline='', encoding='utf-8') as f:
+            return cls(csv.DictReader(f))
+
+    def __len__(self):
+        return len(self.courthouses)
+
+    def city_coords(self):
+        """{il: {'lat', 'lon'}} il merkezi koordinatları."""
+        return {city: {'lat': p['lat'], 'lon': p['lon']} for city, p in self.provinces.items()}
+
+    def canonical_city(self, city):
+        """Yazımı ne olursa olsun ilin kayıtlı adı ("ISTANBUL" → "İstanbul"); bilinmiyorsa None."""
+        return self._cities.get(normalize(city))
+
+    def _result(self, courthouse_id, match, distance_km=None):
+        result = dict(self.courthouses[courthouse_id], match=match)
+        if distance_km is not None:
+            result['distance_km'] = distance_km
+        return result
+
+    def _match_office(self, office, city_key):
+        key = normalize(office)
+        if not key:
+            return None
+        matches = [
+            courthouse_id
+            for alias, courthouse_id in self._offices.get(key.split(' ', 1)[0], ())
+            if key == alias or key.startswith(alias + ' ')
+        ]
+        if city_key is not None:
+            in_city = [i for i in matches if normalize(self.courthouses[i]['city']) == city_key]
+            return in_city[0] if in_city else None
+        # İl bilinmiyorsa yalnızca tek anlamlı eşleşme kabul edilir
+        return matches[0] if len({self.courthouses[i]['city'] for i in matches}) == 1 else None
+
+    def resolve(self, city, district=None, court_office=None):
+        """Dosyanın görüleceği adliye.
+
+        Dönüş: {'id', 'name', 'city', 'lat', 'lon', 'match'} ya da hiçbir
+        alan tanınmazsa None. `match` eşleşmenin kaynağıdır:
+        'court_office', 'district' veya 'city' (il merkezi adliyesi).
+        """
+        canonical = self.canonical_city(city)
+        city_key = normalize(canonical) if canonical else None
+
+        courthouse_id = self._match_office(court_office, city_key)
+        if courthouse_id is not None:
+            return self._result(courthouse_id, 'court_office')
+        if city_key is None:
+            return None
+        courthouse_id = self._districts.get((city_key, normalize(district)))
+        if courthouse_id is not None:
+            return self._result(courthouse_id, 'district')
+        return self._result(self._seats[city_key], 'city')
+
+    def nearest(self, lat, lon, max_km=None):
+        """Koordinata en yakın adliye (`distance_km` ile); `max_km` aşılırsa None."""
+        courthouse_id, distance_km = self.tree.nearest(lat, lon)
+        if courthouse_id is None or (max_km is not None and distance_km > max_km):
+            return None
+        return self._result(courthouse_id, 'nearest', distance_km)
+
+
+def _split(value):
+    return [part.strip() for part in (value or '').split('|') if part.strip()]
@@ -0,0 +1,48 @@
+"""gunicorn ayarları; tümü ortam değişkenleriyle değiştirilebilir.
+
+Varsayılan model `gthread`: her worker süreci `GUNICORN_THREADS` iş
+parçacığıyla istek karşılar. Rota planlama ve içe aktarma işleri zaten
+worker içindeki arka plan havuzunda koştuğundan istek iş parçacıkları
+kısa süreli kalır; az sayıda süreç + birkaç iş parçacığı bellek açısından
+çok sayıda süreçten daha ucuzdur.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Süreç sayısı: WEB_CONCURRENCY verilmezse çekirdek sayısı (en fazla 4)
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count(), 4)))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Uzun Excel yüklemeleri diske alınırken isteğin kesilmemesi için
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Bellek sızıntılarına karşı worker'lar belirli istek sayısından sonra yenilenir
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Uygulamayı ana süreçte yükleyip fork etmek açılışı hızlandırır ve
+# copy-on-write ile worker başına belleği azaltır
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    """Bekleyen migrasyonları worker'lar açılmadan önce bir kez uygular."""
+    if os.environ.get('RUN_MIGRATIONS', '1') == '1':
+        from app import init_db
+        init_db()
+
+
+def post_fork(server, worker):
+    """Ana süreçte açılmış veritabanı bağlantıları worker'lar arasında paylaşılmamalı."""
+    from app import app, db
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,202 @@
+"""Excel/CSV dosya içe aktarımı için parça parça okuma, vektörize temizleme ve doğrulama.
+
+Dosya bir kerede belleğe alınmaz: `iter_frames` xlsx dosyalarını openpyxl'in
+salt okunur modunda, CSV dosyalarını pandas'ın parça okuyucusuyla sabit
+boyutlu DataFrame'ler halinde üretir. Her parçada satırlar tek tek değil
+sütun sütun işlenir: metin alanları kırpılır, boş hücreler NULL'a çevrilir,
+tarih ve koordinatlar toplu dönüştürülür. Her satır için bir sonuç üretilir:
+veritabanına yazılacak kayıt ya da neden reddedildiği/atlandığı.
+"""
+from itertools import islice
+
+import pandas as pd
+
+TEXT_COLUMNS = (
+    'case_no', 'client', 'opponent', 'city', 'district', 'court_office', 'case_type',
+    'status', 'priority', 'follower_lawyer', 'authorized_lawyer', 'description',
+)
+REQUIRED_COLUMNS = ('case_no', 'city')
+# Adliye koordinatının çözümlendiği sütunlar
+LOCATION_COLUMNS = ('city', 'district', 'court_office')
+DEFAULTS = {'status': 'Aktif', 'priority': 'Normal'}
+
+# Satır numarası Excel'deki gibi: 1. satır başlık, veri 2. satırdan başlar
+FIRST_DATA_ROW = 2
+
+SKIPPED = 'skipped'
+REJECTED = 'rejected'
+
+
+FORMATS = ('xlsx', 'csv')
+
+
+def file_format(filename):
+    """Dosya uzantısından biçim ('xlsx'/'csv'); desteklenmiyorsa None."""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return extension if extension in FORMATS else None
+
+
+def read_header(path, fmt):
+    """Dosyanın başlık satırı (sütun adları)."""
+    return next(iter_frames(path, fmt, chunk_rows=1, with_empty=True)).columns.tolist()
+
+
+def count_rows(path, fmt, scan=True):
+    """Başlık hariç veri satırı sayısı.
+
+    xlsx dosyalarında kayıtlı boyut bilgisi kullanılır; boyut bilgisi yoksa
+    (bazı araçlar yazmaz) `scan` ise dosya satır satır taranır, değilse None
+    döner. CSV dosyaları her zaman satırlar belleğe alınmadan sayılır.
+    """
+    if fmt == 'csv':
+        import csv
+
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        sheet.calculate_dimension()
+        return max((sheet.max_row or 1) - 1, 0)
+    except ValueError:
+        if not scan:
+            return None
+        return sum(1 for _ in islice(sheet.iter_rows(values_only=True), 1, None))
+    finally:
+        workbook.close()
+
+
+def iter_frames(path, fmt, chunk_rows=1000, with_empty=False):
+    """Dosyayı `chunk_rows` satırlık DataFrame parçaları halinde okur.
+
+    Tüm hücreler ham (object) olarak gelir; temizleme `clean_frame`'e bırakılır.
+    Tamamen boş satırlar atlanmaz, satır numaraları dosyayla uyumlu kalır.
+    """
+    if fmt == 'csv':
+        reader = pd.read_csv(
+            path, chunksize=chunk_rows, dtype=object, encoding='utf-8-sig',
+            skip_blank_lines=False,
+        )
+        emitted = False
+        with reader:
+            for frame in reader:
+                emitted = True
+                yield frame
+        if with_empty and not emitted:
+            yield pd.read_csv(path, nrows=0, dtype=object, encoding='utf-8-sig')
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        columns = [str(c).strip() if c is not None else f'_{i}' for i, c in enumerate(header)]
+        emitted = False
+        while True:
+            chunk = list(islice(rows, chunk_rows))
+            if not chunk:
+                break
+            emitted = True
+            yield pd.DataFrame([row[:len(columns)] for row in chunk], columns=columns, dtype=object)
+        if with_empty and not emitted:
+            yield pd.DataFrame(columns=columns, dtype=object)
+    finally:
+        workbook.close()
+
+
+def missing_columns(columns):
+    """Dosyada bulunmayan zorunlu sütunlar."""
+    present = {str(c).strip() for c in columns}
+    return [c for c in REQUIRED_COLUMNS if c not in present]
+
+
+def clean_frame(df, locate, max_lengths=None, first_row=FIRST_DATA_ROW):
+    """Ham tabloyu Case kayıtlarına dönüştürür.
+
+    Dönüş: (kayıtlar, sorunlar). `kayıtlar` Case sütun adlarıyla bir
+    DataFrame'dir ve `row` sütununda kaynak satır numarasını taşır;
+    `sorunlar` [{'row', 'case_no', 'status', 'reason'}] listesidir.
+    `locate(il, ilçe, mahkeme)` {'lat', 'lon'} ya da None döner ve her farklı
+    üçlü için bir kez çağrılır.
+    `max_lengths` {sütun: en_fazla_karakter} verilirse uzun değerler reddedilir.
+    """
+    df = df.rename(columns=lambda c: str(c).strip())
+    rows = pd.Series(range(first_row, first_row + len(df)), index=df.index)
+
+    # Tamamen boş satırlar (ör. tablonun sonundaki biçimli boş satırlar) raporlanmadan atlanır
+    cells = df.astype('string')
+    blank = (cells.isna() | cells.apply(lambda col: col.str.strip() == '')).all(axis=1)
+    df = df[~blank]
+    out = pd.DataFrame(index=df.index)
+    out['row'] = rows[~blank]
+
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            values = df[col].astype('string').str.strip()
+            out[col] = values.mask(values == '')
+        else:
+            out[col] = pd.Series(pd.NA, index=df.index, dtype='string')
+    for col, default in DEFAULTS.items():
+        out[col] = out[col].fillna(default)
+
+    reason = pd.Series(pd.NA, index=df.index, dtype='string')
+
+    def reject(mask, text):
+        # İlk bulunan neden korunur
+        reason.loc[mask & reason.isna()] = text
+
+    for col in REQUIRED_COLUMNS:
+        reject(out[col].isna(), f"'{col}' boş")
+    for col, limit in (max_lengths or {}).items():
+        if limit and col in out:
+            reject(out[col].str.len().fillna(0) > limit, f"'{col}' en fazla {limit} karakter olabilir")
+
+    if 'due_date' in df.columns:
+        raw = df['due_date']
+        parsed = pd.to_datetime(raw, errors='coerce')
+        blank = raw.isna() | (raw.astype('string').str.strip() == '')
+        reject(parsed.isna() & ~blank, "'due_date' tarih olarak okunamadı")
+        out['due_date'] = parsed.dt.date.astype(object).where(parsed.notna(), None)
+    else:
+        out['due_date'] = None
+
+    # Dosyadaki koordinatlar öncelikli, yoksa adliye (mahkeme/ilçe/il merkezi)
+    lat = pd.to_numeric(df['lat'], errors='coerce') if 'lat' in df.columns else pd.Series(float('nan'), index=df.index)
+    lon = pd.to_numeric(df['lon'], errors='coerce') if 'lon' in df.columns else pd.Series(float('nan'), index=df.index)
+    has_coords = lat.notna() & lon.notna()
+    place = out[list(LOCATION_COLUMNS)].astype(object).where(out[list(LOCATION_COLUMNS)].notna(), None)
+    keys = pd.Series(list(zip(*(place[c] for c in LOCATION_COLUMNS))), index=df.index, dtype=object)
+    located = {key: locate(*key) for key in keys[~has_coords].unique()}
+    out['lat'] = lat.where(has_coords, keys.map(lambda key: (located.get(key) or {}).get('lat', float('nan'))))
+    out['lon'] = lon.where(has_coords, keys.map(lambda key: (located.get(key) or {}).get('lon', float('nan'))))
+
+    valid = reason.isna()
+    duplicate = out['case_no'][valid].duplicated(keep='first').reindex(out.index, fill_value=False)
+
+    issues = [
+        {'row': int(r), 'case_no': _text(c), 'status': REJECTED, 'reason': str(why)}
+        for r, c, why in zip(out['row'][~valid], out['case_no'][~valid], reason[~valid])
+    ]
+    issues += [
+        {'row': int(r), 'case_no': _text(c), 'status': SKIPPED, 'reason': 'dosyada mükerrer dosya no'}
+        for r, c in zip(out['row'][duplicate], out['case_no'][duplicate])
+    ]
+
+    records = out[valid & ~duplicate]
+    return records, issues
+
+
+def to_rows(records):
+    """Temizlenmiş kayıtları `executemany` için sözlük listesine çevirir (NA -> None)."""
+    columns = [c for c in records.columns if c != 'row']
+    frame = records[columns].astype(object).where(records[columns].notna(), None)
+    return frame.to_dict('records')
+
+
+def _text(value):
+    return None if pd.isna(value) else str(value)
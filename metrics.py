@@ -0,0 +1,217 @@
+"""Süreç içi metrikler ve Prometheus metin biçimi (text exposition 0.0.4).
+
+Sayaç ve histogramlar etiket değerleri başına tek bir kilit altında
+güncellenir; bir gözlem bir `bisect` ve birkaç toplamadan ibarettir, bu
+yüzden kancalar üretimde açık bırakılabilir. Önbellek isabet oranı gibi
+başka yerde tutulan değerler `CallbackMetric` ile yalnızca kazıma (scrape)
+sırasında okunur.
+
+Değerler worker sürecine özeldir; gunicorn birden çok worker ile
+çalışırken her kazıma isteği yanıtlayan worker'ın sayılarını döner.
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Saniye cinsinden varsayılan gecikme sınırları
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Registry:
+    """Metriklerin kayıt sırasıyla tutulduğu ve birlikte yazıldığı küme."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metrik zaten kayıtlı: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Tüm metrikleri Prometheus metin biçiminde döner."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {_escape_help(metric.documentation)}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} etiketleri {self.labelnames} olmalı, verilen: {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        return list(zip(self.labelnames, key))
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Yalnızca artan sayaç."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1.0, **labels):
+        if amount < 0:
+            raise ValueError("Sayaç azaltılamaz")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+
+class Histogram(_Metric):
+    """Sabit sınırlı kovalara ayrılan gözlemler (`_bucket`, `_sum`, `_count`)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [kova sayıları (+Inf dahil), toplam, adet]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """`with` bloğunun süresini saniye olarak gözlemler."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels):
+        """{'count', 'sum'} özeti; gözlem yoksa sıfırlar."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return {'count': state[2], 'sum': state[1]} if state else {'count': 0, 'sum': 0.0}
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1], state[2])) for key, state in self._values.items())
+        for key, (counts, total, count) in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket', labels + [('le', bound)], cumulative
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, count
+
+
+class CallbackMetric(_Metric):
+    """Değerleri kazıma anında `fn()`'den okunan metrik.
+
+    `fn` {etiket_değerleri_demeti: değer} döner; None değerler atlanır.
+    """
+
+    def __init__(self, name, documentation, fn, labelnames=(), kind='gauge', registry=REGISTRY):
+        self.kind = kind
+        self._fn = fn
+        super().__init__(name, documentation, labelnames, registry)
+
+    def samples(self):
+        for key, value in sorted(self._fn().items()):
+            if value is not None:
+                yield self.name, self._labels(tuple(str(k) for k in key)), value
+
+
+class QueryTracker:
+    """İş parçacığı başına (istek boyunca) veritabanı sorgu sayısı ve süresi."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def start(self):
+        self._local.count = 0
+        self._local.seconds = 0.0
+        self._local.active = True
+
+    def record(self, seconds):
+        if getattr(self._local, 'active', False):
+            self._local.count += 1
+            self._local.seconds += seconds
+
+    def stop(self):
+        """(sorgu_sayısı, toplam_süre) döner ve izlemeyi kapatır; başlatılmadıysa None."""
+        if not getattr(self._local, 'active', False):
+            return None
+        self._local.active = False
+        return self._local.count, self._local.seconds
+
+
+def _escape_help(text):
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(_format_value(value) if name == "le" else value)}"'
+                          for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if math.isnan(value):
+            return 'NaN'
+        return repr(value)
+    return str(value)
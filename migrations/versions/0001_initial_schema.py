@@ -0,0 +1,91 @@
+"""İlk şema: cases, route_legs ve jobs tabloları
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:00:00
+
+Migrasyonlardan önce `db.create_all()` ile kurulmuş veritabanlarında
+tablolar zaten bulunabilir; yalnızca eksik olanlar oluşturulur.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+import search
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'cases' not in existing:
+        _create_cases()
+    if 'route_legs' not in existing:
+        _create_route_legs()
+    if 'jobs' not in existing:
+        _create_jobs()
+    search.ensure_search_index(op.get_bind(), 'cases')
+
+
+def _create_cases():
+    op.create_table(
+        'cases',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('case_no', sa.String(length=50), nullable=False),
+        sa.Column('client', sa.String(length=100), nullable=True),
+        sa.Column('opponent', sa.String(length=100), nullable=True),
+        sa.Column('city', sa.String(length=50), nullable=False),
+        sa.Column('district', sa.String(length=50), nullable=True),
+        sa.Column('court_office', sa.String(length=100), nullable=True),
+        sa.Column('case_type', sa.String(length=50), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        sa.Column('priority', sa.String(length=50), nullable=True),
+        sa.Column('follower_lawyer', sa.String(length=100), nullable=True),
+        sa.Column('authorized_lawyer', sa.String(length=100), nullable=True),
+        sa.Column('due_date', sa.Date(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('lat', sa.Float(), nullable=True),
+        sa.Column('lon', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def _create_route_legs():
+    op.create_table(
+        'route_legs',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('distance_km', sa.Float(), nullable=False),
+        sa.Column('duration_min', sa.Float(), nullable=False),
+        sa.Column('fetched_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def _create_jobs():
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('progress', sa.Float(), nullable=False),
+        sa.Column('message', sa.String(length=200), nullable=True),
+        sa.Column('params', sa.Text(), nullable=True),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    search.drop_search_index(op.get_bind(), 'cases')
+    op.drop_table('jobs')
+    op.drop_table('route_legs')
+    op.drop_table('cases')
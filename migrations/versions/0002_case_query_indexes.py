@@ -0,0 +1,47 @@
+"""cases tablosuna sorgu yollarına göre indeksler ve benzersiz dosya no
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:30:00
+
+- (created_at, id): dashboard sıralaması ve keyset sayfalama
+- (city, created_at, id): şehir filtreli dashboard
+- (status, created_at): rota sayfasındaki aktif dosya listesi
+- (priority): acil dosyalar
+- case_no (benzersiz): Excel yüklemesindeki mükerrer kontrolü
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT case_no, COUNT(*) FROM cases GROUP BY case_no HAVING COUNT(*) > 1 ORDER BY case_no"
+    )).all()
+    if duplicates:
+        listed = ', '.join(f"{case_no} ({count})" for case_no, count in duplicates[:20])
+        raise RuntimeError(
+            "Benzersiz dosya no indeksi oluşturulamadı; mükerrer kayıtları birleştirip "
+            f"migrasyonu tekrar çalıştırın: {listed}"
+        )
+
+    op.create_index('ix_cases_created_at_id', 'cases', ['created_at', 'id'])
+    op.create_index('ix_cases_city_created_at_id', 'cases', ['city', 'created_at', 'id'])
+    op.create_index('ix_cases_status_created_at', 'cases', ['status', 'created_at'])
+    op.create_index('ix_cases_priority', 'cases', ['priority'])
+    op.create_index('uq_cases_case_no', 'cases', ['case_no'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_cases_case_no', table_name='cases')
+    op.drop_index('ix_cases_priority', table_name='cases')
+    op.drop_index('ix_cases_status_created_at', table_name='cases')
+    op.drop_index('ix_cases_city_created_at_id', table_name='cases')
+    op.drop_index('ix_cases_created_at_id', table_name='cases')
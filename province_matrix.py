@@ -0,0 +1,154 @@
+"""Önceden hesaplanmış il merkezi / adliye mesafe-süre matrisi.
+
+Rota duraklarının neredeyse tamamı gazetteer'daki il merkezleri ve
+adliyelerdir. `flask build-province-matrix` bu noktalar arasındaki tüm
+bacakları bir kez hesaplayıp iki dosyaya yazar:
+
+- `province_matrix.npy`: (2, n, n) float32 dizi, [mesafe_km, süre_dk]
+- `province_matrix.json`: nokta adları, koordinatlar ve matrisi üreten arka uç
+
+Uygulama `.npy` dosyasını `np.load(mmap_mode='r')` ile açar; veri süreç
+belleğine kopyalanmaz, tüm worker'lar işletim sisteminin sayfa
+önbelleğindeki aynı sayfaları okur. Bacaklar koordinata göre (rota bacak
+önbelleğiyle aynı basamağa yuvarlanarak) eşlenir; matriste olmayan bir
+nokta içeren bacaklar için yönlendiriciye gidilir.
+
+Yenileme artımlıdır: koordinatı önceki dosyada bulunan noktaların
+bacakları kopyalanır, yalnızca yeni noktaları içeren bacaklar hesaplanır.
+"""
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+def index_path(path):
+    """`.npy` dosyasının yanındaki JSON dizin dosyası."""
+    return os.path.splitext(path)[0] + '.json'
+
+
+class ProvinceMatrix:
+    """Koordinatla eşlenen (mesafe, süre) matrisi."""
+
+    def __init__(self, names, coords, data, backend, precision=4, created_at=None):
+        # np.memmap olduğu gibi tutulur (asarray sıradan bir ndarray görünümüne çevirirdi)
+        data = data if isinstance(data, np.ndarray) else np.asarray(data)
+        if data.shape != (2, len(names), len(names)):
+            raise ValueError(f"Matris boyutu {data.shape}, dizindeki {len(names)} noktayla uyuşmuyor")
+        self.names = list(names)
+        self.coords = [(float(lat), float(lon)) for lat, lon in coords]
+        self.data = data
+        self.backend = backend
+        self.precision = precision
+        self.created_at = created_at
+        self._index = {}
+        for i, (lat, lon) in enumerate(self.coords):
+            self._index.setdefault(self._key(lat, lon), i)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _key(self, lat, lon):
+        return round(lat, self.precision), round(lon, self.precision)
+
+    @property
+    def dist(self):
+        return self.data[0]
+
+    @property
+    def dur(self):
+        return self.data[1]
+
+    @classmethod
+    def load(cls, path, precision=4):
+        """Matrisi bellek eşlemeli (salt okunur, kopyasız) açar."""
+        with open(index_path(path), encoding='utf-8') as f:
+            index = json.load(f)
+        data = np.load(path, mmap_mode='r')
+        return cls(index['names'], index['coords'], data, index.get('backend'), precision, index.get('created_at'))
+
+    def save(self, path):
+        """Önce geçici dosyalara yazıp yerlerine taşır; eski dosyayı eşlemiş
+        worker'lar yeniden başlayana dek eski içeriği okumaya devam eder."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, np.asarray(self.data, dtype=np.float32))
+        with open(index_path(path) + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({
+                'names': self.names,
+                'coords': self.coords,
+                'backend': self.backend,
+                'created_at': self.created_at,
+            }, f, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+        os.replace(index_path(path) + '.tmp', index_path(path))
+
+    def indices(self, points):
+        """Her nokta ({'lat', 'lon'}) için matris satırı; matriste yoksa -1."""
+        return np.array([self._index.get(self._key(p['lat'], p['lon']), -1) for p in points], dtype=np.int64)
+
+    def lookup(self, rows, cols):
+        """Satır/sütun çiftleri için (mesafe, süre) dizileri (float64)."""
+        return (self.data[0][rows, cols].astype(float), self.data[1][rows, cols].astype(float))
+
+    @classmethod
+    def build(cls, points, router, previous=None, max_coords=100, precision=4, progress=None):
+        """`points` ([(ad, lat, lon), ...]) için matrisi `router` ile hesaplar.
+
+        `previous` aynı arka uçla üretilmişse koordinatı orada bulunan
+        noktalar arası bacaklar kopyalanır; yeni noktalar `max_coords`'u
+        aşmayan `table` bloklarıyla (yeni noktalar + eski noktaların bir
+        dilimi) hesaplanır. Aynı koordinattaki noktalar tek satıra iner.
+        Dönüş: (matris, yeni hesaplanan nokta sayısı).
+        """
+        progress = progress or (lambda done, total: None)
+        names, coords, seen = [], [], set()
+        for name, lat, lon in points:
+            key = (round(lat, precision), round(lon, precision))
+            if key not in seen:
+                seen.add(key)
+                names.append(name)
+                coords.append((float(lat), float(lon)))
+        n = len(names)
+
+        data = np.full((2, n, n), np.inf, dtype=np.float32)
+        data[:, np.arange(n), np.arange(n)] = 0.0
+        matrix = cls(names, coords, data, router.name, precision, datetime.now(timezone.utc).isoformat())
+
+        if previous is not None and previous.backend == router.name:
+            old = previous.indices([{'lat': lat, 'lon': lon} for lat, lon in coords])
+        else:
+            old = np.full(n, -1, dtype=np.int64)
+        kept = np.flatnonzero(old >= 0)
+        fresh = np.flatnonzero(old < 0)
+        if kept.size:
+            block = np.ix_(old[kept], old[kept])
+            data[0][np.ix_(kept, kept)] = previous.data[0][block]
+            data[1][np.ix_(kept, kept)] = previous.data[1][block]
+        if not fresh.size:
+            return matrix, 0
+
+        # Baştan kurulumda veya yeni noktalar bloğun yarısını aşıyorsa tüm matris tek tabloyla
+        # (arka uç büyük tabloları kendisi bloklara böler)
+        if not kept.size or fresh.size * 2 > max_coords:
+            result = router.table(coords, max_coords=max_coords)
+            if result is None:
+                raise RuntimeError(f"{router.name} arka ucu mesafe matrisi döndürmedi")
+            data[0], data[1] = result
+            progress(1, 1)
+            return matrix, n
+
+        step = max_coords - fresh.size
+        blocks = [np.concatenate([fresh, kept[start:start + step]]) for start in range(0, kept.size, step)]
+        f = fresh.size
+        for done, block in enumerate(blocks, start=1):
+            result = router.table([coords[i] for i in block], max_coords=max_coords)
+            if result is None:
+                raise RuntimeError(f"{router.name} arka ucu mesafe matrisi döndürmedi")
+            # Yalnızca yeni noktaların satır ve sütunları yazılır
+            for layer, values in zip((0, 1), result):
+                data[layer][np.ix_(block[:f], block)] = values[:f]
+                data[layer][np.ix_(block, block[:f])] = values[:, :f]
+            progress(done, len(blocks))
+        return matrix, int(f)
@@ -0,0 +1,270 @@
+"""Türkiye şehirlerarası karayolu ağı üzerinde çevrimdışı yönlendirme.
+
+Ağ, 81 il merkezini düğüm, ana karayolu bağlantılarını kenar olarak tutar.
+Kaynak liste `data/road_edges.csv`'dir (from, to, road_class, km); `km`
+boşsa kuş uçuşu mesafe yol sınıfının dolambaç katsayısıyla büyütülür.
+`flask build-road-graph` bu listeyi sıkıştırılmış satır (CSR) dizilerine
+çevirip `data/road_graph.npz` olarak kaydeder; çalışma anında yalnızca bu
+diziler yüklenir.
+
+`GraphRouter`, `routing.RoutingBackend` arayüzünü ağa hiç çıkmadan uygular:
+bir nokta en yakın `snap_nodes` düğüme yerel yol tahminiyle bağlanır, tek
+bacak A* ile, matris her kaynaktan bir Dijkstra taramasıyla hesaplanır.
+Ağ küçük olduğundan (81 düğüm) kontraksiyon hiyerarşisine gerek yoktur.
+"""
+import csv
+import heapq
+import math
+
+import numpy as np
+
+from gazetteer import KDTree
+from routing import CircuitBreaker, RoutingBackend, estimate_matrix, haversine_matrix
+
+# Yol sınıfı -> ortalama hız (km/sa) ve kuş uçuşuna göre dolambaç katsayısı
+ROAD_CLASSES = {
+    'otoyol': {'speed_kmh': 110.0, 'detour_factor': 1.15},
+    'bolunmus': {'speed_kmh': 85.0, 'detour_factor': 1.25},
+    'dag': {'speed_kmh': 60.0, 'detour_factor': 1.45},
+}
+MAX_SPEED_KMH = max(c['speed_kmh'] for c in ROAD_CLASSES.values())
+
+# Erişim bacağı kurulacak düğümler: en yakın düğüm uzaklığının en fazla bu katı (+ sabit pay, km)
+SNAP_RATIO = 1.5
+SNAP_SLACK_KM = 5.0
+
+
+class RoadGraph:
+    """Yönlü kenarları CSR dizilerinde tutulan karayolu ağı.
+
+    `indptr[u]:indptr[u + 1]` aralığı u düğümünden çıkan kenarlardır;
+    `indices` hedef düğümü, `km` ve `minutes` kenar uzunluğunu ve süresini verir.
+    """
+
+    def __init__(self, names, lat, lon, indptr, indices, km, minutes):
+        self.names = [str(n) for n in names]
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.indptr = np.asarray(indptr, dtype=np.int32)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.km = np.asarray(km, dtype=np.float32)
+        self.minutes = np.asarray(minutes, dtype=np.float32)
+        self.tree = KDTree(self.lat, self.lon)
+        # Arama döngüleri Python skalerleriyle daha hızlı çalışır
+        self._indptr = self.indptr.tolist()
+        self._indices = self.indices.tolist()
+        self._km = self.km.tolist()
+        self._minutes = self.minutes.tolist()
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def edge_count(self):
+        return len(self.indices)
+
+    @classmethod
+    def build(cls, nodes, edges):
+        """{ad: {'lat', 'lon'}} düğümlerinden ve kenar satırlarından (her iki yön) ağ kurar."""
+        names = list(nodes)
+        position = {name: i for i, name in enumerate(names)}
+        lat = np.array([nodes[n]['lat'] for n in names], dtype=float)
+        lon = np.array([nodes[n]['lon'] for n in names], dtype=float)
+
+        arcs = []
+        for row in edges:
+            a, b = row['from'].strip(), row['to'].strip()
+            if a not in position or b not in position:
+                raise ValueError(f"Karayolu kenarında bilinmeyen düğüm: {a} - {b}")
+            road = ROAD_CLASSES.get((row.get('road_class') or '').strip())
+            if road is None:
+                raise ValueError(f"Bilinmeyen yol sınıfı: {row.get('road_class')!r} ({a} - {b})")
+            i, j = position[a], position[b]
+            if (row.get('km') or '').strip():
+                km = float(row['km'])
+            else:
+                km = float(haversine_matrix(lat[[i, j]], lon[[i, j]])[0, 1]) * road['detour_factor']
+            minutes = km / road['speed_kmh'] * 60.0
+            arcs.append((i, j, km, minutes))
+            arcs.append((j, i, km, minutes))
+
+        arcs.sort()
+        sources = np.array([a[0] for a in arcs], dtype=np.int32)
+        indptr = np.searchsorted(sources, np.arange(len(names) + 1)).astype(np.int32)
+        return cls(
+            names, lat, lon, indptr,
+            [a[1] for a in arcs], [a[2] for a in arcs], [a[3] for a in arcs],
+        )
+
+    @classmethod
+    def from_csv(cls, nodes, path):
+        with open(path, newline='', encoding='utf-8') as f:
+            return cls.build(nodes, csv.DictReader(f))
+
+    def save(self, path):
+        np.savez(
+            path, names=np.array(self.names), lat=self.lat, lon=self.lon,
+            indptr=self.indptr, indices=self.indices, km=self.km, minutes=self.minutes,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data['names'], data['lat'], data['lon'],
+                data['indptr'], data['indices'], data['km'], data['minutes'],
+            )
+
+    def shortest_paths(self, sources):
+        """Çok kaynaklı Dijkstra (süreye göre).
+
+        `sources` {düğüm: (başlangıç_dk, başlangıç_km)}. Dönüş: (dakika, km)
+        dizileri; km, en kısa süreli yol boyuncaki mesafedir.
+        """
+        n = len(self.names)
+        best = [math.inf] * n
+        km = [math.inf] * n
+        heap = []
+        for node, (minutes, distance) in sources.items():
+            if minutes < best[node]:
+                best[node], km[node] = minutes, distance
+                heap.append((minutes, node))
+        heapq.heapify(heap)
+
+        indptr, indices, edge_km, edge_minutes = self._indptr, self._indices, self._km, self._minutes
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > best[u]:
+                continue
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + edge_minutes[e]
+                if nd < best[v]:
+                    best[v], km[v] = nd, km[u] + edge_km[e]
+                    heapq.heappush(heap, (nd, v))
+        return np.array(best), np.array(km)
+
+    def astar(self, sources, targets):
+        """Kaynak düğümlerden hedef düğümlere en kısa süreli yol (A*).
+
+        `sources`/`targets` {düğüm: (erişim_dk, erişim_km)}. Sezgisel, hedefe
+        kuş uçuşu mesafenin ağdaki en yüksek hızla alınma süresidir; kenar
+        süreleri bunun altına inemeyeceğinden sonuç kesindir.
+        Dönüş: (km, dakika); bağlantı yoksa (inf, inf).
+        """
+        if not sources or not targets:
+            return math.inf, math.inf
+        target_nodes = list(targets)
+        to_target = haversine_matrix(
+            np.r_[self.lat, self.lat[target_nodes]], np.r_[self.lon, self.lon[target_nodes]]
+        )[:len(self.names), len(self.names):] / MAX_SPEED_KMH * 60.0
+        heuristic = (to_target + np.array([targets[t][0] for t in target_nodes])[None, :]).min(axis=1).tolist()
+
+        n = len(self.names)
+        best = [math.inf] * n
+        km = [math.inf] * n
+        heap = []
+        for node, (minutes, distance) in sources.items():
+            if minutes < best[node]:
+                best[node], km[node] = minutes, distance
+                heap.append((minutes + heuristic[node], minutes, node))
+        heapq.heapify(heap)
+
+        result = (math.inf, math.inf)
+        indptr, indices, edge_km, edge_minutes = self._indptr, self._indices, self._km, self._minutes
+        while heap:
+            f, g, u = heapq.heappop(heap)
+            if f >= result[1]:
+                break
+            if g > best[u]:
+                continue
+            if u in targets:
+                total = g + targets[u][0]
+                if total < result[1]:
+                    result = (km[u] + targets[u][1], total)
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = g + edge_minutes[e]
+                if nd < best[v]:
+                    best[v], km[v] = nd, km[u] + edge_km[e]
+                    heapq.heappush(heap, (nd + heuristic[v], nd, v))
+        return result
+
+
+class GraphRouter(RoutingBackend):
+    """`RoadGraph` üzerinde ağ gerektirmeyen yönlendirme arka ucu.
+
+    Noktalar en yakın `snap_nodes` il merkezine `access_detour` katsayısı ve
+    `access_speed_kmh` hızla bağlanır; en yakın düğümden `SNAP_RATIO` katından
+    uzak düğümlere erişim bacağı kurulmaz (körfez/dağ aşırı kısa yollar oluşmasın). En yakın düğümü aynı olan (aynı il
+    merkezinin çevresindeki) iki nokta arasında doğrudan yerel yol tahmini
+    daha kısaysa o kullanılır; farklı bölgeler arasında ise yalnızca ağ
+    üzerinden gidilir (ör. Yalova-İstanbul körfezi dolaşır). Sonuçlar ucuz
+    olduğundan bacak önbelleğine yazılmaz.
+    """
+
+    name = 'offline'
+    cacheable = False
+
+    def __init__(self, graph, access_speed_kmh=50.0, access_detour=1.3, snap_nodes=3, breaker=None):
+        self.graph = graph
+        self.access_speed_kmh = access_speed_kmh
+        self.access_detour = access_detour
+        self.snap_nodes = snap_nodes
+        # Arayüz uyumu için; çevrimdışı arka uç kendiliğinden hata kaydetmez
+        self.breaker = breaker or CircuitBreaker()
+
+    def _access(self, lat, lon):
+        """Noktadan en yakın düğümlere {düğüm: (dakika, km)} erişim bacakları."""
+        legs = {}
+        candidates = self.graph.tree.nearest_k(lat, lon, self.snap_nodes)
+        limit = candidates[0][1] * SNAP_RATIO + SNAP_SLACK_KM if candidates else 0.0
+        for node, crow_km in candidates:
+            if crow_km > limit:
+                break
+            km = crow_km * self.access_detour
+            legs[node] = (km / self.access_speed_kmh * 60.0, km)
+        return legs
+
+    def route(self, lat1, lon1, lat2, lon2):
+        sources, targets = self._access(lat1, lon1), self._access(lat2, lon2)
+        distance, duration = self.graph.astar(sources, targets)
+        if next(iter(sources), None) == next(iter(targets), None) or not math.isfinite(duration):
+            direct_km, direct_min = estimate_matrix(
+                [(lat1, lon1), (lat2, lon2)], detour_factor=self.access_detour, speed_kmh=self.access_speed_kmh
+            )
+            if direct_min[0, 1] <= duration:
+                return float(direct_km[0, 1]), float(direct_min[0, 1])
+        return float(distance), float(duration)
+
+    def table(self, coords, max_coords=None):
+        """Tüm çiftler için (mesafe_km, süre_dk); her kaynak için bir Dijkstra taraması."""
+        coords = [(float(lat), float(lon)) for lat, lon in coords]
+        n, m = len(coords), len(self.graph)
+        access = [self._access(lat, lon) for lat, lon in coords]
+
+        # exit_min[j, v]: v düğümünden j noktasına erişim süresi (bağlı değilse inf)
+        exit_min = np.full((n, m), np.inf)
+        exit_km = np.full((n, m), np.inf)
+        for j, legs in enumerate(access):
+            for node, (minutes, km) in legs.items():
+                exit_min[j, node], exit_km[j, node] = minutes, km
+
+        # Doğrudan yerel yol yalnızca en yakın düğümü aynı olan noktalar arasında
+        dist, dur = estimate_matrix(coords, detour_factor=self.access_detour, speed_kmh=self.access_speed_kmh)
+        home = np.array([next(iter(legs), -1) for legs in access])
+        local = home[:, None] == home[None, :]
+        dist[~local] = np.inf
+        dur[~local] = np.inf
+        for i, legs in enumerate(access):
+            node_min, node_km = self.graph.shortest_paths(legs)
+            total = node_min[None, :] + exit_min
+            via = np.argmin(total, axis=1)
+            graph_min = total[np.arange(n), via]
+            graph_km = node_km[via] + exit_km[np.arange(n), via]
+            better = graph_min < dur[i]
+            dur[i, better] = graph_min[better]
+            dist[i, better] = graph_km[better]
+        np.fill_diagonal(dist, 0.0)
+        np.fill_diagonal(dur, 0.0)
+        return dist, dur
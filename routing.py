@@ -0,0 +1,318 @@
+"""Yönlendirme arka uçları ve OSRM için bağlantı havuzlu, eşzamanlı istemci.
+
+Tüm arka uçlar `RoutingBackend` arayüzünü uygular: `route` tek bacak,
+`table` tüm çiftler için (mesafe_km, süre_dk) döner. `RoutingClient` HTTP
+üzerinden (kendi barındırdığınız) bir OSRM sunucusuna gider; ağ
+gerektirmeyen çevrimdışı arka uç `road_graph.GraphRouter`'dır.
+
+İstemci bir devre kesici (circuit breaker) arkasında çalışır; sunucu
+ulaşılamaz veya yavaş olduğunda istekler beklemeden reddedilir ve çağıran
+taraf `estimate_matrix` ile haversine tabanlı tahmine düşebilir.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+class RoutingUnavailable(Exception):
+    """Devre kesici açıkken yönlendirme sunucusuna istek gönderilmez."""
+
+
+class CircuitBreaker:
+    """Art arda hatalar veya yüksek gecikmeden sonra açılan devre kesici.
+
+    - closed: istekler serbest; `failure_threshold` ardışık hata/yavaş yanıt
+      devreyi açar.
+    - open: istekler `reset_timeout` saniye boyunca anında reddedilir.
+    - half_open: süre dolunca tek bir deneme isteğine izin verilir; başarılı
+      olursa devre kapanır, değilse yeniden açılır.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, latency_threshold=5.0, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self):
+        """Devre açık ve deneme süresi henüz gelmemişse True."""
+        return self.state == self.OPEN
+
+    def allow(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record(self, ok, latency=0.0):
+        """İstek sonucunu kaydeder; eşikten yavaş yanıtlar da hata sayılır."""
+        with self._lock:
+            if ok and latency <= self.latency_threshold:
+                self._failures = 0
+                self._state = self.CLOSED
+                self._probe_in_flight = False
+                return
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"OSRM devre kesici açıldı ({self._failures} hata/yavaş yanıt)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def status(self):
+        state = self.state
+        with self._lock:
+            return {'state': state, 'consecutive_failures': self._failures}
+
+
+def haversine_matrix(lats, lons):
+    """Tüm nokta çiftleri arasındaki büyük çember mesafesi (km), vektörize."""
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lon = np.radians(np.asarray(lons, dtype=float))
+    dlat = lat[None, :] - lat[:, None]
+    dlon = lon[None, :] - lon[:, None]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def estimate_matrix(coords, detour_factor=1.3, speed_kmh=80.0):
+    """Yol ağı olmadan (mesafe_km, süre_dk) tahmini.
+
+    Kuş uçuşu mesafe `detour_factor` ile karayolu mesafesine, ortalama
+    `speed_kmh` hızla süreye çevrilir.
+    """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    dist = haversine_matrix(coords[:, 0], coords[:, 1]) * detour_factor
+    return dist, dist / speed_kmh * 60.0
+
+
+class RoutingBackend(ABC):
+    """Yönlendirme arka ucu arayüzü.
+
+    - `route(lat1, lon1, lat2, lon2)`: (mesafe_km, süre_dk); hesaplanamazsa (inf, inf).
+    - `table(coords, max_coords)`: (mesafe, süre) matrisleri; hata olursa None.
+    - `cacheable`: sonuçlar rota bacak önbelleğine yazılmaya değer mi (ağ
+      maliyeti olan arka uçlar için True).
+    - `breaker`: arka ucun devre kesicisi; çağıran taraf açıkken tahmine düşer.
+    """
+
+    name = None
+    cacheable = True
+
+    @abstractmethod
+    def route(self, lat1, lon1, lat2, lon2):
+        ...
+
+    @abstractmethod
+    def table(self, coords, max_coords=100):
+        ...
+
+    def route_many(self, pairs):
+        """[(lat1, lon1, lat2, lon2), ...] listesini sırayı koruyarak hesaplar."""
+        return self.map(lambda pair: self.route(*pair), pairs)
+
+    def map(self, fn, items, on_progress=None):
+        """`fn`'i öğelere sırayla uygular; `on_progress(tamamlanan, toplam)` her öğeden sonra çağrılır."""
+        items = list(items)
+        results = []
+        for done, item in enumerate(items, start=1):
+            results.append(fn(item))
+            if on_progress:
+                on_progress(done, len(items))
+        return results
+
+    def status(self):
+        return dict(self.breaker.status(), backend=self.name)
+
+
+class RoutingClient(RoutingBackend):
+    """Tek bir `requests.Session` üzerinden OSRM'e giden tüm istekleri yönetir.
+
+    Oturum keep-alive bağlantılarını havuzda tutar, geçici hatalarda (429/5xx,
+    bağlantı kopması) üstel geri çekilme ile yeniden dener. `route_many` ve
+    `map` bacakları sınırlı boyutlu bir iş parçacığı havuzunda paralel yürütür;
+    böylece bir planın gecikmesi bacakların toplamına değil en yavaş bacağa
+    bağlı kalır.
+    """
+
+    name = 'osrm'
+
+    def __init__(self, base_url, max_workers=8, timeout=15, retries=2, backoff=0.5, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='osrm')
+
+    @property
+    def session(self):
+        """İlk istekte kurulan `requests.Session` (requests açılışta yüklenmez)."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def _build_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers, max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _get_json(self, url):
+        """Devre kesiciden geçerek GET isteği atar ve JSON yanıtı döner."""
+        if not self.breaker.allow():
+            raise RoutingUnavailable("OSRM devre kesici açık")
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            ok = response.status_code < 500
+            payload = response.json()
+        except Exception:
+            self.breaker.record(False, time.perf_counter() - started)
+            raise
+        self.breaker.record(ok, time.perf_counter() - started)
+        return payload
+
+    def route(self, lat1, lon1, lat2, lon2):
+        """Tek bacak için (mesafe_km, süre_dk) döner; hata durumunda (inf, inf)."""
+        url = f"{self.base_url}/route/v1/driving/{lon1},{lat1};{lon2},{lat2}?overview=false"
+        try:
+            response = self._get_json(url)
+            if response.get("code") == "Ok":
+                distance_km = response["routes"][0]["distance"] / 1000.0
+                duration_min = response["routes"][0]["duration"] / 60.0
+                return distance_km, duration_min
+        except RoutingUnavailable:
+            pass
+        except Exception as e:
+            print(f"OSRM Hatası: {e}")
+        return float('inf'), float('inf')
+
+    def map(self, fn, items, on_progress=None):
+        """`fn`'i öğeler üzerinde havuzda paralel çalıştırır ve sonuçları sırayla döner.
+
+        `on_progress(tamamlanan, toplam)` çağıran iş parçacığında, her öğe
+        bittikçe çağrılır.
+        """
+        items = list(items)
+        if len(items) <= 1:
+            results = [fn(item) for item in items]
+            if on_progress and items:
+                on_progress(1, 1)
+            return results
+
+        futures = [self._executor.submit(fn, item) for item in items]
+        if on_progress:
+            for done, _ in enumerate(as_completed(futures), start=1):
+                on_progress(done, len(futures))
+        return [future.result() for future in futures]
+
+    def table(self, coords, max_coords=100):
+        """Verilen (lat, lon) listesi için mesafe (km) ve süre (dk) matrislerini döner.
+
+        Koordinat sayısı `max_coords` sınırını aşarsa matris bloklara bölünür ve
+        her blok için `sources`/`destinations` ile ayrı /table isteği atılır;
+        bloklar paralel gönderilir. Herhangi bir istek başarısız olursa None döner.
+        """
+        n = len(coords)
+        dist = np.full((n, n), np.inf)
+        dur = np.full((n, n), np.inf)
+        np.fill_diagonal(dist, 0.0)
+        np.fill_diagonal(dur, 0.0)
+
+        block = n if n <= max_coords else max(1, max_coords // 2)
+        blocks = [
+            (list(range(i0, min(i0 + block, n))), list(range(j0, min(j0 + block, n))))
+            for i0 in range(0, n, block)
+            for j0 in range(0, n, block)
+        ]
+
+        def fetch(block_ids):
+            sources, destinations = block_ids
+            ids = sorted(set(sources) | set(destinations))
+            pos = {k: p for p, k in enumerate(ids)}
+
+            coord_str = ";".join(f"{coords[k][1]},{coords[k][0]}" for k in ids)
+            url = f"{self.base_url}/table/v1/driving/{coord_str}?annotations=duration,distance"
+            if block < n:
+                url += "&sources=" + ";".join(str(pos[k]) for k in sources)
+                url += "&destinations=" + ";".join(str(pos[k]) for k in destinations)
+            return self._get_json(url)
+
+        if self.breaker.is_open:
+            return None
+
+        try:
+            responses = self.map(fetch, blocks)
+            for (sources, destinations), response in zip(blocks, responses):
+                if response.get("code") != "Ok":
+                    print(f"OSRM Table Hatası: {response.get('code')}")
+                    return None
+
+                # OSRM ulaşılamayan hücreler için null döner -> nan -> inf
+                block_dist = np.array(response["distances"], dtype=float) / 1000.0
+                block_dur = np.array(response["durations"], dtype=float) / 60.0
+                dist[np.ix_(sources, destinations)] = np.where(np.isnan(block_dist), np.inf, block_dist)
+                dur[np.ix_(sources, destinations)] = np.where(np.isnan(block_dur), np.inf, block_dur)
+        except RoutingUnavailable:
+            return None
+        except Exception as e:
+            print(f"OSRM Table Hatası: {e}")
+            return None
+
+        return dist, dur
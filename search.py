@@ -0,0 +1,165 @@
+"""Dosya araması için indeksli tam metin arama.
+
+Arama `case_no`, `client`, `opponent`, `city`, `court_office` ve
+`description` alanlarını kapsar. Türkçe karakterler katlanır (İ/I/ı → i,
+ş → s, ğ → g, ü → u, ö → o, ç → c) ve küçük harfe çevrilir; böylece
+"ISTANBUL", "İstanbul" ve "istanbul" aynı sonucu verir.
+
+- SQLite: `cases_fts` adında trigram belirteçli bir FTS5 gölge tablosu;
+  `cases` tablosundaki tetikleyicilerle güncel tutulur ve bm25 ile sıralanır.
+- PostgreSQL: katlanmış belge ifadesi üzerinde `pg_trgm` GIN indeksi;
+  `word_similarity` ile sıralanır.
+
+Her iki arka uçta da alt dize araması (`%terim%`) indeksten yararlanır.
+"""
+import sqlite3
+
+from sqlalchemy import Float, Integer, text
+
+SEARCH_COLUMNS = ('case_no', 'client', 'opponent', 'city', 'court_office', 'description')
+
+# bm25 sütun ağırlıkları (SEARCH_COLUMNS sırasıyla): dosya no en belirleyici alan
+BM25_WEIGHTS = (10.0, 5.0, 3.0, 2.0, 2.0, 1.0)
+
+# Trigram indeksinin kullanılabildiği en kısa terim
+MIN_TRIGRAM_TERM = 3
+
+_FOLD_FROM = 'İIıŞşĞğÜüÖöÇç'
+_FOLD_TO = 'iiissgguuoocc'
+_FOLD_TABLE = str.maketrans(_FOLD_FROM, _FOLD_TO)
+
+# PostgreSQL'de indekslenen ve sorgulanan belge ifadesi; ikisi birebir aynı olmalı
+PG_DOCUMENT = "tr_fold(" + " || ' ' || ".join(f"coalesce({c}, '')" for c in SEARCH_COLUMNS) + ")"
+
+
+def tr_fold(value):
+    """Metni Türkçe karakterleri katlanmış, küçük harfli hale getirir."""
+    if value is None:
+        return None
+    return str(value).translate(_FOLD_TABLE).lower()
+
+
+def search_terms(query):
+    """Arama ifadesini katlanmış, boşlukla ayrılmış terimlere böler."""
+    return [term for term in tr_fold(query or '').split() if term]
+
+
+def register_sqlite_functions(dbapi_connection):
+    """SQLite bağlantısına tetikleyicilerin kullandığı `tr_fold` fonksiyonunu ekler."""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function('tr_fold', 1, tr_fold, deterministic=True)
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def ensure_search_index(connection, table='cases'):
+    """Arama indeksini (yoksa) oluşturur; tekrar çağrılması güvenlidir.
+
+    Tablo `create_all` ile yeni oluşturulduğunda da, indeks öncesinden kalma
+    bir veritabanında da çağrılabilir; SQLite'ta mevcut kayıtlar gölge tabloya
+    bir kez aktarılır.
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        _ensure_sqlite(connection, table)
+    elif dialect == 'postgresql':
+        _ensure_postgresql(connection, table)
+
+
+def _ensure_sqlite(connection, table):
+    fts = f'{table}_fts'
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': fts}
+    ).first()
+    columns = ', '.join(SEARCH_COLUMNS)
+    folded_new = ', '.join(f'tr_fold(new.{c})' for c in SEARCH_COLUMNS)
+    assignments = ', '.join(f'{c} = tr_fold(new.{c})' for c in SEARCH_COLUMNS)
+
+    connection.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, tokenize = 'trigram')"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {folded_new}); END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"UPDATE {fts} SET {assignments} WHERE rowid = old.id; END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"DELETE FROM {fts} WHERE rowid = old.id; END"
+    ))
+    if not exists:
+        folded = ', '.join(f'tr_fold({c})' for c in SEARCH_COLUMNS)
+        connection.execute(text(
+            f"INSERT INTO {fts}(rowid, {columns}) SELECT id, {folded} FROM {table}"
+        ))
+
+
+def drop_search_index(connection, table='cases'):
+    """Tablo silinirken SQLite gölge tablosunu da kaldırır (PostgreSQL indeksi tabloyla gider)."""
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text(f"DROP TABLE IF EXISTS {table}_fts"))
+
+
+def _ensure_postgresql(connection, table):
+    try:
+        with connection.begin_nested():
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except Exception as e:
+        # Yönetilen veritabanlarında eklenti panelden etkinleştirilmiş olabilir
+        print(f"pg_trgm eklentisi oluşturulamadı: {e}")
+    connection.execute(text(
+        "CREATE OR REPLACE FUNCTION tr_fold(text) RETURNS text AS "
+        f"$$ SELECT lower(translate($1, '{_FOLD_FROM}', '{_FOLD_TO}')) $$ "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE"
+    ))
+    connection.execute(text(
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_search_trgm ON {table} "
+        f"USING gin (({PG_DOCUMENT}) gin_trgm_ops)"
+    ))
+
+
+def match_subquery(dialect, query, table='cases'):
+    """Aramaya uyan kayıtların (id, rank) alt sorgusu; küçük `rank` daha alakalıdır.
+
+    İfade boşsa hiç satır dönmeyen bir alt sorgu döner; çağıran taraf her
+    durumda join yapabilir.
+    """
+    terms = search_terms(query)
+    params = {}
+    conditions = []
+
+    if dialect == 'sqlite':
+        fts = f'{table}_fts'
+        long_terms = [t for t in terms if len(t) >= MIN_TRIGRAM_TERM]
+        short_terms = [t for t in terms if len(t) < MIN_TRIGRAM_TERM]
+        if long_terms:
+            params['match'] = ' '.join('"' + t.replace('"', '""') + '"' for t in long_terms)
+            conditions.append(f"{fts} MATCH :match")
+        for k, term in enumerate(short_terms):
+            params[f't{k}'] = f'%{_escape_like(term)}%'
+            conditions.append('(' + ' OR '.join(f"{c} LIKE :t{k} ESCAPE '\\'" for c in SEARCH_COLUMNS) + ')')
+        weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+        rank = f"bm25({fts}, {weights})" if long_terms else "0.0"
+        source, id_column = fts, 'rowid'
+    elif dialect == 'postgresql':
+        for k, term in enumerate(terms):
+            params[f't{k}'] = f'%{_escape_like(term)}%'
+            conditions.append(f"{PG_DOCUMENT} LIKE :t{k}")
+        params['q'] = ' '.join(terms)
+        rank = f"1 - word_similarity(:q, {PG_DOCUMENT})"
+        source, id_column = table, 'id'
+    else:
+        for k, term in enumerate(terms):
+            params[f't{k}'] = f'%{_escape_like(term)}%'
+            conditions.append('(' + ' OR '.join(f"lower({c}) LIKE :t{k} ESCAPE '\\'" for c in SEARCH_COLUMNS) + ')')
+        rank = "0.0"
+        source, id_column = table, 'id'
+
+    where = ' AND '.join(conditions) if conditions else '1 = 0'
+    stmt = text(f"SELECT {id_column} AS id, {rank} AS rank FROM {source} WHERE {where}")
+    return stmt.bindparams(**params).columns(id=Integer, rank=Float).subquery('search_matches')
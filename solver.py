@@ -0,0 +1,393 @@
+"""Rota sıralama çözücüleri.
+
+Tüm çözücüler aynı girdiyi alır: `dur[i, j]` i'den j'ye seyahat süresi olan
+kare bir NumPy matrisi. 0 numaralı düğüm başlangıç ofisidir; tur açık uçludur
+(ofise dönüş maliyeti eklenmez). Çıktı, ziyaret edilecek durakların (1..n)
+sırasıdır.
+
+Teslim tarihli duraklarda `deadline_search`, süre matrisi çözümünü bir
+`DeadlinePlan` (mesai takvimine göre çizelge + gecikme cezası) üzerinden
+yeniden düzenler.
+"""
+import time
+
+import numpy as np
+
+# Ulaşılamayan bacaklar (inf) aritmetiği bozmasın diye büyük ama sonlu bir ceza
+UNREACHABLE = 1e7
+
+# Held–Karp'ın kullanılacağı en fazla durak sayısı (2^n * n^2 bellek/zaman)
+EXACT_LIMIT = 12
+
+SOLVERS = ('auto', 'greedy', 'exact', 'local')
+
+
+def _finite(dur):
+    dur = np.asarray(dur, dtype=float)
+    return np.where(np.isfinite(dur), dur, UNREACHABLE)
+
+
+def path_cost(dur, order):
+    """0'dan başlayıp `order` sırasıyla gidilen yolun toplam süresi."""
+    if len(order) == 0:
+        return 0.0
+    dur = _finite(dur)
+    path = np.concatenate(([0], order))
+    return float(dur[path[:-1], path[1:]].sum())
+
+
+def nearest_neighbour(dur):
+    """Her adımda en yakın ziyaret edilmemiş durağa giden açgözlü tur."""
+    dur = _finite(dur)
+    n = dur.shape[0]
+    unvisited = np.ones(n, dtype=bool)
+    unvisited[0] = False
+    current = 0
+    order = []
+    for _ in range(n - 1):
+        candidates = np.where(unvisited, dur[current], np.inf)
+        current = int(np.argmin(candidates))
+        unvisited[current] = False
+        order.append(current)
+    return order
+
+
+def held_karp(dur, progress=None):
+    """Açık uçlu tur için kesin dinamik programlama çözümü (O(2^n * n^2)).
+
+    Katmanlar (alt küme büyüklüğü) boyunca vektörize edilmiştir: aynı
+    büyüklükteki tüm alt kümeler tek NumPy işlemiyle güncellenir.
+    """
+    dur = _finite(dur)
+    n = dur.shape[0] - 1
+    if n == 0:
+        return []
+    if n > 20:
+        raise ValueError("Held–Karp en fazla 20 durak için kullanılabilir")
+
+    stops = dur[1:, 1:]
+    size = 1 << n
+    dp = np.full((size, n), np.inf)
+    parent = np.full((size, n), -1, dtype=np.int64)
+    bits = 1 << np.arange(n)
+    dp[bits, np.arange(n)] = dur[0, 1:]
+
+    masks = np.arange(size)
+    popcount = np.zeros(size, dtype=np.int64)
+    for j in range(n):
+        popcount += (masks >> j) & 1
+
+    for k in range(2, n + 1):
+        if progress:
+            progress((k - 1) / n, k - 1)
+        layer = masks[popcount == k]
+        # prev[s, j] = layer[s] alt kümesinden j çıkarılmış hali
+        prev = layer[:, None] ^ bits[None, :]
+        contains = (layer[:, None] & bits[None, :]) != 0
+        # cand[s, j, i] = dp[prev, i] + stops[i, j]
+        cand = dp[prev] + stops.T[None, :, :]
+        best_i = np.argmin(cand, axis=2)
+        best = np.take_along_axis(cand, best_i[:, :, None], axis=2)[:, :, 0]
+        dp[layer] = np.where(contains, best, np.inf)
+        parent[layer] = np.where(contains, best_i, -1)
+
+    if progress:
+        progress(1.0, n)
+
+    full = size - 1
+    last = int(np.argmin(dp[full]))
+    order = []
+    mask = full
+    while last != -1:
+        order.append(last + 1)
+        previous = int(parent[mask, last])
+        mask ^= 1 << last
+        last = previous
+    return order[::-1]
+
+
+def _extend(dur):
+    """Açık uçlu turu sabit bitişli bir yola çevirmek için maliyetsiz bir BİTİŞ düğümü ekler."""
+    n = dur.shape[0]
+    ext = np.zeros((n + 1, n + 1))
+    ext[:n, :n] = dur
+    return ext
+
+
+def _two_opt_pass(ext, path):
+    """En iyi iyileştiren 2-opt hamlesini uygular; iyileşme yoksa False döner.
+
+    Süreler asimetrik olabileceğinden ters çevrilen bölümün iç maliyeti
+    geri yön önek toplamlarıyla O(1)'de hesaplanır.
+    """
+    m = len(path) - 1  # son eleman BİTİŞ düğümü
+    if m < 3:
+        return False
+    fwd = np.concatenate(([0.0], np.cumsum(ext[path[:-1], path[1:]])))
+    bwd = np.concatenate(([0.0], np.cumsum(ext[path[1:], path[:-1]])))
+
+    i = np.arange(1, m)[:, None]
+    k = np.arange(1, m)[None, :]
+    valid = k > i
+    i_b, k_b = np.broadcast_arrays(i, k)
+
+    delta = (
+        ext[path[i_b - 1], path[k_b]] + (bwd[k_b] - bwd[i_b]) + ext[path[i_b], path[k_b + 1]]
+        - ext[path[i_b - 1], path[i_b]] - (fwd[k_b] - fwd[i_b]) - ext[path[k_b], path[k_b + 1]]
+    )
+    delta = np.where(valid, delta, 0.0)
+    flat = int(np.argmin(delta))
+    if delta.flat[flat] >= -1e-9:
+        return False
+    a, b = np.unravel_index(flat, delta.shape)
+    a, b = int(a) + 1, int(b) + 1
+    path[a:b + 1] = path[a:b + 1][::-1].copy()
+    return True
+
+
+def _or_opt_pass(ext, path, max_segment=3):
+    """1-3 duraklık bir bölümü yolda başka bir yere taşıyan en iyi hamleyi uygular."""
+    m = len(path) - 1
+    best = (-1e-9, None)
+    for length in range(1, max_segment + 1):
+        if m - 1 < length + 1:
+            break
+        i = np.arange(1, m - length + 1)[:, None]          # bölüm başı
+        j = np.arange(0, m)[None, :]                        # p[j] ile p[j+1] arasına ekle
+        i_b, j_b = np.broadcast_arrays(i, j)
+        end = i_b + length - 1
+
+        removal = (
+            ext[path[i_b - 1], path[end + 1]]
+            - ext[path[i_b - 1], path[i_b]] - ext[path[end], path[end + 1]]
+        )
+        insertion = (
+            ext[path[j_b], path[i_b]] + ext[path[end], path[j_b + 1]]
+            - ext[path[j_b], path[j_b + 1]]
+        )
+        valid = (j_b < i_b - 1) | (j_b > end)
+        delta = np.where(valid, removal + insertion, np.inf)
+        flat = int(np.argmin(delta))
+        if delta.flat[flat] < best[0]:
+            a, b = np.unravel_index(flat, delta.shape)
+            best = (delta.flat[flat], (int(i[a, 0]), length, int(j[0, b])))
+
+    if best[1] is None:
+        return False
+    start, length, target = best[1]
+    segment = path[start:start + length].copy()
+    rest = np.concatenate((path[:start], path[start + length:]))
+    insert_at = target + 1 if target < start else target + 1 - length
+    path[:] = np.concatenate((rest[:insert_at], segment, rest[insert_at:]))
+    return True
+
+
+def local_search(dur, order=None, time_budget=0.5, progress=None):
+    """En yakın komşu turunu 2-opt ve Or-opt ile zaman bütçesi dolana dek iyileştirir.
+
+    `progress(oran, iterasyon)` her iyileştirme turunda çağrılır.
+    """
+    dur = _finite(dur)
+    n = dur.shape[0]
+    if order is None:
+        order = nearest_neighbour(dur)
+    ext = _extend(dur)
+    path = np.array([0] + list(order) + [n], dtype=np.int64)
+
+    started = time.perf_counter()
+    deadline = started + time_budget
+    iterations = 0
+    while time.perf_counter() < deadline:
+        iterations += 1
+        if progress:
+            progress(min(1.0, (time.perf_counter() - started) / time_budget), iterations)
+        if _two_opt_pass(ext, path):
+            continue
+        if not _or_opt_pass(ext, path):
+            break
+    if progress:
+        progress(1.0, iterations)
+    return [int(x) for x in path[1:-1]]
+
+
+def solve(dur, method='auto', time_budget=0.5, progress=None):
+    """Seçilen yöntemle durak sırasını hesaplar.
+
+    Dönüş: (sıra, kullanılan_yöntem). `auto`, EXACT_LIMIT durağa kadar
+    Held–Karp, üzerinde yerel arama kullanır. `progress(oran, iterasyon)`
+    verilirse çözücü ilerledikçe çağrılır.
+    """
+    if method not in SOLVERS:
+        raise ValueError(f"Bilinmeyen çözücü: {method}")
+
+    n = np.asarray(dur).shape[0] - 1
+    if method == 'auto':
+        method = 'exact' if n <= EXACT_LIMIT else 'local'
+
+    if method == 'greedy':
+        return nearest_neighbour(dur), method
+    if method == 'exact':
+        if n > EXACT_LIMIT:
+            raise ValueError(f"Kesin çözücü en fazla {EXACT_LIMIT} durak için kullanılabilir")
+        return held_karp(dur, progress=progress), method
+    return local_search(dur, time_budget=time_budget, progress=progress), method
+
+
+# --- Teslim tarihli (zaman pencereli) sıralama ---
+
+# Sert pencerede geciken her durak için eklenen sabit ceza; seyahat süresine her zaman baskındır
+HARD_PENALTY = 1e6
+
+DEADLINE_MODES = ('soft', 'hard')
+
+# Gecikme dakikası başına öncelik ağırlıkları; listede olmayan öncelikler 1
+DEFAULT_PRIORITY_WEIGHTS = {'Acil': 10.0, 'Yüksek': 3.0}
+
+
+def parse_weights(value):
+    """'Acil=10, Yüksek=3' → {'Acil': 10.0, 'Yüksek': 3.0}."""
+    weights = {}
+    for part in (value or '').split(','):
+        name, sep, amount = part.partition('=')
+        if not sep or not name.strip():
+            continue
+        try:
+            weights[name.strip()] = float(amount)
+        except ValueError:
+            raise ValueError(f"Geçersiz öncelik ağırlığı: {part.strip()!r} (beklenen: 'Öncelik=ağırlık')")
+    return weights
+
+
+class DeadlinePlan:
+    """Bir durak sırasının zaman çizelgesini ve teslim tarihi cezasını hesaplar.
+
+    Zaman, `advance(t, seyahat_dk, durak) -> (varış, ayrılış)` fonksiyonunun
+    kullandığı dakika eksenindedir (bkz. WorkCalendar.advance). Maliyet:
+    toplam seyahat süresi + her gecikmeli durak için `weights[k] * gecikme_dk`
+    (+ sert modda HARD_PENALTY). Bir durak ayrılış zamanı `deadlines[k]`'yı
+    geçerse gecikmiştir; teslim tarihi olmayan duraklarda `deadlines[k]` inf'tir.
+    """
+
+    def __init__(self, dur, start, advance, deadlines, weights, hard=False):
+        self.dur = _finite(dur)
+        self.start = start
+        self.advance = advance
+        self.deadlines = np.asarray(deadlines, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+        self.hard = hard
+
+    def _penalty(self, stop, departure):
+        late = departure - self.deadlines[stop]
+        if late <= 0:
+            return 0.0
+        return self.weights[stop] * late + (HARD_PENALTY if self.hard else 0.0)
+
+    def timeline(self, order):
+        """Her adım için (ayrılış, o adıma kadarki maliyet) listeleri."""
+        departures, costs = [], []
+        t, previous, total = self.start, 0, 0.0
+        for stop in order:
+            travel = self.dur[previous, stop]
+            _, t = self.advance(t, travel, stop)
+            total += travel + self._penalty(stop, t)
+            departures.append(t)
+            costs.append(total)
+            previous = stop
+        return departures, costs
+
+    def cost(self, order, bound=np.inf, base=None, changed=(0, 0), shift=0):
+        """Sıranın maliyeti; `bound` aşıldığı anda değerlendirmeyi keser ve inf döner.
+
+        `base=(sıra, ayrılışlar, maliyetler)` önceki bir sıranın çizelgesidir.
+        `changed=(ilk, son)` yeni sırada değişen konum aralığıdır (son hariç):
+        öncesi `base`'den alınır; sonrasında bir durak `base`'deki karşılığıyla
+        (konum - `shift`) aynı saatte ayrılıyorsa kalan maliyet de aynıdır.
+        Gece ve tatiller küçük kaymaları çoğu zaman emdiğinden hamlelerin
+        çoğu çizelgenin sonuna kadar hesaplanmaz.
+        """
+        first, last = changed if base is not None else (0, 0)
+        if first > 0:
+            t, total, previous = base[1][first - 1], base[2][first - 1], order[first - 1]
+        else:
+            t, total, previous = self.start, 0.0, 0
+
+        for position in range(first, len(order)):
+            stop = order[position]
+            travel = self.dur[previous, stop]
+            _, t = self.advance(t, travel, stop)
+            total += travel + self._penalty(stop, t)
+            if total >= bound:
+                return np.inf
+            if base is not None and position >= last:
+                aligned = position - shift
+                if base[0][aligned] == stop and base[1][aligned] == t:
+                    return total + base[2][-1] - base[2][aligned]
+            previous = stop
+        return total
+
+    def late_stops(self, order):
+        departures, _ = self.timeline(order)
+        return [stop for stop, t in zip(order, departures) if t > self.deadlines[stop]]
+
+
+def deadline_search(plan, order=None, time_budget=0.5, progress=None):
+    """Teslim tarihlerini gözeten sıra: en erken teslim tarihli ekleme + taşıma araması.
+
+    1. Duraklar teslim tarihine göre (yoksa sona) sıralanıp her biri turun
+       en ucuz yerine eklenir; ekleme adayları maliyet sınırı aşıldığı anda
+       elenir, böylece gecikmeye yol açan konumlar çizelgenin sonuna kadar
+       hesaplanmaz.
+    2. Verilen `order` (ör. süre matrisi çözümü) daha ucuzsa oradan başlanır.
+    3. Bütçe dolana dek tek durak taşıma (relocate) hamleleri denenir.
+    """
+    n = plan.dur.shape[0] - 1
+    if n == 0:
+        return []
+    started = time.perf_counter()
+    deadline = started + time_budget
+
+    route = []
+    for stop in sorted(range(1, n + 1), key=lambda k: (plan.deadlines[k], -plan.weights[k], plan.dur[0, k])):
+        departures, costs = plan.timeline(route)
+        base = (route, departures, costs)
+        best_cost, best_at = np.inf, len(route)
+        for at in range(len(route) + 1):
+            candidate = route[:at] + [stop] + route[at:]
+            cost = plan.cost(candidate, bound=best_cost, base=base, changed=(at, at + 1), shift=1)
+            if cost < best_cost:
+                best_cost, best_at = cost, at
+        route.insert(best_at, stop)
+
+    best = route
+    best_cost = plan.cost(best)
+    if order is not None and len(order) == n:
+        initial_cost = plan.cost(list(order), bound=best_cost)
+        if initial_cost < best_cost:
+            best, best_cost = list(order), initial_cost
+
+    iterations = 0
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        iterations += 1
+        if progress:
+            progress(min(1.0, (time.perf_counter() - started) / time_budget), iterations)
+        departures, costs = plan.timeline(best)
+        base = (best, departures, costs)
+        for i in range(n):
+            if time.perf_counter() >= deadline:
+                break
+            rest = best[:i] + best[i + 1:]
+            for j in range(n):
+                if j == i:
+                    continue
+                candidate = rest[:j] + [best[i]] + rest[j:]
+                cost = plan.cost(candidate, bound=best_cost - 1e-9, base=base, changed=(min(i, j), max(i, j) + 1))
+                if cost < best_cost:
+                    best, best_cost, improved = candidate, cost, True
+                    break
+            if improved:
+                break
+    if progress:
+        progress(1.0, iterations)
+    return [int(k) for k in best]
@@ -2,13 +2,26 @@ import unittest
 import os
 import io
 import pandas as pd
+import numpy as np
+import unittest.mock
 from unittest.mock import patch
 
 # Set ENV before importing app to avoid default postgres connection attempt
 os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
 
-from app import app, db, Case
+from app import app, db, build_leg_matrix, Case, case_stats, explain_hot_queries, DASHBOARD_COLUMNS, filter_cases, gazetteer, paginate_cases, province_matrix_points, RouteLeg, ROUTING_LEGS, get_osrm_table, Job, plan_cache, route_leg_cache, routing_client, wait_for_job
 import json
+import time
+import subprocess
+import sys
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import select
+from routing import CircuitBreaker, RoutingBackend, RoutingClient, haversine_matrix
+import solver
+import db_profiles
+from gazetteer import Gazetteer, KDTree
+from road_graph import GraphRouter, RoadGraph
+import metrics
 
 class TestApp(unittest.TestCase):
 
@@ -23,9 +36,20 @@ class TestApp(unittest.TestCase):
         # Depending on how Flask-SQLAlchemy was init, it might have created an engine already.
         # But sqlite memory is fresh per connection usually.
         db.create_all()
+        route_leg_cache.clear()
+        routing_client.breaker.reset()
+        case_stats.invalidate()
+        plan_cache.clear()
 
         self.client = app.test_client()
 
+    def _plan(self, data):
+        response = self.client.post('/api/planla', data=data)
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()['job_id']
+        wait_for_job(job_id, timeout=10)
+        return self.client.get(f'/api/jobs/{job_id}/result').get_json()
+
     def tearDown(self):
         db.session.remove()
         db.drop_all()
@@ -52,8 +76,178 @@ class TestApp(unittest.TestCase):
         self.assertIn(b'2024/1', response.data)
         self.assertIn(b'Test Client', response.data)
 
+    def test_dashboard_stats_snapshot(self):
+        db.session.add_all([
+            Case(case_no='S/1', client='A', city='Ankara', priority='Acil', status='Aktif'),
+            Case(case_no='S/2', client='B', city='İzmir', priority='Normal', status='Duruşma Bekliyor'),
+        ])
+        db.session.commit()
+        self.assertEqual(case_stats.get(), {'total': 2, 'cities': 2, 'urgent': 1, 'hearings': 1})
+
+        # Sonraki değişiklikler yeniden sorgu atmadan özete işlenmeli
+        with patch.object(case_stats, 'refresh', side_effect=AssertionError('refresh çağrılmamalı')):
+            self.client.post('/api/cases', data={
+                'case_no': 'S/3', 'client': 'C', 'city': 'Bursa',
+                'priority': 'Acil', 'status': 'Duruşma Bekliyor',
+            })
+            self.assertEqual(case_stats.get(), {'total': 3, 'cities': 3, 'urgent': 2, 'hearings': 2})
+
+            izmir = Case.query.filter_by(case_no='S/2').one()
+            self.client.post(f'/api/cases/update/{izmir.id}', data={'city': 'Ankara', 'status': 'Aktif'})
+            self.assertEqual(case_stats.get(), {'total': 3, 'cities': 2, 'urgent': 2, 'hearings': 1})
+
+            bursa = Case.query.filter_by(case_no='S/3').one()
+            self.client.post(f'/api/cases/delete/{bursa.id}')
+            self.assertEqual(case_stats.get(), {'total': 2, 'cities': 1, 'urgent': 1, 'hearings': 0})
+
+        case_stats.invalidate()
+        self.assertEqual(case_stats.get(), {'total': 2, 'cities': 1, 'urgent': 1, 'hearings': 0})
+
+    def test_dashboard_full_text_search(self):
+        db.session.add_all([
+            Case(case_no='2024/501', client='Işık Tekstil', opponent='Güneş Gıda', city='İstanbul',
+                 court_office='İstanbul 3. Asliye Ticaret', description='Çek iptali'),
+            Case(case_no='2024/502', client='Demir Çelik', opponent='Şahin İnşaat', city='Bursa',
+                 description='Kira alacağı, ışık tesisatı'),
+            Case(case_no='2024/503', client='Ayşe Yılmaz', city='Ankara'),
+        ])
+        db.session.commit()
+
+        def search_case_nos(q):
+            stmt = filter_cases(select(*DASHBOARD_COLUMNS), q, '')
+            rows, _, _ = paginate_cases(stmt, page_size=10)
+            return [row.case_no for row in rows]
+
+        # Türkçe karakter katlama ve yeni kapsanan alanlar
+        self.assertEqual(search_case_nos('ISTANBUL'), ['2024/501'])
+        self.assertEqual(search_case_nos('sahin insaat'), ['2024/502'])
+        self.assertEqual(search_case_nos('asliye'), ['2024/501'])
+        self.assertEqual(search_case_nos('çek'), ['2024/501'])
+        self.assertEqual(search_case_nos('2024/503'), ['2024/503'])
+        self.assertEqual(search_case_nos('bulunamaz'), [])
+
+        # Müvekkil adındaki eşleşme açıklamadakinden daha alakalı
+        self.assertEqual(search_case_nos('ışık'), ['2024/501', '2024/502'])
+
+        # Güncelleme ve silme indekse yansır
+        ayse = Case.query.filter_by(case_no='2024/503').one()
+        self.client.post(f'/api/cases/update/{ayse.id}', data={'client': 'Ayşe Öztürk'})
+        self.assertEqual(search_case_nos('ozturk'), ['2024/503'])
+        self.client.post(f'/api/cases/delete/{ayse.id}')
+        self.assertEqual(search_case_nos('ozturk'), [])
+
+        response = self.client.get('/?search=istanbul')
+        self.assertIn(b'2024/501', response.data)
+        self.assertNotIn(b'2024/502', response.data)
+
+    def test_search_results_keyset_pagination(self):
+        db.session.add_all([Case(case_no=f'2025/{i}', client=f'Müvekkil {i}', city='İzmir') for i in range(7)])
+        db.session.commit()
+
+        stmt = filter_cases(select(*DASHBOARD_COLUMNS), 'izmir', '')
+        seen, after = [], None
+        while True:
+            rows, next_cursor, prev_cursor = paginate_cases(stmt, after=after, page_size=3)
+            seen += [row.case_no for row in rows]
+            if not next_cursor:
+                break
+            self.assertTrue(next_cursor.startswith('r'))
+            after = next_cursor
+        self.assertEqual(sorted(seen), sorted(f'2025/{i}' for i in range(7)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+        rows, _, _ = paginate_cases(stmt, before=prev_cursor, page_size=3)
+        self.assertEqual([row.case_no for row in rows], seen[3:6])
+
+    def test_dashboard_reads_from_replica_until_user_writes(self):
+        from app import read_bind
+        binds = {'replica': {'url': 'sqlite:///:memory:'}}
+        engines = {None: db.engine, 'replica': db.engine}
+
+        with patch.dict(app.config, {'SQLALCHEMY_BINDS': binds}), \
+                patch.object(type(db), 'engines', new_callable=unittest.mock.PropertyMock, return_value=engines):
+            with app.test_request_context('/'):
+                self.assertEqual(read_bind(), {'bind': db.engine})
+
+            self.client.post('/api/cases', data={'case_no': 'R/1', 'client': 'A', 'city': 'Ankara'})
+            with self.client.session_transaction() as sess:
+                self.assertGreater(sess['primary_until'], time.time())
+                sticky = dict(sess)
+            with app.test_request_context('/'):
+                from flask import session
+                session.update(sticky)
+                self.assertIsNone(read_bind())
+
+        with app.test_request_context('/'):
+            self.assertIsNone(read_bind())
+
+    def test_hot_queries_use_indexes(self):
+        for name, uses_index, plan in explain_hot_queries():
+            self.assertTrue(uses_index, f"{name} tam tablo taraması yapıyor:\n{plan}")
+
+    def test_duplicate_case_no_rejected(self):
+        form = {'case_no': '2024/77', 'client': 'A', 'city': 'Ankara'}
+        self.assertEqual(self.client.post('/api/cases', data=form).status_code, 302)
+        response = self.client.post('/api/cases', data=form)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Case.query.filter_by(case_no='2024/77').count(), 1)
+
+    def _add_cases_with_timestamps(self):
+        base = datetime(2026, 1, 1, 12, 0, 0)
+        cases = []
+        for i in range(7):
+            # Son iki dosya aynı anda oluşturulmuş: sıralama id ile kırılmalı
+            created_at = base + timedelta(minutes=min(i, 5))
+            cases.append(Case(case_no=f'P{i}', client=f'Client {i}', city='Ankara' if i % 2 else 'İzmir',
+                              description=f'Uzun açıklama {i}', created_at=created_at))
+        db.session.add_all(cases)
+        db.session.commit()
+        return cases
+
+    def test_dashboard_keyset_pagination(self):
+        cases = self._add_cases_with_timestamps()
+        expected = [c.case_no for c in sorted(cases, key=lambda c: (c.created_at, c.id), reverse=True)]
+
+        stmt = filter_cases(select(*DASHBOARD_COLUMNS), '', '')
+        seen = []
+        after = None
+        while True:
+            rows, next_cursor, prev_cursor = paginate_cases(stmt, after=after, page_size=3)
+            seen += [row.case_no for row in rows]
+            if not next_cursor:
+                break
+            after = next_cursor
+        self.assertEqual(seen, expected)
+
+        # Son sayfadan geri dönüş
+        rows, _, _ = paginate_cases(stmt, before=prev_cursor, page_size=3)
+        self.assertEqual([row.case_no for row in rows], expected[3:6])
+
+        # Filtreler sayfalar boyunca korunur
+        ankara = filter_cases(select(*DASHBOARD_COLUMNS), '', 'Ankara')
+        rows, next_cursor, _ = paginate_cases(ankara, page_size=2)
+        rows2, _, _ = paginate_cases(ankara, after=next_cursor, page_size=2)
+        self.assertEqual([r.case_no for r in rows + rows2], [c for c in expected if c in ('P1', 'P3', 'P5')])
+
+        response = self.client.get('/?per_page=2&city=Ankara')
+        self.assertIn(b'after=', response.data)
+        self.assertIn(b'city=Ankara', response.data)
+        self.assertNotIn('Uzun açıklama'.encode('utf-8'), response.data)
+
+    def test_get_case_returns_full_record(self):
+        case = Case(case_no='2024/9', client='Test', city='Ankara', description='Detaylı not')
+        db.session.add(case)
+        db.session.commit()
+
+        data = self.client.get(f'/api/cases/{case.id}').get_json()
+        self.assertEqual(data['case_no'], '2024/9')
+        self.assertEqual(data['description'], 'Detaylı not')
+        self.assertEqual(self.client.get('/api/cases/999').status_code, 404)
+
+    @patch('app.get_osrm_table', return_value=None)
     @patch('app.get_osrm_route')
-    def test_route_calculation_api(self, mock_get_osrm_route):
+    def test_route_calculation_api(self, mock_get_osrm_route, mock_get_osrm_table):
+        # /table çağrısı başarısız -> her bacak tek tek get_osrm_route ile sorgulanır
         # Mock OSRM to return fixed distance and duration (e.g., 100km, 60mins)
         mock_get_osrm_route.return_value = (100, 60)
 
@@ -65,20 +259,622 @@ class TestApp(unittest.TestCase):
         c1_id = c1.id
         c2_id = c2.id
 
-        response = self.client.post('/api/planla', data={
+        data = self._plan({
             'selected_cases': [c1_id, c2_id],
             'start_city': 'Bursa'
         })
-        self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertIsInstance(data, list)
+        self.assertIsInstance(data['route'], list)
         self.assertTrue(mock_get_osrm_route.called)
 
+    @patch('app.get_osrm_route')
+    @patch('app.get_osrm_table')
+    def test_route_uses_single_table_call(self, mock_get_osrm_table, mock_get_osrm_route):
+        c1 = Case(case_no='C1', client='Client 1', city='Ankara', lat=39.9, lon=32.8)
+        c2 = Case(case_no='C2', client='Client 2', city='İstanbul', lat=41.0, lon=28.9)
+        db.session.add_all([c1, c2])
+        db.session.commit()
+
+        # 0 = Bursa ofis, 1 = Ankara, 2 = İstanbul
+        durations = np.array([[0, 300, 150], [300, 0, 330], [150, 330, 0]], dtype=float)
+        mock_get_osrm_table.return_value = (durations * 1.5, durations)
+
+        data = self._plan({
+            'selected_cases': [c1.id, c2.id],
+            'start_city': 'Bursa'
+        })
+        self.assertEqual(mock_get_osrm_table.call_count, 1)
+        self.assertFalse(mock_get_osrm_route.called)
+        self.assertEqual([s['city'] for s in data['route']], ['İstanbul', 'Ankara'])
+        self.assertEqual(data['route'][0]['distance'], 225.0)
+        self.assertEqual(data['solver'], 'exact')
+        self.assertEqual(data['tour_cost'], 480.0)
+
+    @patch('app.get_osrm_route')
+    @patch('app.get_osrm_table')
+    def test_repeat_plan_served_from_leg_cache(self, mock_get_osrm_table, mock_get_osrm_route):
+        c1 = Case(case_no='C1', client='Client 1', city='Ankara', lat=39.9, lon=32.8)
+        c2 = Case(case_no='C2', client='Client 2', city='İstanbul', lat=41.0, lon=28.9)
+        db.session.add_all([c1, c2])
+        db.session.commit()
+
+        durations = np.array([[0, 300, 150], [300, 0, 330], [150, 330, 0]], dtype=float)
+        mock_get_osrm_table.return_value = (durations * 1.5, durations)
+        form = {'selected_cases': [c1.id, c2.id], 'start_city': 'Bursa'}
+
+        first = self._plan(form)
+        self.assertEqual(mock_get_osrm_table.call_count, 1)
+        self.assertEqual(RouteLeg.query.count(), 6)
+
+        # Bellek katmanı temizlense bile kalıcı katmandan okunur -> ağ çağrısı yok
+        route_leg_cache.clear()
+        plan_cache.clear()
+        second = self._plan(form)
+        self.assertEqual(mock_get_osrm_table.call_count, 1)
+        self.assertFalse(mock_get_osrm_route.called)
+        self.assertEqual(first, second)
+
+        stats = json.loads(self.client.get('/api/route_cache/stats').data)
+        self.assertEqual(stats['db_hits'], 6)
+        self.assertEqual(stats['misses'], 0)
+
+    @patch('app.get_osrm_table')
+    def test_planla_reports_solver_cost_against_greedy(self, mock_get_osrm_table):
+        cities = ['Ankara', 'İstanbul', 'İzmir']
+        cases = [Case(case_no=f'S{i}', client='C', city=c) for i, c in enumerate(cities)]
+        db.session.add_all(cases)
+        db.session.commit()
+
+        # Doğru üzerinde noktalar: ofis 0'da, duraklar 10, -15 ve 20'de.
+        # Greedy 0->10->20->-15 (55 dk), en iyisi 0->-15->10->20 (50 dk)
+        x = np.array([0, 10, -15, 20], dtype=float)
+        durations = np.abs(x[:, None] - x[None, :])
+        mock_get_osrm_table.return_value = (durations, durations)
+        ids = [c.id for c in cases]
+
+        data = self._plan({
+            'selected_cases': ids, 'start_city': 'Bursa', 'solver': 'exact'
+        })
+        self.assertEqual(data['solver'], 'exact')
+        self.assertEqual(data['greedy_cost'], 55.0)
+        self.assertEqual(data['tour_cost'], 50.0)
+        self.assertEqual([s['city'] for s in data['route']], ['İstanbul', 'Ankara', 'İzmir'])
+
+        response = self.client.post('/api/planla', data={
+            'selected_cases': ids, 'start_city': 'Bursa', 'solver': 'quantum'
+        })
+        self.assertEqual(response.status_code, 400)
+
+    @patch('app.get_osrm_route')
+    @patch('app.get_osrm_table')
+    def test_open_breaker_plans_from_haversine_estimate(self, mock_get_osrm_table, mock_get_osrm_route):
+        c1 = Case(case_no='C1', client='Client 1', city='Ankara', lat=39.9334, lon=32.8597)
+        c2 = Case(case_no='C2', client='Client 2', city='İstanbul', lat=41.0082, lon=28.9784)
+        db.session.add_all([c1, c2])
+        db.session.commit()
+
+        for _ in range(app.config['ROUTING_BREAKER_FAILURES']):
+            routing_client.breaker.record(False)
+
+        data = self._plan({
+            'selected_cases': [c1.id, c2.id], 'start_city': 'Bursa'
+        })
+        self.assertFalse(mock_get_osrm_table.called)
+        self.assertFalse(mock_get_osrm_route.called)
+        self.assertEqual(data['routing']['state'], 'open')
+        self.assertEqual(data['estimated_legs'], 2)
+        self.assertEqual([s['leg_source'] for s in data['route']], ['estimated', 'estimated'])
+        # Tahminler önbelleğe yazılmaz
+        self.assertEqual(RouteLeg.query.count(), 0)
+
+    @patch('app.get_osrm_table', return_value=None)
+    @patch('app.get_osrm_route')
+    def test_unroutable_leg_is_estimated(self, mock_get_osrm_route, mock_get_osrm_table):
+        # Durak koordinatı Ankara Adliyesi'dir
+        located = gazetteer.resolve('Ankara')
+        ankara = (located['lat'], located['lon'])
+
+        def fake_route(lat1, lon1, lat2, lon2):
+            if (lat2, lon2) == ankara:
+                return float('inf'), float('inf')
+            return 100.0, 60.0
+        mock_get_osrm_route.side_effect = fake_route
+
+        c1 = Case(case_no='C1', client='Client 1', city='Ankara', lat=ankara[0], lon=ankara[1])
+        c2 = Case(case_no='C2', client='Client 2', city='İstanbul', lat=41.0082, lon=28.9784)
+        db.session.add_all([c1, c2])
+        db.session.commit()
+
+        data = self._plan({
+            'selected_cases': [c1.id, c2.id], 'start_city': 'Bursa'
+        })
+        sources = {s['city']: s['leg_source'] for s in data['route']}
+        self.assertEqual(sources, {'İstanbul': 'routed', 'Ankara': 'estimated'})
+
+    @patch('app.get_osrm_table')
+    def test_route_groups_cases_by_courthouse(self, mock_get_osrm_table):
+        self.client.post('/api/cases', data={'case_no': 'K/1', 'client': 'A', 'city': 'İstanbul',
+                                             'court_office': 'Kartal 3. Asliye Hukuk'})
+        self.client.post('/api/cases', data={'case_no': 'K/2', 'client': 'B', 'city': 'İstanbul',
+                                             'district': 'Kadıköy'})
+        self.client.post('/api/cases', data={'case_no': 'K/3', 'client': 'C', 'city': 'İstanbul',
+                                             'court_office': 'Bakırköy 1. İş Mahkemesi'})
+        cases = {c.case_no: c for c in Case.query.all()}
+        anadolu = gazetteer.resolve('İstanbul', court_office='İstanbul Anadolu 1. Asliye Ceza')
+        self.assertEqual((cases['K/1'].lat, cases['K/1'].lon), (anadolu['lat'], anadolu['lon']))
+        self.assertEqual((cases['K/2'].lat, cases['K/2'].lon), (anadolu['lat'], anadolu['lon']))
+
+        durations = np.array([[0, 60, 90], [60, 0, 50], [90, 50, 0]], dtype=float)
+        mock_get_osrm_table.return_value = (durations, durations)
+        data = self._plan({'selected_cases': [c.id for c in cases.values()], 'start_city': 'Bursa'})
+
+        # Aynı ildeki iki adliye ayrı durak; Anadolu'daki iki dosya tek durakta
+        stops = {s['location_name']: s['cases'] for s in data['route']}
+        self.assertEqual(set(stops), {'İstanbul Anadolu Adliyesi', 'Bakırköy Adliyesi'})
+        self.assertIn('K/1', stops['İstanbul Anadolu Adliyesi'])
+        self.assertIn('K/2', stops['İstanbul Anadolu Adliyesi'])
+        self.assertEqual({s['city'] for s in data['route']}, {'İstanbul'})
+
+    @patch('app.get_osrm_table')
+    def test_schedule_skips_holidays_and_uses_service_times(self, mock_get_osrm_table):
+        c1 = Case(case_no='T1', client='A', city='Ankara', case_type='İcra Takibi')
+        c2 = Case(case_no='T2', client='B', city='Ankara', case_type='Hukuk Davası')
+        db.session.add_all([c1, c2])
+        db.session.commit()
+
+        durations = np.array([[0, 240], [240, 0]], dtype=float)
+        mock_get_osrm_table.return_value = (durations, durations)
+        with patch.dict(app.config, {'SERVICE_MINUTES': {'İcra Takibi': 20}}):
+            # 19 Mart 2026 Ramazan Bayramı arifesi (13:00'e kadar), 20 Mart bayram, ardından hafta sonu
+            data = self._plan({'selected_cases': [c1.id, c2.id], 'start_city': 'Bursa', 'start_date': '2026-03-19'})
+
+        stop = data['route'][0]
+        self.assertEqual(stop['service_minutes'], 65)
+        self.assertEqual(stop['arrival'], '23.03.2026 09:00')
+        self.assertEqual(stop['departure'], '23.03.2026 10:05')
+
+    @patch('app.get_osrm_table')
+    def test_plan_visits_due_stops_before_deadline(self, mock_get_osrm_table):
+        due = Case(case_no='D1', client='A', city='Edirne', priority='Acil', due_date=datetime(2026, 3, 2))
+        free = Case(case_no='D2', client='B', city='Balıkesir')
+        db.session.add_all([due, free])
+        db.session.commit()
+
+        # Yalnızca yol süresine bakılsa önce yakındaki D2'ye gidilir ve D1 ertesi güne kalır
+        durations = np.array([[0, 400, 60], [400, 0, 400], [400, 400, 0]], dtype=float)
+        mock_get_osrm_table.return_value = (durations, durations)
+        form = {'selected_cases': [due.id, free.id], 'start_city': 'Bursa', 'start_date': '2026-03-02'}
+        data = self._plan(dict(form, solver='exact'))
+        self.assertEqual(data['solver'], 'exact+deadline')
+        self.assertEqual([s['cases'] for s in data['route']], ['D1 (A)', 'D2 (B)'])
+        self.assertEqual(data['route'][0]['due_date'], '02.03.2026')
+        self.assertEqual(data['missed_deadlines'], 0)
+        self.assertEqual(data['deadline_mode'], 'soft')
+
+        # Teslim tarihi geçmiş dosya işaretlenir
+        due.due_date = datetime(2026, 2, 27)
+        db.session.commit()
+        data = self._plan(dict(form, selected_cases=[due.id], deadline_mode='hard'))
+        self.assertTrue(data['route'][0]['deadline_missed'])
+        self.assertEqual(data['missed_deadlines'], 1)
+
+        response = self.client.post('/api/planla', data=dict(form, deadline_mode='esnek'))
+        self.assertEqual(response.status_code, 400)
+
+    def test_offline_backend_plans_without_network(self):
+        c1 = Case(case_no='C1', client='Client 1', city='Ankara', district='Çankaya')
+        c2 = Case(case_no='C2', client='Client 2', city='İzmir', district='Konak')
+        db.session.add_all([c1, c2])
+        db.session.commit()
+
+        router = GraphRouter(RoadGraph.load(app.config['ROAD_GRAPH_PATH']))
+        with patch('app.routing_client', router), patch('routing.RoutingClient._get_json') as mock_http:
+            data = self._plan({'selected_cases': [c1.id, c2.id], 'start_city': 'Bursa'})
+            status = self.client.get('/api/routing/status').get_json()
+        self.assertFalse(mock_http.called)
+        self.assertEqual(status['backend'], 'offline')
+        self.assertEqual([s['city'] for s in data['route']], ['İzmir', 'Ankara'])
+        self.assertEqual([s['leg_source'] for s in data['route']], ['routed', 'routed'])
+        # Çevrimdışı bacaklar önbelleğe yazılmaz
+        self.assertEqual(RouteLeg.query.count(), 0)
+
+    def test_multi_lawyer_plan_respects_follower_and_splits_by_region(self):
+        cases = [
+            Case(case_no='V1', client='A', city='Edirne'),
+            Case(case_no='V2', client='B', city='Tekirdağ'),
+            Case(case_no='V3', client='C', city='Kırıkkale'),
+            Case(case_no='V4', client='D', city='Konya'),
+            # Batıda ama takip eden avukatı belli (ad büyük/küçük harf farkıyla yazılmış)
+            Case(case_no='V5', client='E', city='İzmir', follower_lawyer='av. ayşe  fatma'),
+        ]
+        db.session.add_all(cases)
+        db.session.commit()
+        lawyers = [
+            {'name': 'Av. Ali Veli', 'office': 'İstanbul', 'capacity': 2},
+            {'name': 'Av. Ayşe Fatma', 'office': 'Ankara', 'capacity': 2},
+        ]
+
+        router = GraphRouter(RoadGraph.load(app.config['ROAD_GRAPH_PATH']))
+        with patch('app.routing_client', router):
+            data = self._plan({'selected_cases': [c.id for c in cases], 'lawyers': json.dumps(lawyers)})
+        self.assertEqual(data['mode'], 'multi')
+        self.assertEqual(data['unassigned'], [])
+        west, east = data['itineraries']
+        self.assertEqual(west['lawyer'], 'Av. Ali Veli')
+        self.assertEqual(sorted(s['city'] for s in west['route']), ['Edirne', 'Tekirdağ'])
+        self.assertEqual(sorted(s['city'] for s in east['route']), ['Konya', 'Kırıkkale', 'İzmir'])
+        self.assertEqual(data['tour_cost'], round(west['tour_cost'] + east['tour_cost'], 1))
+        self.assertEqual(data['max_tour_cost'], max(west['tour_cost'], east['tour_cost']))
+
+        response = self.client.post('/api/planla', data={'selected_cases': [cases[0].id], 'lawyers': '[{"name": "Av. X"}]'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/planla', data={
+            'selected_cases': [cases[0].id], 'lawyers': json.dumps([{'name': 'Av. X', 'office': 'Atlantis'}])})
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_plans_share_one_leg_matrix(self):
+        cases = [Case(case_no=f'B{i}', client='K', city=city) for i, city in
+                 enumerate(['Ankara', 'İzmir', 'Konya', 'Eskişehir', 'Edirne'])]
+        db.session.add_all(cases)
+        db.session.commit()
+        ids = [c.id for c in cases]
+        specs = [
+            {'selected_cases': ids[:3], 'start_city': 'Bursa', 'start_date': '2026-03-02'},
+            {'selected_cases': ids[1:4], 'start_city': 'İstanbul', 'start_date': '2026-03-09'},
+            {'selected_cases': ids, 'start_date': '2026-03-02', 'deadline_mode': 'hard',
+             'lawyers': [{'name': 'Av. Ali Veli', 'office': 'İstanbul'}, {'name': 'Av. Can Öz', 'office': 'Ankara'}]},
+        ]
+
+        router = GraphRouter(RoadGraph.load(app.config['ROAD_GRAPH_PATH']))
+        with patch('app.routing_client', router), patch('app.build_leg_matrix', wraps=build_leg_matrix) as legs:
+            response = self.client.post('/api/planla/batch', json={'plans': specs})
+            self.assertEqual(response.status_code, 202)
+            job_id = response.get_json()['job_id']
+            wait_for_job(job_id, timeout=10)
+            data = self.client.get(f'/api/jobs/{job_id}/result').get_json()
+            # Bursa, İstanbul, Ankara ofisleri + 5 adliye (Ankara ofisi ve adliyesi ayrı noktalar)
+            self.assertEqual(legs.call_count, 1)
+            self.assertEqual(len(legs.call_args[0][0]), data['locations'])
+            self.assertLessEqual(data['locations'], 8)
+
+            plan_cache.clear()
+            single = self._plan({'selected_cases': ids[1:4], 'start_city': 'İstanbul', 'start_date': '2026-03-09'})
+        batch_single, batch_multi = data['plans'][1], data['plans'][2]
+        self.assertEqual(len(data['plans']), 3)
+        self.assertEqual(batch_single['route'], single['route'])
+        self.assertEqual(batch_single['tour_cost'], single['tour_cost'])
+        self.assertEqual(batch_multi['mode'], 'multi')
+        self.assertEqual(sum(len(it['route']) for it in batch_multi['itineraries']), 5)
+
+        # Önbellekteki planlar matris kurulmadan döner
+        with patch('app.routing_client', router):
+            response = self.client.post('/api/planla/batch', json={'plans': specs[1:2]})
+            job_id = response.get_json()['job_id']
+            wait_for_job(job_id, timeout=10)
+        data = self.client.get(f'/api/jobs/{job_id}/result').get_json()
+        self.assertEqual((data['cached'], data['locations']), (1, 0))
+        self.assertTrue(data['plans'][0]['cached'])
+
+        self.assertEqual(self.client.post('/api/planla/batch', json={'plans': []}).status_code, 400)
+        response = self.client.post('/api/planla/batch', json={'plans': [specs[0], {'selected_cases': ids, 'solver': 'x'}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Plan 2', response.get_json()['error'])
+
+    def test_batch_near_duplicate_uncovered_stops(self):
+        # Sözlükte olmayan, aynı ~11 m hücresindeki iki koordinat farklı planlara düşer
+        cases = [Case(case_no=f'X{i}', client='K', city='Xland', lat=lat, lon=2.0)
+                 for i, lat in enumerate([2.000001, 2.000003])]
+        db.session.add_all(cases)
+        db.session.commit()
+        specs = [
+            {'selected_cases': [cases[0].id, cases[1].id], 'start_city': 'Bursa', 'start_date': '2026-03-02'},
+            {'selected_cases': [cases[1].id], 'start_city': 'Bursa', 'start_date': '2026-03-02'},
+        ]
+        with patch('app.routing_client', GraphRouter(RoadGraph.load(app.config['ROAD_GRAPH_PATH']))):
+            response = self.client.post('/api/planla/batch', json={'plans': specs})
+            job_id = response.get_json()['job_id']
+            wait_for_job(job_id, timeout=10)
+        status = self.client.get(f'/api/jobs/{job_id}').get_json()
+        self.assertEqual(status['status'], 'done', status.get('error'))
+        data = self.client.get(f'/api/jobs/{job_id}/result').get_json()
+        self.assertEqual([len(plan['route']) for plan in data['plans']], [1, 1])
+
+    def test_precomputed_matrix_serves_known_legs(self):
+        import tempfile
+        from province_matrix import ProvinceMatrix
+        c1 = Case(case_no='P1', client='Client 1', city='Ankara')
+        c2 = Case(case_no='P2', client='Client 2', city='İzmir')
+        # Sözlükte olmayan nokta: bacakları yönlendiriciden gelir
+        c3 = Case(case_no='P3', client='Client 3', city='Bilinmeyen', lat=39.5, lon=35.5)
+        db.session.add_all([c1, c2, c3])
+        db.session.commit()
+
+        router = GraphRouter(RoadGraph.load(app.config['ROAD_GRAPH_PATH']))
+        points = [(name, lat, lon) for name, lat, lon in province_matrix_points()
+                  if name in ('Bursa', 'Ankara Adliyesi', 'İzmir Adliyesi')]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'matrix.npy')
+            ProvinceMatrix.build(points, router)[0].save(path)
+            matrix = ProvinceMatrix.load(path)
+            self.assertIsInstance(matrix.data, np.memmap)
+
+            before = ROUTING_LEGS.value(source='matrix')
+            with patch('app.routing_client', router), patch('app.province_matrix', matrix), \
+                    patch.object(router, 'table', wraps=router.table) as table:
+                data = self._plan({'selected_cases': [c1.id, c2.id], 'start_city': 'Bursa'})
+                self.assertFalse(table.called)
+                self.assertEqual([s['city'] for s in data['route']], ['İzmir', 'Ankara'])
+                self.assertEqual(ROUTING_LEGS.value(source='matrix') - before, 6)
+
+                with patch.dict(app.config, GAZETTEER_SNAP_KM=0):
+                    data = self._plan({'selected_cases': [c1.id, c2.id, c3.id], 'start_city': 'Bursa'})
+                self.assertEqual(table.call_count, 1)
+                self.assertEqual(len(data['route']), 3)
+            # Matris başka arka uçla üretilmişse kullanılmaz
+            with patch('app.province_matrix', matrix), patch('app.get_osrm_table') as mock_table:
+                mock_table.return_value = (np.ones((3, 3)), np.ones((3, 3)))
+                plan_cache.clear()
+                self._plan({'selected_cases': [c1.id, c2.id], 'start_city': 'Bursa'})
+                self.assertTrue(mock_table.called)
+
+    def test_metrics_endpoint(self):
+        c1 = Case(case_no='M1', client='Client 1', city='Ankara')
+        c2 = Case(case_no='M2', client='Client 2', city='İzmir')
+        db.session.add_all([c1, c2])
+        db.session.commit()
+
+        router = GraphRouter(RoadGraph.load(app.config['ROAD_GRAPH_PATH']))
+        with patch('app.routing_client', router):
+            self._plan({'selected_cases': [c1.id, c2.id], 'start_city': 'Bursa'})
+        self.client.get('/')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        body = response.get_data(as_text=True)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_requests_total{endpoint="index",method="GET",status="200"}', body)
+        self.assertIn('db_queries_per_request_count{endpoint="index"}', body)
+        self.assertIn('route_plan_duration_seconds_count{phase="fetch"}', body)
+        self.assertIn('route_plan_duration_seconds_count{phase="solve"}', body)
+        self.assertIn('routing_call_duration_seconds_count{backend="offline",call="table"}', body)
+        self.assertIn('cache_hit_ratio{cache="plan"}', body)
+
+    @patch('app.get_osrm_table')
+    def test_plan_job_status_and_result(self, mock_get_osrm_table):
+        c1 = Case(case_no='C1', client='Client 1', city='Ankara', lat=39.9, lon=32.8)
+        db.session.add(c1)
+        db.session.commit()
+        mock_get_osrm_table.return_value = (np.array([[0, 450], [450, 0]]), np.array([[0, 300], [300, 0]]))
+
+        response = self.client.post('/api/planla', data={'selected_cases': [c1.id], 'start_city': 'Bursa'})
+        self.assertEqual(response.status_code, 202)
+        job = response.get_json()
+        wait_for_job(job['job_id'], timeout=10)
+
+        status = self.client.get(job['status_url']).get_json()
+        self.assertEqual(status['status'], 'done')
+        self.assertEqual(status['progress'], 100.0)
+
+        result = self.client.get(job['result_url']).get_json()
+        self.assertEqual(result['route'][0]['city'], 'Ankara')
+
+        self.assertEqual(self.client.get('/api/jobs/unknown').status_code, 404)
+
+    @patch('app.calculate_route', side_effect=RuntimeError('hesaplama çöktü'))
+    def test_failed_plan_job_reports_error(self, mock_calculate_route):
+        response = self.client.post('/api/planla', data={'selected_cases': [1], 'start_city': 'Bursa'})
+        job = response.get_json()
+        wait_for_job(job['job_id'], timeout=10)
+
+        status = self.client.get(job['status_url']).get_json()
+        self.assertEqual(status['status'], 'failed')
+        self.assertIn('hesaplama çöktü', status['error'])
+        self.assertEqual(self.client.get(job['result_url']).status_code, 500)
+
+    def test_orphaned_job_reported_as_failed(self):
+        # Sahibi worker ölmüş iş: ilerleme yazmayı bırakmış ve bu süreçte çalışmıyor
+        stale = datetime.now(timezone.utc) - timedelta(seconds=app.config['JOB_STALE_TIMEOUT'] + 60)
+        orphan = Job(kind='plan', status='running', progress=40.0, updated_at=stale)
+        fresh = Job(kind='plan', status='running', progress=40.0)
+        db.session.add_all([orphan, fresh])
+        db.session.commit()
+
+        status = self.client.get(f'/api/jobs/{orphan.id}').get_json()
+        self.assertEqual(status['status'], 'failed')
+        self.assertIn('yarıda kaldı', status['error'])
+        self.assertEqual(self.client.get(f'/api/jobs/{orphan.id}/result').status_code, 500)
+        self.assertEqual(self.client.get(f'/api/jobs/{fresh.id}').get_json()['status'], 'running')
+
+    @patch('app.get_osrm_table')
+    def test_repeat_plan_served_from_plan_cache(self, mock_get_osrm_table):
+        c1 = Case(case_no='C1', client='Client 1', city='Ankara', lat=39.9, lon=32.8)
+        c2 = Case(case_no='C2', client='Client 2', city='İstanbul', lat=41.0, lon=28.9)
+        db.session.add_all([c1, c2])
+        db.session.commit()
+
+        durations = np.array([[0, 300, 150], [300, 0, 330], [150, 330, 0]], dtype=float)
+        mock_get_osrm_table.return_value = (durations * 1.5, durations)
+        form = {'selected_cases': [c2.id, c1.id], 'start_city': 'Bursa', 'start_date': '2026-W09'}
+
+        first = self._plan(form)
+        self.assertFalse(first['cached'])
+
+        # Aynı seçim (farklı sırada, aynı haftanın başka bir günü) önbellekten anında döner
+        started = time.perf_counter()
+        response = self.client.post('/api/planla', data=dict(form, selected_cases=[c1.id, c2.id], start_date='2026-02-23'))
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertEqual(response.status_code, 200)
+        second = response.get_json()
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['route'], first['route'])
+
+        # Dosya güncellenince plan önbellekten düşer
+        self.client.post(f'/api/cases/update/{c1.id}', data={'client': 'Yeni Müvekkil'})
+        self.assertEqual(plan_cache.stats()['entries'], 0)
+        third = self._plan(form)
+        self.assertFalse(third['cached'])
+        self.assertIn('Yeni Müvekkil', third['route'][1]['cases'])
+
+    @patch('app.routing_client.session.get')
+    def test_osrm_table_is_chunked(self, mock_get):
+        def fake_table(url, timeout):
+            query = url.split('?')[1]
+            params = dict(p.split('=') for p in query.split('&'))
+            sources = params['sources'].split(';')
+            destinations = params['destinations'].split(';')
+            response = unittest.mock.Mock(status_code=200)
+            response.json.return_value = {
+                'code': 'Ok',
+                'durations': [[0.0 if s == d else 600.0 for d in destinations] for s in sources],
+                'distances': [[0.0 if s == d else 10000.0 for d in destinations] for s in sources],
+            }
+            return response
+        mock_get.side_effect = fake_table
+
+        app.config['OSRM_TABLE_MAX_COORDS'] = 4
+        try:
+            coords = [(37.0 + i, 30.0 + i) for i in range(5)]
+            dist, dur = get_osrm_table(coords)
+        finally:
+            app.config['OSRM_TABLE_MAX_COORDS'] = 100
+
+        # 5 koordinat, 2'lik bloklar -> 3x3 = 9 istek
+        self.assertEqual(mock_get.call_count, 9)
+        self.assertTrue(np.all(np.diag(dur) == 0))
+        off_diagonal = ~np.eye(5, dtype=bool)
+        self.assertTrue(np.all(dur[off_diagonal] == 10.0))
+        self.assertTrue(np.all(dist[off_diagonal] == 10.0))
+
     def test_download_template(self):
         response = self.client.get('/api/download_template')
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.mimetype, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
+    def _upload(self, data, filename):
+        """Dosyayı JSON modunda yükler, içe aktarma işini bekler ve raporu döner."""
+        response = self.client.post('/api/upload_excel?format=json', data={
+            'file': (data, filename)
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 202, response.data)
+        job_id = response.get_json()['job_id']
+        wait_for_job(job_id, timeout=10)
+        response = self.client.get(f'/api/jobs/{job_id}/result')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.get_json()
+
+    def _wait_for_redirected_import(self, response):
+        job_id = response.headers['Location'].split('import_job=')[1]
+        wait_for_job(job_id, timeout=10)
+
+    def test_upload_excel_report(self):
+        db.session.add(Case(case_no='2024/OLD', client='Eski', city='Bursa'))
+        db.session.commit()
+
+        df = pd.DataFrame({
+            'case_no': ['2024/A', '2024/OLD', '  2024/A ', None, '2024/B', '2024/C', '2024/D'],
+            'client': ['Işık A.Ş.', 'X', 'Y', 'Z', 'B', 'C', 'D'],
+            'city': ['Ankara', 'Bursa', 'Ankara', 'İzmir', None, 'İzmir', 'Bilinmeyen'],
+            'due_date': ['2026-03-01', None, None, None, None, 'yarın', None],
+            'lat': [None, None, None, None, None, None, 40.5],
+            'lon': [None, None, None, None, None, None, 30.5],
+        })
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            df.to_excel(writer, index=False)
+        output.seek(0)
+
+        report = self._upload(output, 'test.xlsx')
+
+        self.assertEqual((report['inserted'], report['skipped'], report['rejected']), (2, 2, 3))
+        by_row = {r['row']: r for r in report['rows']}
+        self.assertEqual(by_row[3]['reason'], 'zaten kayıtlı')
+        self.assertEqual(by_row[4]['reason'], 'dosyada mükerrer dosya no')
+        self.assertEqual(by_row[5]['reason'], "'case_no' boş")
+        self.assertEqual(by_row[6]['reason'], "'city' boş")
+        self.assertEqual(by_row[7]['reason'], "'due_date' tarih olarak okunamadı")
+
+        a = Case.query.filter_by(case_no='2024/A').one()
+        self.assertEqual((a.client, a.status, a.priority), ('Işık A.Ş.', 'Aktif', 'Normal'))
+        self.assertEqual(a.due_date.isoformat(), '2026-03-01')
+        self.assertIsNotNone(a.lat)
+        d = Case.query.filter_by(case_no='2024/D').one()
+        self.assertEqual((d.lat, d.lon), (40.5, 30.5))
+        self.assertEqual(case_stats.get()['total'], 3)
+
+    def test_upload_csv_in_batches(self):
+        lines = ['case_no,client,city']
+        lines += [f'B/{i},Müvekkil {i},Ankara' for i in range(25)]
+        lines += ['B/3,Tekrar,Ankara', ',Boş,Ankara', '', 'B/99,Son,İzmir']
+        data = io.BytesIO(('\n'.join(lines) + '\n').encode('utf-8'))
+
+        with patch.dict(app.config, {'IMPORT_BATCH_SIZE': 10}):
+            report = self._upload(data, 'dosyalar.csv')
+
+        self.assertEqual((report['inserted'], report['skipped'], report['rejected']), (26, 1, 1))
+        self.assertEqual(report['rows'], [
+            {'row': 27, 'case_no': 'B/3', 'status': 'skipped', 'reason': 'dosyada mükerrer dosya no'},
+            {'row': 28, 'case_no': None, 'status': 'rejected', 'reason': "'case_no' boş"},
+        ])
+        self.assertEqual(Case.query.filter_by(case_no='B/99').one().city, 'İzmir')
+
+    def test_upload_limits(self):
+        csv_data = 'case_no,client,city\n' + ''.join(f'L/{i},A,Ankara\n' for i in range(5))
+
+        with patch.dict(app.config, {'IMPORT_MAX_ROWS': 4}):
+            response = self.client.post('/api/upload_excel', data={
+                'file': (io.BytesIO(csv_data.encode()), 'big.csv')
+            }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 413)
+
+        with patch.dict(app.config, {'IMPORT_MAX_BYTES': 20}):
+            response = self.client.post('/api/upload_excel', data={
+                'file': (io.BytesIO(csv_data.encode()), 'big.csv')
+            }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 413)
+
+        # Content-Length'siz parçalı yükleme: gövde MAX_CONTENT_LENGTH'te kesilir, diske alınmaz
+        from werkzeug.test import EnvironBuilder
+        environ = EnvironBuilder(path='/api/upload_excel', method='POST', data={
+            'file': (io.BytesIO(csv_data.encode()), 'big.csv')
+        }, content_type='multipart/form-data').get_environ()
+        del environ['CONTENT_LENGTH']
+        environ['wsgi.input_terminated'] = True
+        with patch.dict(app.config, {'MAX_CONTENT_LENGTH': 40}), patch('tempfile.mkstemp') as mkstemp:
+            response = self.client.open(environ)
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('MB olabilir', response.get_data(as_text=True))
+        mkstemp.assert_not_called()
+
+        response = self.client.post('/api/upload_excel', data={
+            'file': (io.BytesIO(b'city\nAnkara\n'), 'eksik.csv')
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Case.query.count(), 0)
+
+    def test_export_streams_with_filters(self):
+        db.session.add_all([
+            Case(case_no='E/1', client='Işık', city='Ankara', due_date=datetime(2026, 5, 1).date()),
+            Case(case_no='E/2', client='Demir', city='Bursa'),
+            Case(case_no='E/3', client='Çelik', city='Ankara', description='satır1\nsatır2'),
+        ])
+        db.session.commit()
+
+        response = self.client.get('/api/export_excel?format=csv&city=Ankara')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        df = pd.read_csv(io.StringIO(response.get_data().decode('utf-8-sig')), dtype=str)
+        self.assertEqual(sorted(df['case_no']), ['E/1', 'E/3'])
+        self.assertEqual(df.set_index('case_no').loc['E/1', 'due_date'], '2026-05-01')
+        self.assertEqual(df.set_index('case_no').loc['E/3', 'description'], 'satır1\nsatır2')
+
+        response = self.client.get('/api/export_excel?search=celik')
+        self.assertTrue(response.is_streamed)
+        df = pd.read_excel(io.BytesIO(response.get_data()))
+        self.assertEqual(list(df['case_no']), ['E/3'])
+        self.assertEqual(list(df.columns)[:4], ['case_no', 'client', 'opponent', 'city'])
+
+        self.assertEqual(self.client.get('/api/export_excel?format=pdf').status_code, 400)
+
     def test_upload_excel(self):
         # Create a sample Excel file in memory
         df = pd.DataFrame({
@@ -97,6 +893,7 @@ class TestApp(unittest.TestCase):
         }, content_type='multipart/form-data')
 
         self.assertEqual(response.status_code, 302) # Redirects to index
+        self._wait_for_redirected_import(response)
 
         # Verify data inserted
         case = Case.query.filter_by(case_no='2024/TEST').first()
@@ -115,10 +912,460 @@ class TestApp(unittest.TestCase):
             'file': (output2, 'test.xlsx')
         }, content_type='multipart/form-data')
         self.assertEqual(response.status_code, 302)
+        self._wait_for_redirected_import(response)
 
         # Count should still be 1
         count = Case.query.filter_by(case_no='2024/TEST').count()
         self.assertEqual(count, 1)
 
+
+class TestDatabaseProfiles(unittest.TestCase):
+
+    def test_detect_profile(self):
+        self.assertEqual(db_profiles.detect_profile('sqlite:///x.db'), 'sqlite-local')
+        self.assertEqual(db_profiles.detect_profile(
+            'postgresql://u:p@aws-0-eu-central-1.pooler.supabase.com:6543/postgres'), 'pooler')
+        self.assertEqual(db_profiles.detect_profile('postgresql://u:p@db:5432/postgres'), 'direct')
+
+    def test_engine_options(self):
+        pooler = db_profiles.engine_options('pooler', 'postgresql+psycopg://u:p@h:6543/db')
+        self.assertTrue(pooler['pool_pre_ping'])
+        self.assertEqual(pooler['connect_args'], {'prepare_threshold': None})
+        self.assertLess(pooler['pool_recycle'], db_profiles.engine_options('direct', 'postgresql://h/db')['pool_recycle'])
+
+        direct = db_profiles.engine_options('direct', 'postgresql://h/db', {'DB_POOL_SIZE': '12'})
+        self.assertEqual(direct['pool_size'], 12)
+        self.assertNotIn('connect_args', direct)
+
+        self.assertNotIn('pool_size', db_profiles.engine_options('sqlite-local', 'sqlite:///x.db'))
+        with self.assertRaises(ValueError):
+            db_profiles.engine_options('sqlite-local', 'postgresql://h/db')
+        with self.assertRaises(ValueError):
+            db_profiles.engine_options('bilinmeyen', 'postgresql://h/db')
+
+    def test_sqlite_pragmas(self):
+        import sqlite3
+        import tempfile
+        with tempfile.TemporaryDirectory() as tmp:
+            connection = sqlite3.connect(os.path.join(tmp, 'x.db'))
+            db_profiles.apply_sqlite_pragmas(connection)
+            self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            connection.close()
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_heavy_modules_loaded_lazily(self):
+        code = (
+            "import sys, app; "
+            "print(sorted(m for m in ('pandas', 'openpyxl', 'requests') if m in sys.modules))"
+        )
+        env = dict(os.environ, DATABASE_URL='sqlite:///:memory:')
+        output = subprocess.check_output([sys.executable, '-c', code], env=env, text=True,
+                                         cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(output.strip().splitlines()[-1], '[]')
+
+    def test_version_from_build_env(self):
+        from app import get_version
+        get_version.cache_clear()
+        try:
+            with patch.dict(os.environ, {'APP_VERSION': 'v9.9.9'}):
+                self.assertEqual(get_version(), 'v9.9.9')
+        finally:
+            get_version.cache_clear()
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_caseload_is_deterministic_and_resolves_to_courthouses(self):
+        from benchmarks.caseload import generate_cases
+        first = [row for block in generate_cases(500, seed=3, gazetteer=gazetteer) for row in block]
+        again = [row for block in generate_cases(500, seed=3, gazetteer=gazetteer) for row in block]
+        self.assertEqual(first, again)
+        self.assertEqual(len({row['case_no'] for row in first}), 500)
+        for row in first[:100]:
+            located = gazetteer.resolve(row['city'], row['district'], row['court_office'])
+            self.assertEqual(located['match'], 'court_office')
+            self.assertEqual((located['lat'], located['lon']), (row['lat'], row['lon']))
+
+    def test_fake_router_and_regression_check(self):
+        from benchmarks.caseload import FakeRouter
+        from benchmarks.suite import compare
+        router = FakeRouter(latency=0)
+        coords = [(41.0, 29.0), (39.9, 32.8), (38.4, 27.1)]
+        dist, dur = router.table(coords)
+        self.assertAlmostEqual(router.route(*coords[0], *coords[1])[0], dist[0, 1])
+        self.assertEqual(router.requests, 2)
+
+        baseline = {'plan': {'median_ms': 100.0}, 'search': {'median_ms': 10.0}}
+        results = {'plan': {'median_ms': 130.0}, 'search': {'median_ms': 11.0}, 'new': {'median_ms': 1.0}}
+        self.assertEqual(compare(results, baseline, 0.25), [('plan', 100.0, 130.0, 1.3)])
+
+
+class TestFleet(unittest.TestCase):
+
+    def _clusters(self, per_cluster=20, seed=0):
+        rng = np.random.default_rng(seed)
+        west = rng.normal((41.0, 28.5), 0.4, (per_cluster, 2))
+        east = rng.normal((39.5, 33.0), 0.4, (per_cluster, 2))
+        return np.vstack([west, east]), np.array([(41.0, 29.0), (39.9, 32.8)])
+
+    def test_partition_balances_by_capacity_and_geography(self):
+        import fleet
+        points, offices = self._clusters()
+        labels = fleet.partition(points, offices, [1, 1])
+        self.assertEqual(list(labels[:20]), [0] * 20)
+        self.assertEqual(list(labels[20:]), [1] * 20)
+
+        # Kapasite oranı 3:1 ise yük de 30/10 bölünür
+        labels = fleet.partition(points, offices, [3, 1])
+        self.assertEqual(np.bincount(labels, minlength=2).tolist(), [30, 10])
+
+        # Sabit atamalar kotadan düşer, üst sınırı aşan duraklar atanmaz (-1)
+        labels = fleet.partition(points, offices, [1, 1], limits=[15, 25], fixed=[0, 10])
+        self.assertEqual(np.bincount(labels[labels >= 0], minlength=2).tolist(), [15, 15])
+        self.assertEqual(int((labels == -1).sum()), 10)
+
+    def test_solve_tours_in_process_pool_matches_inline(self):
+        import fleet
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+        rng = np.random.default_rng(0)
+        matrices = [rng.random((9, 9)) * 100 for _ in range(3)]
+        with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn')) as pool:
+            parallel = fleet.solve_tours(matrices, 'exact', executor=pool)
+        self.assertEqual(parallel, fleet.solve_tours(matrices, 'exact'))
+
+    def test_parse_lawyers(self):
+        import fleet
+        lawyers = fleet.parse_lawyers('[{"name": " Av. Ali Veli ", "office": "Bursa"}]', default_capacity=3)
+        self.assertEqual(lawyers, [{'name': 'Av. Ali Veli', 'office': 'Bursa', 'capacity': 3}])
+        for bad in ('nope', '[]', '[{"name": "A", "office": "Bursa", "capacity": 0}]',
+                    '[{"name": "A", "office": "Bursa"}, {"name": "a", "office": "İzmir"}]'):
+            with self.assertRaises(ValueError):
+                fleet.parse_lawyers(bad)
+
+class TestWorkCalendar(unittest.TestCase):
+
+    def setUp(self):
+        from work_calendar import WorkCalendar
+        self.calendar = WorkCalendar.load()
+
+    def test_holidays_half_days_and_judicial_recess(self):
+        c = self.calendar
+        self.assertIsNone(c.working_hours(date(2025, 10, 29)))
+        self.assertEqual(c.add_minutes(datetime(2025, 10, 28, 12, 0), 120), datetime(2025, 10, 30, 10, 0))
+        # Adli tatil öncesi son iş günü -> 1 Eylül
+        self.assertEqual(c.add_minutes(datetime(2025, 7, 18, 16, 0), 120), datetime(2025, 9, 1, 10, 0))
+        self.assertEqual(c.next_working(datetime(2026, 3, 19, 13, 0)), datetime(2026, 3, 23, 9, 0))
+        # Günün son dakikasında biten iş o gün 17:00'de biter
+        self.assertEqual(c.add_minutes(datetime(2026, 3, 2, 9, 0), 480), datetime(2026, 3, 2, 17, 0))
+        self.assertEqual(c.working_minutes(datetime(2026, 3, 2, 9, 0), datetime(2026, 3, 3, 10, 0)), 540)
+
+        from work_calendar import WorkCalendar
+        no_recess = WorkCalendar.load(judicial_recess=False)
+        self.assertEqual(no_recess.next_working(datetime(2025, 7, 21, 8, 0)), datetime(2025, 7, 21, 9, 0))
+        # Dizin kapsamı dışındaki yıllar gerektiğinde eklenir
+        self.assertEqual(c.next_working(datetime(2031, 1, 1, 10, 0)), datetime(2031, 1, 2, 9, 0))
+
+    def test_warns_once_past_dated_holidays(self):
+        c = self.calendar
+        self.assertEqual(c.dated_until, 2027)
+        with patch('builtins.print') as mock_print:
+            c.next_working(datetime(2029, 6, 1, 8, 0))
+            c.next_working(datetime(2029, 6, 1, 8, 0))
+            c.working_minutes(datetime(2028, 1, 3, 9, 0), datetime(2029, 1, 3, 9, 0))
+        self.assertEqual(mock_print.call_count, 1)
+        self.assertIn('2028-2030', mock_print.call_args[0][0])
+
+    def test_add_minutes_matches_minute_walk(self):
+        c = self.calendar
+        rng = np.random.default_rng(7)
+
+        def walk(moment, minutes):
+            while minutes > 0:
+                if c.is_working(moment):
+                    minutes -= 1
+                moment += timedelta(minutes=1)
+            return moment
+
+        for offset, minutes in zip(rng.integers(0, 4 * 365 * 24 * 60, 50), rng.integers(1, 2000, 50)):
+            start = datetime(2024, 1, 1) + timedelta(minutes=int(offset))
+            self.assertEqual(c.add_minutes(start, int(minutes)), walk(start, int(minutes)))
+
+    def test_parse_service_minutes(self):
+        from work_calendar import parse_service_minutes
+        self.assertEqual(parse_service_minutes('Ceza Davası=60, İcra Takibi=20'), {'Ceza Davası': 60, 'İcra Takibi': 20})
+        self.assertEqual(parse_service_minutes(''), {})
+        with self.assertRaises(ValueError):
+            parse_service_minutes('Ceza Davası=uzun')
+
+
+class TestGazetteer(unittest.TestCase):
+
+    def test_resolve_court_office_district_and_city(self):
+        g = Gazetteer.load()
+        self.assertEqual(len(g.provinces), 81)
+        self.assertEqual(g.resolve('ISTANBUL', court_office='Kartal 3. Asliye Hukuk')['name'], 'İstanbul Anadolu Adliyesi')
+        self.assertEqual(g.resolve('İstanbul', court_office='İstanbul 3. Asliye Ticaret')['name'], 'İstanbul Adliyesi')
+        self.assertEqual(g.resolve('İstanbul', district='Bahçelievler')['match'], 'district')
+        # Aynı ilçe adı farklı illerde farklı adliyeye gider
+        self.assertEqual(g.resolve('Konya', court_office='Ereğli 2. Asliye Hukuk')['city'], 'Konya')
+        self.assertEqual(g.resolve('Zonguldak', district='Ereğli')['name'], 'Karadeniz Ereğli Adliyesi')
+        self.assertIsNone(g.resolve(None, court_office='Ereğli 2. Asliye Hukuk'))
+        # Binası listelenmemiş il: il merkezinde varsayılan adliye
+        located = g.resolve('Afyon', district='Bilinmeyen')
+        self.assertEqual((located['name'], located['match']), ('Afyonkarahisar Adliyesi', 'city'))
+        self.assertIsNone(g.resolve('Bilinmeyen'))
+
+    def test_kdtree_matches_brute_force(self):
+        rng = np.random.default_rng(5)
+        lats, lons = rng.uniform(36, 42, 300), rng.uniform(26, 45, 300)
+        tree = KDTree(lats, lons)
+        for lat, lon in zip(rng.uniform(35, 43, 200), rng.uniform(25, 46, 200)):
+            index, km = tree.nearest(lat, lon)
+            distances = haversine_matrix(np.r_[lat, lats], np.r_[lon, lons])[0, 1:]
+            self.assertAlmostEqual(km, distances.min(), places=6)
+            self.assertAlmostEqual(distances[index], distances.min(), places=6)
+
+        g = Gazetteer.load()
+        self.assertEqual(g.nearest(40.99, 28.87)['name'], 'Bakırköy Adliyesi')
+        self.assertIsNone(g.nearest(45.0, 20.0, max_km=25))
+
+class TestProvinceMatrix(unittest.TestCase):
+
+    def test_incremental_refresh_routes_only_new_points(self):
+        import tempfile
+        from province_matrix import ProvinceMatrix
+        router = GraphRouter(RoadGraph.load(app.config['ROAD_GRAPH_PATH']))
+        points = [(c['name'], c['lat'], c['lon']) for c in gazetteer.courthouses[:40]]
+        full, computed = ProvinceMatrix.build(points, router)
+        self.assertEqual((len(full), computed), (40, 40))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'matrix.npy')
+            ProvinceMatrix.build(points[:37], router)[0].save(path)
+            previous = ProvinceMatrix.load(path)
+            with patch.object(router, 'table', wraps=router.table) as table:
+                refreshed, computed = ProvinceMatrix.build(points, router, previous=previous, max_coords=20)
+            self.assertEqual(computed, 3)
+            # Her blok yeni 3 nokta + eski noktaların 17'lik dilimi
+            self.assertEqual([len(call.args[0]) for call in table.call_args_list], [20, 20, 6])
+            np.testing.assert_allclose(refreshed.data, full.data)
+
+            # Başka arka uçla üretilmiş matris yeniden kullanılmaz
+            previous.backend = 'osrm'
+            self.assertEqual(ProvinceMatrix.build(points, router, previous=previous)[1], 40)
+
+        rows = full.indices([{'lat': points[2][1], 'lon': points[2][2]}, {'lat': 0.0, 'lon': 0.0}])
+        self.assertEqual(rows.tolist(), [2, -1])
+
+class TestRoadGraph(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = RoadGraph.load(app.config['ROAD_GRAPH_PATH'])
+
+    def test_compiled_graph_matches_edge_list(self):
+        built = RoadGraph.from_csv(Gazetteer.load().city_coords(), app.config['ROAD_EDGES_PATH'])
+        self.assertEqual(built.names, self.graph.names)
+        np.testing.assert_array_equal(built.indptr, self.graph.indptr)
+        np.testing.assert_array_equal(built.indices, self.graph.indices)
+        np.testing.assert_allclose(built.minutes, self.graph.minutes)
+        # Tüm iller birbirine bağlı
+        minutes, _ = self.graph.shortest_paths({0: (0.0, 0.0)})
+        self.assertTrue(np.isfinite(minutes).all())
+
+    def test_astar_matches_dijkstra(self):
+        rng = np.random.default_rng(3)
+        for a, b in rng.integers(0, len(self.graph), size=(30, 2)):
+            minutes, km = self.graph.shortest_paths({int(a): (0.0, 0.0)})
+            self.assertAlmostEqual(self.graph.astar({int(a): (0.0, 0.0)}, {int(b): (0.0, 0.0)})[1], minutes[b], places=4)
+
+    def test_router_table_matches_route(self):
+        router = GraphRouter(self.graph)
+        g = Gazetteer.load()
+        coords = [(c['lat'], c['lon']) for c in g.courthouses[::7]]
+        dist, dur = router.table(coords)
+        self.assertTrue(np.isfinite(dur).all())
+        for i, j in [(0, 1), (2, 5), (len(coords) - 1, 0)]:
+            self.assertAlmostEqual(router.route(*coords[i], *coords[j])[1], dur[i, j], places=4)
+            self.assertAlmostEqual(router.route(*coords[i], *coords[j])[0], dist[i, j], places=4)
+        # Boğaz'ı değil körfezi dolaşan yol: Yalova-İstanbul kuş uçuşundan belirgin uzun
+        yalova, istanbul = g.city_coords()['Yalova'], g.city_coords()['İstanbul']
+        km, _ = router.route(yalova['lat'], yalova['lon'], istanbul['lat'], istanbul['lon'])
+        crow = haversine_matrix([yalova['lat'], istanbul['lat']], [yalova['lon'], istanbul['lon']])[0, 1]
+        self.assertGreater(km, 1.5 * crow)
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_histogram_buckets_are_cumulative(self):
+        h = metrics.Histogram('leg_seconds', 'Bacak süresi', ('backend',), buckets=(0.1, 1), registry=self.registry)
+        for value in (0.05, 0.1, 0.5, 3):
+            h.observe(value, backend='osrm')
+        lines = self.registry.render().splitlines()
+        self.assertEqual(lines[:2], ['# HELP leg_seconds Bacak süresi', '# TYPE leg_seconds histogram'])
+        self.assertEqual(lines[2:], [
+            'leg_seconds_bucket{backend="osrm",le="0.1"} 2',
+            'leg_seconds_bucket{backend="osrm",le="1.0"} 3',
+            'leg_seconds_bucket{backend="osrm",le="+Inf"} 4',
+            'leg_seconds_sum{backend="osrm"} 3.65',
+            'leg_seconds_count{backend="osrm"} 4',
+        ])
+        with self.assertRaises(ValueError):
+            h.observe(1, phase='solve')
+
+    def test_counter_and_callback(self):
+        c = metrics.Counter('rows_total', 'Satırlar', ('status',), registry=self.registry)
+        c.inc(3, status='inserted')
+        c.inc(status='inserted')
+        with self.assertRaises(ValueError):
+            c.inc(-1, status='inserted')
+        metrics.CallbackMetric('ratio', 'Oran', lambda: {('plan',): 0.5, ('leg',): None},
+                               labelnames=('cache',), registry=self.registry)
+        body = self.registry.render()
+        self.assertIn('rows_total{status="inserted"} 4.0', body)
+        self.assertIn('ratio{cache="plan"} 0.5', body)
+        self.assertNotIn('cache="leg"', body)
+
+    def test_query_tracker_is_per_thread(self):
+        tracker = metrics.QueryTracker()
+        self.assertIsNone(tracker.stop())
+        tracker.start()
+        tracker.record(0.25)
+        tracker.record(0.5)
+        self.assertEqual(tracker.stop(), (2, 0.75))
+
+
+class TestRoutingClient(unittest.TestCase):
+
+    def test_route_many_runs_legs_in_parallel(self):
+        client = RoutingClient('http://osrm.test', max_workers=4)
+
+        def slow_route(url, timeout):
+            time.sleep(0.2)
+            response = unittest.mock.Mock(status_code=200)
+            response.json.return_value = {'code': 'Ok', 'routes': [{'distance': 5000.0, 'duration': 600.0}]}
+            return response
+
+        with patch.object(client.session, 'get', side_effect=slow_route):
+            started = time.perf_counter()
+            results = client.route_many([(37.0, 30.0, 38.0, 31.0 + i) for i in range(4)])
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(results, [(5.0, 10.0)] * 4)
+        # Sıralı olsaydı ~0.8 sn sürerdi
+        self.assertLess(elapsed, 0.6)
+
+    def test_route_failure_returns_inf(self):
+        client = RoutingClient('http://osrm.test', max_workers=2)
+        with patch.object(client.session, 'get', side_effect=ConnectionError('down')):
+            self.assertEqual(client.route(37.0, 30.0, 38.0, 31.0), (float('inf'), float('inf')))
+
+    def test_backend_requires_route_and_table(self):
+        class RouteOnly(RoutingBackend):
+            def route(self, lat1, lon1, lat2, lon2):
+                return 0.0, 0.0
+
+        with self.assertRaises(TypeError):
+            RouteOnly()
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_trips_after_failures_and_recovers_after_probe(self):
+        breaker = CircuitBreaker(failure_threshold=2, latency_threshold=1.0, reset_timeout=0.05)
+        breaker.record(False)
+        self.assertTrue(breaker.allow())
+        breaker.record(True, latency=2.0)  # yavaş yanıt da hata sayılır
+        self.assertEqual(breaker.state, 'open')
+        self.assertFalse(breaker.allow())
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())    # tek deneme isteği
+        self.assertFalse(breaker.allow())
+        breaker.record(True, latency=0.1)
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_client_rejects_instantly_while_open(self):
+        client = RoutingClient('http://osrm.test', breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+        with patch.object(client.session, 'get', side_effect=ConnectionError('down')) as mock_get:
+            client.route(37.0, 30.0, 38.0, 31.0)
+            self.assertEqual(client.route(37.0, 30.0, 38.0, 31.0), (float('inf'), float('inf')))
+            self.assertIsNone(client.table([(37.0, 30.0), (38.0, 31.0)]))
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_haversine_matrix(self):
+        # Ankara - İstanbul kuş uçuşu ~350 km
+        km = haversine_matrix([39.9334, 41.0082], [32.8597, 28.9784])
+        self.assertAlmostEqual(km[0, 1], 350, delta=10)
+        self.assertEqual(km[0, 0], 0)
+
+
+class TestSolver(unittest.TestCase):
+
+    def _random_matrix(self, n, seed):
+        rng = np.random.default_rng(seed)
+        points = rng.random((n + 1, 2)) * 500
+        dur = np.linalg.norm(points[:, None] - points[None], axis=2)
+        return dur * (1 + 0.1 * rng.random((n + 1, n + 1)))
+
+    def test_held_karp_matches_brute_force(self):
+        import itertools
+        for seed in range(5):
+            dur = self._random_matrix(6, seed)
+            best = min(solver.path_cost(dur, list(p)) for p in itertools.permutations(range(1, 7)))
+            self.assertAlmostEqual(solver.path_cost(dur, solver.held_karp(dur)), best)
+
+    def test_local_search_improves_greedy_for_large_n(self):
+        dur = self._random_matrix(120, seed=42)
+        started = time.perf_counter()
+        order, method = solver.solve(dur, 'auto', time_budget=0.5)
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(method, 'local')
+        self.assertEqual(sorted(order), list(range(1, 121)))
+        self.assertLessEqual(solver.path_cost(dur, order), solver.path_cost(dur, solver.nearest_neighbour(dur)))
+
+    def _deadline_plan(self, n, seed, hard=False):
+        from work_calendar import WorkCalendar
+        calendar = WorkCalendar.load()
+        rng = np.random.default_rng(seed)
+        dur = self._random_matrix(n, seed)
+        service = rng.integers(30, 180, n + 1).astype(float)
+        start = calendar.to_minutes(datetime(2026, 3, 2, 9, 0))
+        deadlines = np.where(rng.random(n + 1) < 0.4, start + rng.integers(1, 8, n + 1) * 1440.0, np.inf)
+        weights = np.where(rng.random(n + 1) < 0.2, 10.0, 1.0)
+        return solver.DeadlinePlan(dur, start, lambda t, travel, stop: calendar.advance(t, travel, service[stop]),
+                                   deadlines, weights, hard=hard)
+
+    def test_incremental_deadline_cost_matches_full_schedule(self):
+        plan = self._deadline_plan(20, seed=3, hard=True)
+        rng = np.random.default_rng(0)
+        order = [int(k) for k in rng.permutation(np.arange(1, 21))]
+        departures, costs = plan.timeline(order)
+        for i, j in rng.integers(0, 20, (200, 2)):
+            if i == j:
+                continue
+            rest = order[:i] + order[i + 1:]
+            candidate = rest[:j] + [order[i]] + rest[j:]
+            incremental = plan.cost(candidate, base=(order, departures, costs), changed=(min(i, j), max(i, j) + 1))
+            self.assertAlmostEqual(incremental, plan.cost(candidate))
+
+    def test_deadline_search_reduces_lateness_for_50_stops(self):
+        for hard in (False, True):
+            plan = self._deadline_plan(50, seed=11, hard=hard)
+            travel_order = solver.local_search(plan.dur, time_budget=0.1)
+            started = time.perf_counter()
+            order = solver.deadline_search(plan, travel_order, time_budget=0.5)
+            self.assertLess(time.perf_counter() - started, 1.0)
+            self.assertEqual(sorted(order), list(range(1, 51)))
+            self.assertLess(plan.cost(order), plan.cost(travel_order))
+            if hard:
+                # Sert modda her gecikme HARD_PENALTY'dir; geciken durak sayısı artmaz
+                self.assertLessEqual(len(plan.late_stops(order)), len(plan.late_stops(travel_order)))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,248 @@
+"""Çalışma takvimi: mesai saatleri, resmî tatiller, yarım günler ve adli tatil.
+
+Takvim, kapsadığı yıllardaki tüm çalışma aralıklarını ([başlangıç, bitiş)
+dakika) sıralı dizilerde ve her aralığın başına kadar birikmiş çalışma
+dakikasını ayrı bir dizide tutar. "t'ye N çalışma dakikası ekle" ve
+"t'den sonraki ilk çalışma anı" sorguları gün gün yürümek yerine `bisect`
+ile O(log n)'de yanıtlanır. Kapsam dışındaki bir yıl sorulursa dizin o yılı
+da içerecek şekilde bir kez yeniden kurulur.
+
+Sabit tarihli bayramlar her yıl için koddan, hicri takvime bağlı dini
+bayramlar (Ramazan ve Kurban) `data/holidays.csv` dosyasından okunur. Dosyadaki
+son yıldan (`dated_until`) sonrası için dizin kurulursa o yıllarda yalnızca
+sabit tarihli bayramlar bilinir; her yıl için bir kez uyarı basılır ve
+dosyaya yeni yılın tarihleri eklenmelidir.
+Arife günleri ve 28 Ekim yarım gündür (`half_day_end`'e kadar). Adli tatil
+(20 Temmuz - 31 Ağustos) boyunca duruşma yapılmadığından bu günler çalışma
+günü sayılmaz; `judicial_recess=False` ile kapatılabilir.
+"""
+import bisect
+import csv
+import os
+import threading
+from collections import namedtuple
+from datetime import date, datetime, time, timedelta
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'holidays.csv')
+
+FULL = 'full'
+HALF = 'half'
+
+# (ay, gün) -> ad
+FIXED_HOLIDAYS = {
+    (1, 1): 'Yılbaşı',
+    (4, 23): 'Ulusal Egemenlik ve Çocuk Bayramı',
+    (5, 1): 'Emek ve Dayanışma Günü',
+    (5, 19): "Atatürk'ü Anma, Gençlik ve Spor Bayramı",
+    (7, 15): 'Demokrasi ve Millî Birlik Günü',
+    (8, 30): 'Zafer Bayramı',
+    (10, 29): 'Cumhuriyet Bayramı',
+}
+FIXED_HALF_DAYS = {
+    (10, 28): 'Cumhuriyet Bayramı arifesi',
+}
+# Adli tatil, iki uç dahil
+JUDICIAL_RECESS = ((7, 20), (8, 31))
+
+_EPOCH = datetime(2000, 1, 1)
+
+_Index = namedtuple('_Index', 'first_year last_year starts ends cumulative')
+
+
+def _to_minutes(moment):
+    return (moment - _EPOCH).total_seconds() / 60
+
+
+def _from_minutes(minutes):
+    return _EPOCH + timedelta(minutes=minutes)
+
+
+def _minute_of_day(value):
+    return value.hour * 60 + value.minute
+
+
+def parse_clock(value):
+    """'09:00' → time(9, 0)."""
+    hour, _, minute = str(value).strip().partition(':')
+    return time(int(hour), int(minute or 0))
+
+
+def parse_service_minutes(value):
+    """'Ceza Davası=60, İcra Takibi=20' → {'Ceza Davası': 60, 'İcra Takibi': 20}."""
+    minutes = {}
+    for part in (value or '').split(','):
+        name, sep, amount = part.partition('=')
+        if not sep or not name.strip():
+            continue
+        try:
+            minutes[name.strip()] = float(amount)
+        except ValueError:
+            raise ValueError(f"Geçersiz işlem süresi: {part.strip()!r} (beklenen: 'Dosya Türü=dakika')")
+    return minutes
+
+
+class WorkCalendar:
+    """Resmî tatilleri ve adli tatili bilen mesai takvimi."""
+
+    def __init__(self, holidays=None, day_start=time(9), day_end=time(17), half_day_end=time(13),
+                 judicial_recess=True, years=None):
+        if not _minute_of_day(day_start) < _minute_of_day(half_day_end) <= _minute_of_day(day_end):
+            raise ValueError("Mesai saatleri day_start < half_day_end <= day_end olmalı")
+        # {tarih: (tür, ad)}; tarihe özgü kayıtlar sabit bayramlardan önce gelir
+        self.holidays = dict(holidays or {})
+        self.day_start = day_start
+        self.day_end = day_end
+        self.half_day_end = half_day_end
+        self.judicial_recess = judicial_recess
+        self._lock = threading.Lock()
+
+        known = [day.year for day in self.holidays]
+        # Tarihe özgü (dini bayram) kayıtların bulunduğu son yıl; sonrası eksik
+        self.dated_until = max(known, default=None)
+        self._warned_years = set()
+        first, last = years or (min(known, default=datetime.now().year), max(known, default=datetime.now().year))
+        self._index = self._build(first, last)
+
+    @classmethod
+    def load(cls, path=DATA_PATH, **kwargs):
+        with open(path, newline='', encoding='utf-8') as f:
+            holidays = {
+                date.fromisoformat(row['date'].strip()): (row['kind'].strip(), row['name'].strip())
+                for row in csv.DictReader(f)
+            }
+        return cls(holidays, **kwargs)
+
+    def holiday(self, day):
+        """Günün tatil kaydı (tür, ad); tatil değilse None."""
+        found = self.holidays.get(day)
+        if found:
+            return found
+        if (day.month, day.day) in FIXED_HOLIDAYS:
+            return FULL, FIXED_HOLIDAYS[(day.month, day.day)]
+        if (day.month, day.day) in FIXED_HALF_DAYS:
+            return HALF, FIXED_HALF_DAYS[(day.month, day.day)]
+        return None
+
+    def in_judicial_recess(self, day):
+        (m1, d1), (m2, d2) = JUDICIAL_RECESS
+        return self.judicial_recess and date(day.year, m1, d1) <= day <= date(day.year, m2, d2)
+
+    def working_hours(self, day):
+        """Günün (başlangıç, bitiş) mesai saatleri; çalışılmayan günde None."""
+        if day.weekday() >= 5 or self.in_judicial_recess(day):
+            return None
+        found = self.holiday(day)
+        if found and found[0] == FULL:
+            return None
+        return self.day_start, self.half_day_end if found else self.day_end
+
+    def _build(self, first_year, last_year):
+        if self.dated_until is not None:
+            missing = set(range(max(first_year, self.dated_until + 1), last_year + 1)) - self._warned_years
+            if missing:
+                self._warned_years |= missing
+                print(f"Uyarı: {min(missing)}-{max(missing)} yılları için dini bayram tarihleri yok "
+                      f"(holidays.csv {self.dated_until} yılında bitiyor); yalnızca sabit bayramlar kullanılıyor")
+        starts, ends, cumulative = [], [], [0.0]
+        day = date(first_year, 1, 1)
+        while day.year <= last_year:
+            hours = self.working_hours(day)
+            if hours:
+                midnight = _to_minutes(datetime.combine(day, time()))
+                starts.append(midnight + _minute_of_day(hours[0]))
+                ends.append(midnight + _minute_of_day(hours[1]))
+                cumulative.append(cumulative[-1] + ends[-1] - starts[-1])
+            day += timedelta(days=1)
+        return _Index(first_year, last_year, starts, ends, cumulative)
+
+    def _covering(self, first_year, last_year):
+        """[first_year, last_year] yıllarını kapsayan dizin; gerekirse genişletir."""
+        index = self._index
+        if index.first_year <= first_year and last_year <= index.last_year:
+            return index
+        with self._lock:
+            index = self._index
+            if not (index.first_year <= first_year and last_year <= index.last_year):
+                index = self._index = self._build(min(index.first_year, first_year), max(index.last_year, last_year))
+        return index
+
+    @staticmethod
+    def _position(index, minutes):
+        """`minutes` anına kadar birikmiş çalışma dakikası."""
+        i = bisect.bisect_right(index.starts, minutes) - 1
+        if i >= 0 and minutes < index.ends[i]:
+            return index.cumulative[i] + minutes - index.starts[i]
+        return index.cumulative[i + 1]
+
+    def is_working(self, moment):
+        index = self._covering(moment.year, moment.year)
+        minutes = _to_minutes(moment)
+        i = bisect.bisect_right(index.starts, minutes) - 1
+        return i >= 0 and minutes < index.ends[i]
+
+    def next_working(self, moment):
+        """`moment` mesai içindeyse kendisi, değilse bir sonraki mesai başlangıcı."""
+        year = moment.year
+        while True:
+            index = self._covering(year, year + 1)
+            minutes = _to_minutes(moment)
+            i = bisect.bisect_right(index.starts, minutes) - 1
+            if i >= 0 and minutes < index.ends[i]:
+                return moment
+            if i + 1 < len(index.starts):
+                return _from_minutes(index.starts[i + 1])
+            year = index.last_year + 1
+
+    def add_minutes(self, moment, minutes):
+        """`moment`'tan itibaren `minutes` çalışma dakikası sonrası.
+
+        İş günün son dakikasında biterse o günün mesai bitişi döner (ertesi
+        sabah değil).
+        """
+        if minutes <= 0:
+            return moment
+        last_year = moment.year + 1
+        while True:
+            index = self._covering(moment.year, last_year)
+            target = self._position(index, _to_minutes(moment)) + minutes
+            if target <= index.cumulative[-1]:
+                j = bisect.bisect_left(index.cumulative, target) - 1
+                return _from_minutes(index.starts[j] + target - index.cumulative[j])
+            last_year = index.last_year + 1
+
+    def to_minutes(self, moment):
+        """Takvimin dakika ekseninde konum (`advance` için)."""
+        return _to_minutes(moment)
+
+    def from_minutes(self, minutes):
+        return _from_minutes(minutes)
+
+    def advance(self, minutes, travel, service):
+        """Dakika ekseninde `minutes` anında yola çıkılıp `travel` dk sonra
+        varılan durakta `service` çalışma dakikası geçirilirse (varış, ayrılış).
+
+        Çözücünün sıcak döngüsü için datetime nesnesi üretmeden çalışır;
+        dizin dışına taşan nadir durumlarda `next_working`/`add_minutes`'e düşer.
+        """
+        index = self._index
+        at = minutes + travel
+        i = bisect.bisect_right(index.starts, at) - 1
+        if i >= 0 and at < index.ends[i]:
+            arrival, position = at, index.cumulative[i] + at - index.starts[i]
+        elif i >= 0 and i + 1 < len(index.starts):
+            arrival, position = index.starts[i + 1], index.cumulative[i + 1]
+        else:
+            arrival = self.next_working(_from_minutes(at))
+            return _to_minutes(arrival), _to_minutes(self.add_minutes(arrival, service))
+        if service <= 0:
+            return arrival, arrival
+        target = position + service
+        if target > index.cumulative[-1]:
+            return arrival, _to_minutes(self.add_minutes(_from_minutes(arrival), service))
+        j = bisect.bisect_left(index.cumulative, target) - 1
+        return arrival, index.starts[j] + target - index.cumulative[j]
+
+    def working_minutes(self, start, end):
+        """İki an arasındaki çalışma dakikası (end < start ise negatif)."""
+        index = self._covering(min(start.year, end.year), max(start.year, end.year))
+        return self._position(index, _to_minutes(end)) - self._position(index, _to_minutes(start))
@@ -0,0 +1,8 @@
+"""Üretim giriş noktası: `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+Uygulama app.py'de modül düzeyinde kurulur; bu dosya yalnızca onu
+gunicorn'a verir. Şema migrasyonları gunicorn ana sürecinde bir kez
+çalıştırılır (bkz. gunicorn.conf.py `on_starting`); worker'lar yalnızca
+uygulamayı yükler.
+"""
+from app import app  # noqa: F401